@@ -0,0 +1,8 @@
+"""
+In-process load tests for the API. Run from backend/, e.g.:
+
+    python -m benchmarks.async_reads
+
+Everything runs against a throwaway SQLite database (benchmarks.settings),
+never against db.sqlite3.
+"""
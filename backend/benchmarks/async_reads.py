@@ -0,0 +1,48 @@
+"""
+Sync (DRF) vs async (config.async_views) read endpoints under concurrent load.
+
+    python -m benchmarks.async_reads [--requests 400] [--concurrency 50] [--posts 500]
+
+Both variants of each endpoint are served by the same ASGI application and
+database, so the numbers differ only by the view implementation. Feed caching
+is disabled for the run so every request reaches the database.
+"""
+import argparse
+import asyncio
+
+from .harness import setup_django, load
+
+
+ENDPOINTS = [
+    # (label, sync path, async path, params)
+    ('public feed', '/api/v1/learning/posts/public/', '/api/v1/learning/async/posts/public/', {'page_size': 20}),
+    ('discovery', '/api/v1/learning/discovery/', '/api/v1/learning/async/discovery/', {'q': 'python', 'page_size': 20}),
+    ('profile', '/api/v1/users/{pk}/', '/api/v1/users/async/{pk}/', {}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django(fresh=True)
+    from django.conf import settings
+    from .data import generate
+    settings.FEED_CACHE_TIMEOUT = 0
+    user = generate(users=50, posts=args.posts, ratings=100, transactions=0).users[0]
+
+    from config.asgi import application
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'endpoint':<14}{'view':<7}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for label, sync_path, async_path, params in ENDPOINTS:
+        for kind, path in (('sync', sync_path), ('async', async_path)):
+            result = asyncio.run(load(application, path.format(pk=user.pk), args.requests, args.concurrency, params))
+            print(f"{label:<14}{kind:<7}{result['throughput']:>9.1f}{result['p50']:>9.1f}{result['p99']:>9.1f}{result['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Deterministic data generator for the benchmarks.
+
+Everything is bulk inserted, then the denormalized tables the signals would
+normally maintain (rating stats, PostRank, the search index) are rebuilt, so
+the resulting database looks like one grown through the API. The ledger is
+consistent: every wallet's balance equals the sum of its CreditTransactions,
+except that the bank's also holds the unrecorded grant the signup signal gave it.
+"""
+import random
+from collections import defaultdict
+from dataclasses import dataclass, field
+from io import StringIO
+
+TOPICS = [
+    'python', 'django', 'react', 'chess', 'guitar', 'spanish', 'french', 'calculus', 'statistics',
+    'photography', 'cooking', 'drawing', 'rust', 'sql', 'linux', 'piano', 'writing', 'physics',
+]
+
+
+@dataclass
+class Dataset:
+    users: list = field(default_factory=list)
+    posts: int = 0
+    ratings: int = 0
+    transactions: int = 0
+
+    def summary(self):
+        return f"{len(self.users)} users, {self.posts} posts, {self.ratings} ratings, {self.transactions} ledger rows"
+
+
+def generate(users=200, posts=2000, ratings=1000, transactions=2000, seed=1):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+    from django.db import transaction
+    from django.db.models import F
+    from economy.models import CreditTransaction
+    from economy.services import calculate_credits, calculate_tax, get_bank_wallet_id
+    from learning.models import LearningRequestPost
+    from learning.search import get_search_backend
+    from users.models import Wallet, Rating
+
+    User = get_user_model()
+    rng = random.Random(seed)
+    bank_id = get_bank_wallet_id()
+    # One hash for everybody: hashing thousands of passwords would dominate the setup
+    password = make_password('pw')
+
+    with transaction.atomic():
+        people = User.objects.bulk_create([
+            User(email=f'user{i}@bench.example', name=f'User {i}', password=password) for i in range(users)
+        ])
+        wallets = Wallet.objects.bulk_create([Wallet(user=user, balance=0) for user in people])
+        rows = [CreditTransaction(wallet=w, amount=settings.INITIAL_GRANT, transaction_type='INITIAL_GRANT') for w in wallets]
+
+        LearningRequestPost.objects.bulk_create([
+            LearningRequestPost(
+                creator=rng.choice(people),
+                topic_to_learn=' '.join(rng.sample(TOPICS, 2)),
+                topic_to_teach=rng.choice(TOPICS),
+                learning_only_flag=rng.random() < 0.2,
+                status=rng.choices(['Active', 'Completed', 'Cancelled'], [8, 1, 1])[0],
+            )
+            for _ in range(posts)
+        ])
+
+        Rating.objects.bulk_create([
+            Rating(reviewer=reviewer, reviewee=reviewee, score=rng.randint(1, 5))
+            for reviewer, reviewee in (rng.sample(people, 2) for _ in range(ratings))
+        ])
+
+        # Session payments between random pairs, same split as process_session_payment
+        balances = {w.pk: settings.INITIAL_GRANT for w in wallets}
+        taxes = 0
+        while len(rows) < users + transactions:
+            student, teacher = rng.sample(wallets, 2)
+            credits = calculate_credits(rng.choice([15, 30, 45, 60, 90]))
+            if balances[student.pk] < credits:
+                continue
+            tax = calculate_tax(credits)
+            balances[student.pk] -= credits
+            balances[teacher.pk] += credits - tax
+            taxes += tax
+            rows += [
+                CreditTransaction(wallet=student, amount=-credits, transaction_type='SESSION_PAYMENT'),
+                CreditTransaction(wallet=teacher, amount=credits - tax, transaction_type='SESSION_PAYMENT'),
+                CreditTransaction(wallet_id=bank_id, amount=tax, transaction_type='TAX'),
+            ]
+        CreditTransaction.objects.bulk_create(rows, batch_size=1000)
+
+        by_balance = defaultdict(list)
+        for pk, balance in balances.items():
+            by_balance[balance].append(pk)
+        for balance, pks in by_balance.items():
+            Wallet.objects.filter(pk__in=pks).update(balance=balance)
+        # Expects a fresh database: the bank's ledger is exactly these taxes, on top
+        # of the unrecorded grant its wallet got from the signup signal
+        Wallet.objects.filter(pk=bank_id).update(balance=F('balance') + taxes)
+
+    # Also rebuilds PostRank
+    call_command('rebuild_rating_stats', stdout=StringIO())
+    call_command('reconcile_wallets', '--fail-on-drift', stdout=StringIO())
+    get_search_backend().rebuild()
+
+    return Dataset(users=people, posts=posts, ratings=ratings, transactions=len(rows))
@@ -0,0 +1,89 @@
+"""
+Shared pieces of the benchmarks: Django setup on the benchmark database and
+an in-process ASGI client that drives config.asgi.application concurrently,
+exactly like an ASGI server would, minus the sockets.
+"""
+import asyncio
+import os
+import statistics
+import time
+from urllib.parse import urlencode
+
+
+def setup_django(fresh=False):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    import django
+    from django.conf import settings
+
+    if fresh and os.path.exists(settings.DATABASES['default']['NAME']):
+        os.remove(settings.DATABASES['default']['NAME'])
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+async def asgi_get(app, path, params=None, headers=()):
+    """One GET through the ASGI app; returns the status code."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 50000),
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': urlencode(params or {}).encode(),
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    result = {}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The request is complete; park until the app finishes
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+
+    await app(scope, receive, send)
+    return result['status']
+
+
+async def load(app, path, requests, concurrency, params=None, headers=()):
+    """
+    Fires `requests` GETs with at most `concurrency` in flight.
+    Returns {'throughput': req/s, 'p50': ms, 'p99': ms, 'errors': n}.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            status = await asgi_get(app, path, params, headers)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        'throughput': requests / elapsed,
+        'p50': percentile(latencies, 50) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'errors': errors,
+    }
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
@@ -0,0 +1,65 @@
+"""
+Per-user signup path vs bulk onboarding (users.onboarding).
+
+    python -m benchmarks.onboarding [--users 2000] [--hashed 40] [--workers N]
+
+- without passwords (invite flow): create_user() + the wallet signal per user
+  vs onboard_users(), which also writes the INITIAL_GRANT ledger rows
+- with passwords: the same for `--hashed` users, where the password hasher
+  dominates and onboard_users() spreads it over `--workers` processes
+"""
+import argparse
+import time
+
+from .harness import setup_django
+
+
+def timed(fn):
+    """Run fn; return (seconds, SQL queries)."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as captured:
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+    return elapsed, len(captured)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--hashed', type=int, default=40, help="Users with a password to hash.")
+    parser.add_argument('--workers', type=int, help="Hashing processes (default: settings.ONBOARDING_HASH_WORKERS).")
+    args = parser.parse_args()
+
+    setup_django(fresh=True)
+    from django.conf import settings
+    from users.models import User
+    from users.onboarding import onboard_users
+
+    def people(prefix, count, password=None):
+        return [
+            {'email': f'{prefix}{i}@cohort.example', 'name': f'Learner {i}', **({'password': password} if password else {})}
+            for i in range(count)
+        ]
+
+    def signup_path(rows):
+        for row in rows:
+            User.objects.create_user(**row)
+
+    workers = settings.ONBOARDING_HASH_WORKERS if args.workers is None else args.workers
+    runs = [
+        (f'{args.users} users, no password', args.users, None),
+        (f'{args.hashed} users, hashed password', args.hashed, 'correct horse battery staple'),
+    ]
+    print(f"{'workload':<34}{'signup s':>10}{'queries':>9}{'bulk s':>9}{'queries':>9}{'speedup':>9}")
+    for index, (label, count, password) in enumerate(runs):
+        signup, signup_queries = timed(lambda: signup_path(people(f'signup{index}-', count, password)))
+        bulk, bulk_queries = timed(lambda: onboard_users(people(f'bulk{index}-', count, password), workers=workers))
+        print(f"{label:<34}{signup:>10.2f}{signup_queries:>9}{bulk:>9.2f}{bulk_queries:>9}{signup / bulk:>8.1f}x")
+    print(f"(password hashing on {workers} process(es))")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Timed scenarios. Each iteration calls `before()` (untimed, e.g. pick the next
+user) and then `run()` (timed, with its queries captured). HTTP scenarios go
+through the full middleware and DRF stack with Django's test client;
+`run()` returns the HTTP status, or None for service-level scenarios.
+"""
+from django.test import Client
+
+from .data import TOPICS
+
+
+class Scenario:
+    name = ''
+    description = ''
+
+    def __init__(self, dataset, rng):
+        self.dataset = dataset
+        self.rng = rng
+        self.client = Client()
+
+    def before(self):
+        pass
+
+    def run(self):
+        raise NotImplementedError
+
+    def auth_headers(self, user):
+        from rest_framework_simplejwt.tokens import AccessToken
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+
+class DiscoveryBrowse(Scenario):
+    name = 'discovery'
+    description = 'GET discovery, first page of 20, no query'
+
+    def run(self):
+        return self.client.get('/api/v1/learning/discovery/', {'page_size': 20}).status_code
+
+
+class DiscoverySearch(Scenario):
+    name = 'discovery-search'
+    description = 'GET discovery?q=<topic>, first page of 20'
+
+    def before(self):
+        self.query = self.rng.choice(TOPICS)
+
+    def run(self):
+        return self.client.get('/api/v1/learning/discovery/', {'q': self.query, 'page_size': 20}).status_code
+
+
+class PublicFeed(Scenario):
+    name = 'feed'
+    description = 'GET public feed, one of the first 5 pages of 20 (page cache warm)'
+
+    def __init__(self, dataset, rng):
+        from learning.models import LearningRequestPost
+        super().__init__(dataset, rng)
+        active = LearningRequestPost.objects.filter(status='Active').count()
+        self.pages = max(1, min(5, -(-active // 20)))
+
+    def before(self):
+        self.page = self.rng.randint(1, self.pages)
+
+    def run(self):
+        return self.client.get('/api/v1/learning/posts/public/', {'page': self.page, 'page_size': 20}).status_code
+
+
+class PublicFeedUncached(PublicFeed):
+    name = 'feed-uncached'
+    description = 'GET public feed, random page of 20, page cache invalidated first'
+
+    def before(self):
+        from learning import feed_cache
+        super().before()
+        feed_cache.invalidate_feed()
+
+
+class ProfileFetch(Scenario):
+    name = 'profile'
+    description = 'GET another user\'s profile, authenticated'
+
+    def before(self):
+        viewer, self.profile = self.rng.sample(self.dataset.users, 2)
+        self.headers = self.auth_headers(viewer)
+
+    def run(self):
+        return self.client.get(f'/api/v1/users/{self.profile.pk}/', **self.headers).status_code
+
+
+class SessionPayment(Scenario):
+    name = 'session-payment'
+    description = 'process_session_payment for a 30 minute session between two random users'
+
+    def before(self):
+        from users.models import Wallet
+        while True:
+            student, teacher = self.rng.sample(self.dataset.users, 2)
+            wallets = Wallet.objects.in_bulk([student.pk, teacher.pk], field_name='user_id')
+            if wallets[student.pk].balance >= 6:
+                break
+        self.student, self.teacher = wallets[student.pk], wallets[teacher.pk]
+
+    def run(self):
+        from economy.services import process_session_payment
+        process_session_payment(self.student, self.teacher, 30)
+
+
+class SupportClaim(Scenario):
+    name = 'support-claim'
+    description = 'POST support/claim/ by an eligible user (balance 0, no previous claim)'
+
+    def before(self):
+        from users.models import Wallet
+        user = self.rng.choice(self.dataset.users)
+        # Make the user eligible again; not part of the measured request
+        Wallet.objects.filter(user=user).update(balance=0, last_support_claim=None)
+        self.headers = self.auth_headers(user)
+
+    def run(self):
+        return self.client.post('/api/v1/economy/support/claim/', **self.headers).status_code
+
+
+SCENARIOS = [DiscoveryBrowse, DiscoverySearch, PublicFeed, PublicFeedUncached, ProfileFetch, SessionPayment, SupportClaim]
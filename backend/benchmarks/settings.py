@@ -0,0 +1,22 @@
+"""Settings for benchmark runs: the project settings on a separate, throwaway database."""
+import os
+
+from config.settings import *  # noqa: F401,F403
+from config.settings import BASE_DIR, SQLITE_OPTIONS
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCHMARK_DB', str(BASE_DIR / 'benchmarks' / 'benchmark.sqlite3')),
+        'OPTIONS': {**SQLITE_OPTIONS},
+    }
+}
+
+# Per-request query logs would drown the report; the suite counts queries itself
+LOGGING = {**LOGGING, 'loggers': {'config.queries': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False}}}  # noqa: F405
+
+# The suite drives one client far past any per-client budget
+THROTTLE_BUCKETS = {}
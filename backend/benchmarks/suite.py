@@ -0,0 +1,89 @@
+"""
+Benchmark suite for the API hot paths.
+
+    python -m benchmarks [--users 200] [--posts 2000] [--ratings 1000] [--transactions 2000]
+                         [--iterations 200] [--seed 1] [--scenario NAME ...] [--json FILE]
+
+Builds a fresh SQLite database with benchmarks.data, then runs each scenario
+sequentially in-process and reports latency percentiles, serial throughput
+and the number of SQL queries per operation. No external services needed.
+"""
+import argparse
+import json
+import random
+import time
+
+from .harness import setup_django, percentile
+
+WARMUP = 5
+
+
+def measure(scenario, iterations):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(WARMUP):
+        scenario.before()
+        scenario.run()
+
+    latencies, queries, errors = [], [], 0
+    for _ in range(iterations):
+        scenario.before()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            status = scenario.run()
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(captured))
+        if status is not None and status >= 400:
+            errors += 1
+
+    return {
+        'scenario': scenario.name,
+        'iterations': iterations,
+        'throughput': iterations / sum(latencies),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'queries_mean': sum(queries) / iterations,
+        'queries_max': max(queries),
+        'errors': errors,
+    }
+
+
+def main():
+    from .scenarios import SCENARIOS
+
+    names = [scenario.name for scenario in SCENARIOS]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--ratings', type=int, default=1000)
+    parser.add_argument('--transactions', type=int, default=2000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--scenario', action='append', choices=names, help="Only run these (repeatable).")
+    parser.add_argument('--json', help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    setup_django(fresh=True)
+    from .data import generate
+
+    started = time.perf_counter()
+    dataset = generate(args.users, args.posts, args.ratings, args.transactions, seed=args.seed)
+    print(f"Generated {dataset.summary()} in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(args.seed)
+    results = []
+    print(f"{'scenario':<18}{'ops/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'queries':>9}{'max q':>7}{'errors':>8}")
+    for scenario_class in SCENARIOS:
+        if args.scenario and scenario_class.name not in args.scenario:
+            continue
+        result = measure(scenario_class(dataset, rng), args.iterations)
+        results.append(result)
+        print(
+            f"{result['scenario']:<18}{result['throughput']:>9.1f}{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+            f"{result['queries_mean']:>9.1f}{result['queries_max']:>7}{result['errors']:>8}"
+        )
+
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump({'dataset': dataset.summary(), 'seed': args.seed, 'results': results}, fh, indent=2)
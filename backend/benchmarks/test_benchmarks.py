@@ -0,0 +1,25 @@
+import random
+
+import pytest
+from django.db.models import Sum
+from users.models import Wallet
+from economy.models import CreditTransaction
+from .data import generate
+from .scenarios import SCENARIOS
+from .suite import measure
+
+@pytest.mark.django_db
+class TestBenchmarkSuite:
+    def test_generated_ledger_is_consistent(self, settings):
+        dataset = generate(users=10, posts=30, ratings=10, transactions=20)
+        assert len(dataset.users) == 10
+        # Only the bank's wallet came from the signup signal, with an unrecorded grant
+        ledger = CreditTransaction.objects.aggregate(total=Sum('amount'))['total']
+        assert ledger + settings.INITIAL_GRANT == Wallet.objects.aggregate(total=Sum('balance'))['total']
+
+    @pytest.mark.parametrize('scenario_class', SCENARIOS, ids=lambda s: s.name)
+    def test_scenarios_run_without_errors(self, scenario_class):
+        dataset = generate(users=10, posts=30, ratings=10, transactions=20)
+        result = measure(scenario_class(dataset, random.Random(1)), iterations=3)
+        assert result['errors'] == 0
+        assert result['queries_max'] > 0 or scenario_class.name == 'feed'
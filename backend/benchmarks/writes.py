@@ -0,0 +1,111 @@
+"""
+Concurrent write throughput on SQLite, before and after the tuned profile.
+
+    python -m benchmarks.writes [--threads 8] [--writes 50] [--users 200]
+
+Each thread is one writer, as under a threaded WSGI/ASGI server: it alternates
+session payments (economy.services) and post creation (POST posts/create/
+through the full stack). Writes are not retried, so "database is locked"
+shows up as errors. Profiles:
+
+- default: Django's SQLite defaults (rollback journal, deferred transactions)
+- tuned: settings.SQLITE_OPTIONS (WAL, pragmas, immediate transactions)
+- tuned + lane: the above plus settings.SQLITE_WRITE_LANE
+"""
+import argparse
+import threading
+import time
+
+from .harness import setup_django, percentile
+
+SESSION_MINUTES = 5  # 1 credit, tax free
+
+
+def run_profile(dataset, options, journal_mode, lane, threads, writes, seed):
+    import random
+
+    from django.conf import settings
+    from django.db import connection, connections
+    from django.test import Client
+    from rest_framework_simplejwt.tokens import AccessToken
+    from economy.services import process_session_payment
+    from users.models import Wallet
+
+    settings.DATABASES['default']['OPTIONS'] = options
+    settings.SQLITE_WRITE_LANE = lane
+    connections.close_all()
+    with connection.cursor() as cursor:
+        # The journal mode is stored in the database file, the other pragmas are per connection
+        cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+
+    wallets = list(Wallet.objects.filter(user__in=dataset.users))
+    latencies, errors = [], []
+    barrier = threading.Barrier(threads)
+
+    def writer(index):
+        rng = random.Random(seed + index)
+        user = rng.choice(dataset.users)
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        try:
+            barrier.wait()
+            for i in range(writes):
+                started = time.perf_counter()
+                try:
+                    if i % 2:
+                        response = client.post('/api/v1/learning/posts/create/', {
+                            'topic_to_learn': 'benchmarking', 'topic_to_teach': 'sqlite',
+                        })
+                        if response.status_code >= 400:
+                            errors.append(response.status_code)
+                    else:
+                        student, teacher = rng.sample(wallets, 2)
+                        process_session_payment(student, teacher, SESSION_MINUTES)
+                except Exception as e:  # counted, the run goes on
+                    errors.append(e)
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'throughput': (len(latencies) - len(errors)) / elapsed,
+        'p50': percentile(latencies, 50) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=50, help="Writes per thread.")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    setup_django(fresh=True)
+    from django.conf import settings
+    from .data import generate
+    dataset = generate(users=args.users, posts=500, ratings=100, transactions=0, seed=args.seed)
+
+    profiles = [
+        ('default', {}, 'DELETE', False),
+        ('tuned', settings.SQLITE_OPTIONS, 'WAL', False),
+        ('tuned + lane', settings.SQLITE_OPTIONS, 'WAL', True),
+    ]
+    print(f"{args.threads} writers x {args.writes} writes")
+    print(f"{'profile':<14}{'writes/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for label, options, journal_mode, lane in profiles:
+        result = run_profile(dataset, options, journal_mode, lane, args.threads, args.writes, args.seed)
+        print(f"{label:<14}{result['throughput']:>10.1f}{result['p50']:>9.1f}{result['p99']:>9.1f}{result['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Minimal async counterpart of a read-only DRF APIView.
+
+DRF views are synchronous: under ASGI each request holds a thread while it
+waits on the database. AsyncAPIView is a plain Django async view that keeps
+the parts of DRF the hot read endpoints rely on: JWT authentication (through
+users.authentication's cache, loading with the async ORM), the token-bucket
+throttle of config.throttling, APIException -> JSON error responses, the
+conditional GET of config.conditional and DRF's JSON encoding. Handlers get
+a DRF Request wrapper, so query_params, paginators and serializers work
+unchanged; anything that would touch the database must be awaited first.
+"""
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+from users.authentication import CachedJWTAuthentication
+
+from .conditional import make_etag
+from .throttling import TokenBucketThrottle
+
+
+class AsyncAPIView(View):
+    http_method_names = ['get', 'head', 'options']
+    # Responses differ per user (wallet visibility, own posts)
+    vary_headers = ('Authorization',)
+    authentication = CachedJWTAuthentication()
+    throttle_class = TokenBucketThrottle
+    throttle_scope = None
+
+    async def get_version_stamp(self, request):
+        """Return a tuple of values that changes whenever the GET response would, or None."""
+        return None
+
+    async def get_data(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        request = Request(request)
+        try:
+            request.user = await self.authenticate(request)
+            await self.check_throttles(request)
+            stamp = await self.get_version_stamp(request)
+            etag = make_etag(request.get_full_path(), *stamp) if stamp is not None else None
+
+            response = get_conditional_response(request, etag=etag) if etag else None
+            if response is None:
+                response = self.render(await self.get_data(request, *args, **kwargs))
+        except exceptions.APIException as exc:
+            response = self.render({'detail': exc.detail}, exc.status_code)
+            if getattr(exc, 'wait', None):
+                response['Retry-After'] = '%d' % exc.wait
+            return response
+
+        if etag and response.status_code in (200, 304):
+            response['ETag'] = etag
+        patch_vary_headers(response, self.vary_headers)
+        return response
+
+    async def authenticate(self, request):
+        header = self.authentication.get_header(request)
+        raw_token = header and self.authentication.get_raw_token(header)
+        if not raw_token:
+            return AnonymousUser()
+        return await self.authentication.aget_user(self.authentication.get_validated_token(raw_token))
+
+    async def check_throttles(self, request):
+        throttle = self.throttle_class()
+        if not await throttle.aallow_request(request, self):
+            raise exceptions.Throttled(throttle.wait())
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return JsonResponse(data, status=status_code, safe=False, encoder=JSONEncoder)
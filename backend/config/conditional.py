@@ -0,0 +1,37 @@
+"""
+Conditional GET for DRF views.
+
+Views describe their payload with a cheap version stamp (a few aggregate
+values that change whenever the response would). The stamp is hashed into an
+ETag before any serialization happens, so a matching If-None-Match costs only
+the stamp queries and returns 304 Not Modified.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode('utf-8')).hexdigest())
+
+
+class ConditionalGetMixin:
+    # Responses differ per user (wallet visibility, own posts)
+    vary_headers = ('Authorization',)
+
+    def get_version_stamp(self, request):
+        """Return a tuple of values that changes whenever the GET response would."""
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag = make_etag(request.get_full_path(), *self.get_version_stamp(request))
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_vary_headers(response, self.vary_headers)
+        return response
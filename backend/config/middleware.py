@@ -0,0 +1,160 @@
+"""
+Per-request database instrumentation.
+
+QueryInstrumentationMiddleware records every SQL statement a request runs
+(on all database aliases) through connection.execute_wrapper: the query
+count, total DB time and the slowest statement. Views declare how many
+queries they may run with a `query_budget` class attribute.
+
+- The stats are attached to the response as `response.query_stats`
+  (config.testing.assert_query_budget reads them in tests).
+- With DEBUG on they are also sent as X-DB-* response headers.
+- Every request is logged as one JSON line on the `config.queries` logger:
+  INFO normally, WARNING when the view went over its budget.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import routers
+
+logger = logging.getLogger('config.queries')
+
+SLOWEST_SQL_HEADER_LENGTH = 200
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_sql = None
+        self.budget = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if elapsed >= self.slowest_duration:
+                self.slowest_duration, self.slowest_sql = elapsed, sql
+
+    def record(self):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.count > self.budget
+
+    def as_dict(self):
+        return {
+            'queries': self.count,
+            'db_ms': round(self.duration * 1000, 2),
+            'slowest_ms': round(self.slowest_duration * 1000, 2),
+            'slowest_sql': self.slowest_sql,
+            'budget': self.budget,
+        }
+
+
+class QueryInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.query_stats = stats = QueryStats()
+        with stats.record():
+            response = self.get_response(request)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        request.query_stats = stats = QueryStats()
+        # Connections are per thread and the ORM (sync views and the async ORM alike) runs
+        # on this request's thread-sensitive executor thread, so install the wrappers there.
+        recording = await sync_to_async(stats.record)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.close)()
+        return self.finish(request, response, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        request.query_stats.budget = getattr(view_class, 'query_budget', None)
+
+    def finish(self, request, response, stats):
+        response.query_stats = stats
+        data = stats.as_dict()
+
+        if settings.DEBUG:
+            response['X-DB-Query-Count'] = str(stats.count)
+            response['X-DB-Time-Ms'] = str(data['db_ms'])
+            if stats.budget is not None:
+                response['X-DB-Query-Budget'] = str(stats.budget)
+            if stats.slowest_sql:
+                sql = ' '.join(stats.slowest_sql.split())[:SLOWEST_SQL_HEADER_LENGTH]
+                response['X-DB-Slowest-Query'] = sql.encode('ascii', 'replace').decode('ascii')
+
+        level = logging.WARNING if stats.over_budget else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **data,
+            }))
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends the reads of views with `use_replica = True` to a replica (config.routers),
+    unless the client is pinned to the primary after its own recent write.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with routers.read_scope():
+            response = self.get_response(request)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        with routers.read_scope():
+            response = await self.get_response(request)
+        return self.finish(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+        if getattr(view_class, 'use_replica', False) and not routers.is_pinned(request):
+            routers.read_from_replica()
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            routers.pin_to_primary(request)
+        return response
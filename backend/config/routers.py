@@ -0,0 +1,99 @@
+"""
+Primary/replica database routing.
+
+Writes always go to `default` (the primary). Reads go to a replica only
+while a request for a view with `use_replica = True` is being served
+(ReplicaRoutingMiddleware sets that up per request) and never inside a
+transaction on the primary, so economy services that read, lock and write
+in one atomic block stay entirely on the primary.
+
+Read-your-writes: after a client's successful write (any unsafe method)
+its reads are pinned to the primary for settings.REPLICA_PIN_SECONDS, so a
+lagging replica never hides a change from the client that just made it.
+Clients are identified by the user id in their access token, so every token
+(and device) of a user shares the pin; anonymous clients never write. Pins
+live in the REPLICA_PIN_CACHE_ALIAS cache, shared by all processes.
+Authenticated users themselves are always loaded from the primary
+(users.authentication).
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+PIN_KEY_PREFIX = 'db:pin:'
+
+_read_alias = contextvars.ContextVar('replica_read_alias', default=None)
+
+
+def choose_replica():
+    replicas = settings.DATABASE_REPLICAS
+    return random.choice(replicas) if replicas else None
+
+
+@contextmanager
+def read_scope(alias=None):
+    """Reads in this block go to `alias`; None means the defaults, i.e. the primary."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def read_from_replica():
+    """Send the remaining reads of the current read_scope to a replica, if any is configured."""
+    alias = choose_replica()
+    if alias:
+        _read_alias.set(alias)
+    return alias
+
+
+def pin_cache():
+    return caches[settings.REPLICA_PIN_CACHE_ALIAS]
+
+
+def _pin_key(request):
+    # Runs before authentication: read the user id from the token's (verified) claims
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        raw_token = authentication.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+        user_id = authentication.get_validated_token(raw_token)[api_settings.USER_ID_CLAIM]
+    except (AuthenticationFailed, KeyError):
+        return None
+    return f'{PIN_KEY_PREFIX}{user_id}'
+
+
+def pin_to_primary(request):
+    key = _pin_key(request)
+    if key:
+        pin_cache().set(key, True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(request):
+    key = _pin_key(request)
+    return key is not None and pin_cache().get(key, False)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,10 +50,32 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'users.authentication.CachedJWTAuthentication',
+    ),
+    # Only throttles views with a `throttle_scope` listed in THROTTLE_BUCKETS
+    'DEFAULT_THROTTLE_CLASSES': (
+        'config.throttling.TokenBucketThrottle',
+    ),
+    # Client IPs (throttle buckets) come from REMOTE_ADDR. Behind N trusted reverse proxies
+    # set NUM_PROXIES=N to read X-Forwarded-For instead; without it the header is client
+    # controlled and must not be trusted.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
+# Token buckets per scope: (burst, tokens refilled per second). Every request of a scope
+# takes a token from its client IP's bucket and, when authenticated, from its user's
+# bucket too. Use 'config.throttling.CacheBucketStore' to share the buckets between processes.
+THROTTLE_BUCKETS = {
+    # Discovery search: a burst of keystrokes, then 2 searches a second
+    'search': (20, 2),
+    # Profiles with their embedded reviews and posts
+    'profile': (30, 5),
+    # Writes that lock wallets or create rows: 10, then one every 2 seconds
+    'write': (10, 0.5),
+}
+THROTTLE_BACKEND = 'config.throttling.LocalBucketStore'
+THROTTLE_CACHE_ALIAS = 'default'
+
 from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -60,6 +83,9 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    # Outermost, so it sees every query of the request (see config.middleware)
+    'config.middleware.QueryInstrumentationMiddleware',
+    'config.middleware.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -90,16 +116,166 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
+# Logging
+# config.queries: one JSON line per request with its query count, DB time and slowest
+# SQL (config.middleware); WARNING when a view exceeds its query_budget.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'config.queries': {
+            'handlers': ['console'],
+            # In development the same numbers are in the X-DB-* response headers
+            'level': 'WARNING' if DEBUG else 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Run on every new SQLite connection (the backend's init_command hook)
+SQLITE_PRAGMAS = {
+    # Readers no longer block the writer and vice versa. Persisted in the database file.
+    'journal_mode': 'WAL',
+    # fsync at checkpoints only. Safe with WAL: a power loss may drop the last commits, never corrupt.
+    'synchronous': 'NORMAL',
+    # Wait up to 5 s for the write lock instead of failing with "database is locked"
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative means KiB: a 64 MB page cache per connection
+    'cache_size': -64 * 1024,
+}
+
+SQLITE_OPTIONS = {
+    'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+    # Take the write lock at BEGIN. A deferred transaction that has already read fails at once
+    # ("database is locked", busy_timeout or not) when another writer committed in the meantime.
+    'transaction_mode': 'IMMEDIATE',
+}
+
+# Serialize the economy.services transactions on an in-process lock (config.sqlite.serialized_write),
+# so this process' writers queue up instead of spinning on SQLite's file lock
+SQLITE_WRITE_LANE = os.environ.get('SQLITE_WRITE_LANE') == '1'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': SQLITE_OPTIONS,
+    },
+    # Read replica for views with `use_replica = True` (config.routers). Only used when listed
+    # in DATABASE_REPLICAS. Locally, DATABASE_REPLICA=db.replica.sqlite3 uses a second SQLite
+    # file standing in for a replica: `sqlite3 db.sqlite3 ".backup db.replica.sqlite3"`.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ.get('DATABASE_REPLICA', 'db.sqlite3'),
+        'OPTIONS': SQLITE_OPTIONS,
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['config.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = ['replica'] if os.environ.get('DATABASE_REPLICA') else []
+# After a client's own write its reads stay on the primary for this long (seconds). The pins
+# live in REPLICA_PIN_CACHE_ALIAS; a write on one process must pin the reads of all of them,
+# so with several processes it must name a shared cache (it does with REDIS_URL), and one
+# that does not cull live entries.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_CACHE_ALIAS = 'replica-pins'
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'linkandlearn-default',
+    },
+    'feed': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'linkandlearn-feed',
+    },
+    # Holds only the feed generation: culling it would bring back stale pages
+    'feed-generation': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'linkandlearn-feed-generation',
+    },
+    # Read-your-writes pins (config.routers), one per recently writing user
+    'replica-pins': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'linkandlearn-replica-pins',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Share the feed caches and the replica pins between processes with e.g.
+# REDIS_URL=redis://localhost:6379/1. The generation key never expires, so an eviction
+# policy limited to keys with a TTL (Redis volatile-*) never drops it.
+if os.environ.get('REDIS_URL'):
+    CACHES['feed'] = CACHES['feed-generation'] = CACHES['replica-pins'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+# Discovery without a query: the top posts by static score that can get the online boost
+# (learning.views.DiscoveryScoring); the rest are served in index order
+DISCOVERY_CANDIDATE_WINDOW = 200
+# Discovery search: the online boost is scored against at most this many users online
+# (users.presence.online_user_ids), so the roster read and the SQL IN list stay bounded
+DISCOVERY_MAX_ONLINE_IDS = 500
+
+# Public post feed response cache (learning.feed_cache)
+FEED_CACHE_ALIAS = 'feed'
+FEED_GENERATION_CACHE_ALIAS = 'feed-generation'
+FEED_CACHE_TIMEOUT = 300
+
+# SystemConfig.load(): seconds in the shared cache / in the per-process copy
+SYSTEM_CONFIG_CACHE_TTL = 300
+SYSTEM_CONFIG_LOCAL_TTL = 5
+
+# Authenticated users (with their wallet) are cached this many seconds by
+# users.authentication. Use a cache shared by all processes when running more than one.
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TTL = 30
+
+# Credits in a new wallet
+INITIAL_GRANT = 50
+
+# Bulk onboarding (users.onboarding): users per bulk INSERT transaction, processes that hash
+# the passwords in `manage.py onboard_users`, users per request of the admin API, and how
+# many of those may come with a password. The API hashes in the request's own thread and a
+# hash takes about half a second by design: larger imports with passwords belong in the
+# command, API cohorts otherwise get unusable passwords (invite / reset flow).
+ONBOARDING_CHUNK_SIZE = 1000
+ONBOARDING_HASH_WORKERS = os.cpu_count() or 1
+ONBOARDING_API_MAX_USERS = 500
+ONBOARDING_API_MAX_PASSWORDS = 10
+
+# Presence (users.presence): a heartbeat keeps a user online for PRESENCE_TTL seconds.
+# Use 'users.presence.CachePresenceBackend' to share presence between processes.
+PRESENCE_BACKEND = 'users.presence.LocalPresenceBackend'
+PRESENCE_CACHE_ALIAS = 'default'
+PRESENCE_TTL = 600
+
+# Pub/sub used to push wallet updates to WebSocket clients (economy.realtime)
+WALLET_BROKER = 'economy.realtime.InProcessBroker'
+
+# Spread bank-side credits over N BankShard rows instead of the single bank wallet
+# row (0 = off). Requires running `manage.py fold_bank_shards` periodically.
+BANK_CREDIT_SHARDS = 0
+
+# Learning sessions are billed by `manage.py bill_sessions` ticks; a session whose
+# last heartbeat is older than this (seconds) is ended at that heartbeat.
+SESSION_HEARTBEAT_TIMEOUT = 120
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -0,0 +1,37 @@
+"""
+In-process write lane for SQLite.
+
+SQLite has a single writer per database file. Connections are set up by
+settings.SQLITE_OPTIONS (WAL, IMMEDIATE transactions, busy_timeout), so a
+writer that finds the lock taken sleeps and retries inside SQLite until the
+lock frees or busy_timeout runs out. Under load that is a spin on the file
+lock: wake-ups are not ordered and a writer can starve.
+
+With settings.SQLITE_WRITE_LANE on, functions decorated with
+@serialized_write take a process-wide lock before their transaction begins
+and release it after the commit, so this process' writers queue on the lock
+and each one finds the database lock free. Other processes (more workers,
+management commands) still meet on the file lock.
+"""
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_write_lane = threading.RLock()
+
+
+def serialized_write(func):
+    """
+    Run `func` (usually also @transaction.atomic, decorated below this) in the
+    write lane. Calls made inside an open transaction run directly: that
+    transaction already holds the database lock, or the lane.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not settings.SQLITE_WRITE_LANE or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return func(*args, **kwargs)
+        with _write_lane:
+            return func(*args, **kwargs)
+    return wrapper
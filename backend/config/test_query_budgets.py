@@ -0,0 +1,131 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from economy.models import LearningSession
+from economy.services import get_bank_wallet_id
+from learning.models import LearningRequestPost
+from users.models import User, Rating, Wallet
+from .testing import assert_query_budget
+
+def api_views(patterns=None):
+    """(url name, view class) for every non-admin URL pattern."""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            yield from api_views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.name, getattr(pattern.callback, 'view_class', None) or getattr(pattern.callback, 'cls', None)
+
+def client_for(user=None):
+    client = APIClient()
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+@pytest.fixture
+def data(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        get_bank_wallet_id() # steady state: the bank id is cached per process
+    user = User.objects.create_user(email='qb1@e.com', password='pw', name='One')
+    other = User.objects.create_user(email='qb2@e.com', password='pw', name='Two')
+    admin = User.objects.create_superuser(email='qb3@e.com', password='pw')
+    for i in range(10):
+        LearningRequestPost.objects.create(creator=user if i % 2 else other, topic_to_learn=f'python {i}')
+        Rating.objects.create(reviewer=other, reviewee=user, score=1 + i % 5)
+    return user, other, admin
+
+def test_every_endpoint_declares_a_budget():
+    missing = [name for name, view in api_views() if getattr(view, 'query_budget', None) is None]
+    assert missing == []
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    def test_reads(self, data):
+        user, other, admin = data
+        me, anonymous = client_for(user), client_for()
+        for client, name, args, params in [
+            (me, 'my-profile', [], None),
+            (me, 'user-profile', [other.pk], None),
+            (anonymous, 'user-profile', [user.pk], None),
+            (me, 'user-profile-async', [other.pk], None),
+            (anonymous, 'user-posts', [user.pk], {'page_size': 3}),
+            (anonymous, 'user-reviews', [user.pk], {'page_size': 3}),
+            (anonymous, 'post-list-public', [], {'page_size': 3}),
+            (anonymous, 'post-list-public-async', [], {'page_size': 3}),
+            (anonymous, 'discovery', [], {'q': 'python', 'page_size': 3}),
+            (anonymous, 'discovery-async', [], {'page_size': 3}),
+            (me, 'post-list-me', [], None),
+            (client_for(admin), 'bounty-mode-toggle', [], None),
+            (me, 'support-eligibility', [], None),
+            (me, 'transaction-history', [], None),
+        ]:
+            response = client.get(reverse(name, args=args), params)
+            assert response.status_code == 200, name
+            assert_query_budget(response)
+
+    def test_writes(self, data):
+        user, other, admin = data
+        me = client_for(user)
+        post = LearningRequestPost.objects.filter(creator=user).first()
+        session = LearningSession.objects.create(student=user, teacher=other)
+        anonymous = client_for()
+
+        for client, method, name, args, payload in [
+            (anonymous, 'post', 'signup', [], {'email': 'qb4@e.com', 'password': 'pw', 'name': 'Four'}),
+            (anonymous, 'post', 'login', [], {'email': 'qb1@e.com', 'password': 'pw'}),
+            (anonymous, 'post', 'token_refresh', [], {'refresh': str(RefreshToken.for_user(user))}),
+            (me, 'post', 'rate-user', [], {'reviewee': other.pk, 'score': 5}),
+            (me, 'post', 'presence-heartbeat', [], None),
+            (me, 'post', 'post-create', [], {'topic_to_learn': 'Go'}),
+            (me, 'patch', 'post-update-status', [post.pk], {'status': 'Completed'}),
+            (client_for(admin), 'post', 'bounty-mode-toggle', [], {}),
+            (me, 'post', 'donate', [], {'amount': 1}),
+            (me, 'post', 'session-start', [], {'teacher_id': other.pk}),
+            (me, 'post', 'session-heartbeat', [session.pk], None),
+            (me, 'post', 'session-end', [session.pk], None),
+        ]:
+            response = getattr(client, method)(reverse(name, args=args), payload)
+            assert response.status_code < 300, (name, response.status_code)
+            assert_query_budget(response)
+
+        Wallet.objects.filter(user=user).update(balance=0)
+        response = me.post(reverse('support-claim'))
+        assert response.status_code == 200
+        assert_query_budget(response)
+
+    def test_over_budget_is_reported(self, data, caplog):
+        user, other, admin = data
+        response = client_for(user).get(reverse('my-profile'))
+        with pytest.raises(AssertionError, match='budget is 1'):
+            assert_query_budget(response, budget=1)
+
+        from learning.views import DiscoveryView
+        original = DiscoveryView.query_budget
+        DiscoveryView.query_budget = 0
+        try:
+            with caplog.at_level('INFO', logger='config.queries'):
+                client_for().get(reverse('discovery'))
+        finally:
+            DiscoveryView.query_budget = original
+        assert caplog.records[-1].levelname == 'WARNING'
+        assert '"path": "/api/v1/learning/discovery/"' in caplog.records[-1].getMessage()
+
+    def test_debug_headers(self, data, settings):
+        settings.DEBUG = True
+        response = client_for().get(reverse('discovery'), {'q': 'python'})
+        assert int(response['X-DB-Query-Count']) == response.query_stats.count
+        assert response['X-DB-Query-Budget'] == str(response.query_stats.budget)
+        assert 'X-DB-Slowest-Query' in response and 'X-DB-Time-Ms' in response
+
+        settings.DEBUG = False
+        assert 'X-DB-Query-Count' not in client_for().get(reverse('discovery'))
+
+    def test_counts_async_views_under_asgi(self, data):
+        user, other, admin = data
+        response = async_to_sync(AsyncClient().get)(reverse('user-profile-async', args=[user.pk]))
+        assert response.status_code == 200
+        assert assert_query_budget(response).count >= 3
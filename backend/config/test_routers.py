@@ -0,0 +1,105 @@
+import pytest
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from learning.models import LearningRequestPost
+from users.models import User
+from .routers import read_scope, read_from_replica
+
+@pytest.fixture
+def replica(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    return 'replica'
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+def aliases_used(func):
+    """Run func and return the set of aliases that ran queries."""
+    with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica']) as replica:
+        func()
+    return {alias for alias, captured in (('default', primary), ('replica', replica)) if len(captured)}
+
+class TestRouter:
+    def test_reads_follow_the_scope(self, replica):
+        assert User.objects.all().db == 'default'
+        with read_scope():
+            assert read_from_replica() == 'replica'
+            assert User.objects.all().db == 'replica'
+            # Writes and locking reads always go to the primary
+            assert User.objects.select_for_update().db == 'default'
+        assert User.objects.all().db == 'default'
+
+    @pytest.mark.django_db
+    def test_reads_inside_transactions_stay_on_primary(self, replica):
+        with read_scope('replica'), transaction.atomic():
+            assert User.objects.all().db == 'default'
+
+    def test_no_replicas_configured(self, settings):
+        settings.DATABASE_REPLICAS = []
+        with read_scope():
+            assert read_from_replica() is None
+            assert User.objects.all().db == 'default'
+
+# The replica is a test mirror of the primary: a second connection that only sees committed data
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+class TestReplicaRouting:
+    def test_read_views_use_the_replica(self, replica):
+        user = User.objects.create_user(email='rr1@e.com', password='pw')
+        LearningRequestPost.objects.create(creator=user, topic_to_learn='Python')
+        client = APIClient()
+
+        assert aliases_used(lambda: client.get(reverse('discovery'), {'q': 'Python'})) == {'replica'}
+        assert aliases_used(lambda: client.get(reverse('user-profile', args=[user.pk]))) == {'replica'}
+        assert aliases_used(lambda: client.get(reverse('user-profile-async', args=[user.pk]))) == {'replica'}
+        # Not opted in
+        assert 'replica' not in aliases_used(lambda: client.get(reverse('post-list-public')))
+
+    def test_own_writes_pin_reads_to_the_primary(self, replica, settings):
+        user = User.objects.create_user(email='rr2@e.com', password='pw')
+        other = User.objects.create_user(email='rr3@e.com', password='pw')
+        me, them = client_for(user), client_for(other)
+        profile = reverse('user-profile', args=[user.pk])
+
+        # The first request of each user loads it from the primary into the auth cache
+        assert aliases_used(lambda: me.get(profile)) == {'default', 'replica'}
+        assert aliases_used(lambda: me.get(profile)) == {'replica'}
+        assert me.post(reverse('donate'), {'amount': 5}).status_code == 200
+        assert aliases_used(lambda: me.get(profile)) == {'default'}
+        # A new token of the same user is pinned as well
+        assert aliases_used(lambda: client_for(user).get(profile)) == {'default'}
+        # Other clients keep reading from the replica
+        them.get(profile)
+        assert aliases_used(lambda: them.get(profile)) == {'replica'}
+
+        # Failed writes do not pin
+        assert them.post(reverse('donate'), {'amount': 10 ** 6}).status_code == 400
+        assert aliases_used(lambda: them.get(profile)) == {'replica'}
+
+    def test_pins_live_in_their_own_cache(self, replica, settings):
+        user = User.objects.create_user(email='rr5@e.com', password='pw')
+        me = client_for(user)
+        me.post(reverse('donate'), {'amount': 1})
+
+        # Entries of other caches, however many, cannot push a pin out
+        caches['default'].clear()
+        me.get(reverse('user-profile', args=[user.pk]))
+        assert aliases_used(lambda: me.get(reverse('user-profile', args=[user.pk]))) == {'default'}
+        caches[settings.REPLICA_PIN_CACHE_ALIAS].clear()
+        assert aliases_used(lambda: me.get(reverse('user-profile', args=[user.pk]))) == {'replica'}
+
+    def test_pin_expires(self, replica, settings):
+        settings.REPLICA_PIN_SECONDS = 0.01
+        user = User.objects.create_user(email='rr4@e.com', password='pw')
+        me = client_for(user)
+        me.post(reverse('donate'), {'amount': 1})
+
+        import time
+        time.sleep(0.05)
+        me.get(reverse('user-profile', args=[user.pk])) # reloads the user after the donation
+        assert aliases_used(lambda: me.get(reverse('user-profile', args=[user.pk]))) == {'replica'}
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+from django.db import connection
+from django.db.models import Sum
+from economy.models import CreditTransaction
+from economy.services import get_bank_wallet, process_session_payment
+from users.models import User, Wallet
+from .sqlite import serialized_write
+
+WRITERS = 6
+
+def max_overlap(func):
+    """Run func from WRITERS threads at once; return how many were inside it at the same time at most."""
+    active, peak, lock = 0, 0, threading.Lock()
+    barrier = threading.Barrier(WRITERS)
+
+    @serialized_write
+    def tracked():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        func()
+        with lock:
+            active -= 1
+
+    def run():
+        barrier.wait()
+        tracked()
+
+    threads = [threading.Thread(target=run) for _ in range(WRITERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return peak
+
+class TestWriteLane:
+    def test_lane_serializes_writers(self, settings):
+        settings.SQLITE_WRITE_LANE = True
+        assert max_overlap(lambda: None) == 1
+
+    def test_writers_overlap_without_the_lane(self, settings):
+        settings.SQLITE_WRITE_LANE = False
+        assert max_overlap(lambda: None) > 1
+
+    def test_nested_calls_do_not_deadlock(self, settings):
+        settings.SQLITE_WRITE_LANE = True
+        inner = serialized_write(lambda: 'done')
+        outer = serialized_write(inner)
+        assert outer() == 'done'
+
+@pytest.mark.django_db
+class TestConnectionSetup:
+    def test_pragmas_applied(self, settings):
+        with connection.cursor() as cursor:
+            for name in ('synchronous', 'busy_timeout', 'cache_size'):
+                cursor.execute(f'PRAGMA {name}')
+                value = cursor.fetchone()[0]
+                expected = {'NORMAL': 1}.get(settings.SQLITE_PRAGMAS[name], settings.SQLITE_PRAGMAS[name])
+                assert value == expected, name
+
+    def test_transactions_take_the_write_lock_at_begin(self):
+        assert connection.transaction_mode == 'IMMEDIATE'
+
+@pytest.mark.django_db(transaction=True)
+class TestLanePayments:
+    def test_parallel_payments_need_no_retries(self, settings):
+        settings.SQLITE_WRITE_LANE = True
+        teacher = User.objects.create_user(email='lane.teacher@e.com', password='pw')
+        students = [User.objects.create_user(email=f'lane{i}@e.com', password='pw') for i in range(WRITERS)]
+        get_bank_wallet()
+        wallets = {w.user_id: w for w in Wallet.objects.all()}
+        errors = []
+        barrier = threading.Barrier(WRITERS)
+
+        def pay(student):
+            try:
+                barrier.wait()
+                for _ in range(3):
+                    process_session_payment(wallets[student.pk], wallets[teacher.pk], 50)
+            except Exception as e: # surfaced below
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=pay, args=(s,)) for s in students]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors, errors
+        assert Wallet.objects.get(user=teacher).balance == 50 + WRITERS * 3 * 9
+        # Every payment's legs sum to zero
+        assert CreditTransaction.objects.count() == WRITERS * 3 * 3
+        assert CreditTransaction.objects.aggregate(total=Sum('amount'))['total'] == 0
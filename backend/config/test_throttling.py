@@ -0,0 +1,154 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from economy.services import get_bank_wallet
+from users.models import User
+from .throttling import CacheBucketStore, LocalBucketStore, reset_bucket_store, take_token
+
+BUCKETS = {'search': (2, 0.5), 'profile': (2, 0.5), 'write': (1, 0.1)}
+
+@pytest.fixture
+def buckets(settings):
+    settings.THROTTLE_BUCKETS = BUCKETS
+    return BUCKETS
+
+def client_for(user=None, ip='10.0.0.1'):
+    client = APIClient(REMOTE_ADDR=ip)
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+class TestTokenBucket:
+    def test_burst_then_refill(self):
+        state, wait = None, 0
+        for _ in range(3):
+            state, wait = take_token(state, 100.0, 3, 1)
+            assert wait == 0
+        state, wait = take_token(state, 100.0, 3, 1)
+        assert wait == pytest.approx(1.0)
+        # Half a token later: half a second to wait
+        state, wait = take_token(state, 100.5, 3, 1)
+        assert wait == pytest.approx(0.5)
+        state, wait = take_token(state, 101.0, 3, 1)
+        assert wait == 0
+
+    def test_refill_is_capped_at_burst(self):
+        state, _ = take_token(None, 0.0, 2, 1)
+        state, _ = take_token(state, 1000.0, 2, 1)
+        assert state[0] == 1
+
+    @pytest.mark.parametrize('store_class', [LocalBucketStore, CacheBucketStore])
+    def test_stores_keep_buckets_per_key(self, store_class):
+        store = store_class()
+        assert store.take('a', 1, 1, now=10.0) == 0
+        assert store.take('a', 1, 1, now=10.0) == pytest.approx(1.0)
+        assert store.take('b', 1, 1, now=10.0) == 0
+        assert store.take('a', 1, 1, now=11.0) == 0
+
+    def test_local_store_prunes_full_buckets(self, monkeypatch):
+        monkeypatch.setattr('config.throttling.LOCAL_PRUNE_SIZE', 2)
+        store = LocalBucketStore()
+        store.take('old', 1, 1, now=0.0)
+        store.take('recent', 1, 1, now=9.5)
+        store.take('new', 1, 1, now=10.0)
+        assert set(store._buckets) == {'recent', 'new'}
+
+@pytest.mark.django_db
+class TestThrottledViews:
+    def test_anonymous_search_is_limited_per_ip(self, buckets):
+        url = reverse('discovery')
+        client = client_for()
+        assert [client.get(url).status_code for _ in range(2)] == [200, 200]
+
+        response = client.get(url)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '2'
+        assert client_for(ip='10.0.0.2').get(url).status_code == status.HTTP_200_OK
+
+    def test_users_have_their_own_buckets(self, buckets):
+        alice = User.objects.create_user(email='alice@e.com', password='pw')
+        bob = User.objects.create_user(email='bob@e.com', password='pw')
+        url = reverse('discovery')
+        for _ in range(2):
+            client_for(alice).get(url)
+
+        # Alice's bucket follows her to another IP
+        assert client_for(alice, ip='10.0.0.2').get(url).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert client_for(bob, ip='10.0.0.3').get(url).status_code == status.HTTP_200_OK
+
+    def test_users_are_limited_per_ip_too(self, buckets):
+        url = reverse('discovery')
+        for i in range(2):
+            client_for(User.objects.create_user(email=f'sock{i}@e.com', password='pw')).get(url)
+
+        fresh = User.objects.create_user(email='sock2@e.com', password='pw')
+        assert client_for(fresh).get(url).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_spoofed_forwarded_for_is_ignored(self, buckets):
+        url = reverse('discovery')
+        for i in range(2):
+            client_for().get(url, HTTP_X_FORWARDED_FOR=f'192.0.2.{i}')
+
+        assert client_for().get(url, HTTP_X_FORWARDED_FOR='192.0.2.9').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_trusted_proxy_forwards_the_client_ip(self, buckets, settings):
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        url = reverse('discovery')
+        proxy = client_for(ip='10.9.9.9')
+        for _ in range(2):
+            proxy.get(url, HTTP_X_FORWARDED_FOR='spoofed, 192.0.2.1')
+
+        assert proxy.get(url, HTTP_X_FORWARDED_FOR='192.0.2.1').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert proxy.get(url, HTTP_X_FORWARDED_FOR='192.0.2.1, 192.0.2.2').status_code == status.HTTP_200_OK
+
+    def test_scopes_have_separate_budgets(self, buckets):
+        user = User.objects.create_user(email='busy@e.com', password='pw')
+        client = client_for(user)
+        for _ in range(3):
+            client.get(reverse('discovery'))
+
+        assert client.get(reverse('user-profile', kwargs={'pk': user.pk})).status_code == status.HTTP_200_OK
+
+    def test_writes_are_limited(self, buckets):
+        user = User.objects.create_user(email='donor@e.com', password='pw')
+        get_bank_wallet()
+        client = client_for(user)
+        assert client.post(reverse('donate'), {'amount': 1}).status_code == status.HTTP_200_OK
+
+        response = client.post(reverse('donate'), {'amount': 1})
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '10'
+
+    def test_unscoped_views_are_not_throttled(self, buckets):
+        user = User.objects.create_user(email='reader@e.com', password='pw')
+        client = client_for(user)
+        assert all(client.get(reverse('transaction-history')).status_code == 200 for _ in range(5))
+
+    def test_async_views_are_throttled(self, buckets):
+        url = reverse('discovery-async')
+        client = client_for()
+        for _ in range(2):
+            client.get(url)
+
+        response = client.get(url)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '2'
+        assert 'detail' in response.json()
+
+    def test_sync_and_async_views_share_buckets(self, buckets):
+        client = client_for()
+        client.get(reverse('discovery'))
+        client.get(reverse('discovery-async'))
+
+        assert client.get(reverse('discovery')).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_shared_cache_store(self, buckets, settings):
+        settings.THROTTLE_BACKEND = 'config.throttling.CacheBucketStore'
+        reset_bucket_store()
+        client = client_for()
+        for _ in range(2):
+            client.get(reverse('discovery'))
+
+        assert client.get(reverse('discovery')).status_code == status.HTTP_429_TOO_MANY_REQUESTS
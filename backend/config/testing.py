@@ -0,0 +1,17 @@
+"""Test helpers for the per-request query stats of config.middleware."""
+
+
+def assert_query_budget(response, budget=None):
+    """
+    Fail if the request behind `response` ran more queries than the view's
+    declared `query_budget` (or than `budget`, when given).
+    """
+    stats = getattr(response, 'query_stats', None)
+    assert stats is not None, "No query stats: is QueryInstrumentationMiddleware installed?"
+
+    budget = stats.budget if budget is None else budget
+    assert budget is not None, "The view declares no query_budget"
+    assert stats.count <= budget, (
+        f"{stats.count} queries, budget is {budget}; slowest: {stats.slowest_sql}"
+    )
+    return stats
@@ -0,0 +1,134 @@
+"""
+Token-bucket throttling for the endpoints that are expensive to spam.
+
+Views opt in with a `throttle_scope` ('search', 'profile', 'write', ...).
+settings.THROTTLE_BUCKETS gives each scope a (burst, refill per second)
+bucket. Buckets are kept per client IP and, for authenticated requests, per
+user as well, separately for every scope. A request takes one token from each
+of its buckets; an empty one means 429 Too Many Requests with a Retry-After of
+the seconds until its next token. Client IPs are REMOTE_ADDR unless
+REST_FRAMEWORK['NUM_PROXIES'] says how many trusted proxies add X-Forwarded-For.
+
+The bucket store is chosen with settings.THROTTLE_BACKEND:
+
+- LocalBucketStore: in-process dict (single process / tests)
+- CacheBucketStore: Django cache entries shared between processes. The
+  read-modify-write is not atomic, so concurrent requests of one client may
+  occasionally both get the last token.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+# Full buckets are dropped from the local store once it holds this many
+LOCAL_PRUNE_SIZE = 10000
+
+
+def take_token(state, now, burst, rate):
+    """
+    Refill the bucket `state` ((tokens, updated_at), None for a full one) up to `now`
+    and take a token. Returns (new state, seconds to wait; 0 when a token was taken).
+    """
+    tokens, updated_at = state if state is not None else (burst, now)
+    tokens = min(burst, tokens + max(0.0, now - updated_at) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class LocalBucketStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {} # key -> (tokens, updated_at, full_at)
+
+    def take(self, key, burst, rate, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._buckets.get(key)
+            (tokens, updated_at), wait = take_token(entry and entry[:2], now, burst, rate)
+            self._buckets[key] = (tokens, updated_at, updated_at + (burst - tokens) / rate)
+            if len(self._buckets) > LOCAL_PRUNE_SIZE:
+                self._prune(now)
+        return wait
+
+    async def atake(self, key, burst, rate, now=None):
+        # Memory only, nothing to wait for
+        return self.take(key, burst, rate, now)
+
+    def _prune(self, now):
+        # A full bucket behaves exactly like a missing one
+        self._buckets = {key: entry for key, entry in self._buckets.items() if entry[2] > now}
+
+
+class CacheBucketStore:
+    key_prefix = 'throttle:'
+
+    def __init__(self):
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def take(self, key, burst, rate, now=None):
+        now = time.time() if now is None else now
+        key = f'{self.key_prefix}{key}'
+        state, wait = take_token(self.cache.get(key), now, burst, rate)
+        self.cache.set(key, state, math.ceil(burst / rate))
+        return wait
+
+    async def atake(self, key, burst, rate, now=None):
+        now = time.time() if now is None else now
+        key = f'{self.key_prefix}{key}'
+        state, wait = take_token(await self.cache.aget(key), now, burst, rate)
+        await self.cache.aset(key, state, math.ceil(burst / rate))
+        return wait
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.THROTTLE_BACKEND)()
+    return _store
+
+
+def reset_bucket_store():
+    # Drops the store instance (and with it all local buckets)
+    global _store
+    _store = None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle for views with a `throttle_scope` listed in settings.THROTTLE_BUCKETS."""
+
+    def allow_request(self, request, view):
+        store = get_bucket_store()
+        self.wait_time = max((store.take(*bucket) for bucket in self.get_buckets(request, view)), default=0)
+        return not self.wait_time
+
+    async def aallow_request(self, request, view):
+        store = get_bucket_store()
+        self.wait_time = max([await store.atake(*bucket) for bucket in self.get_buckets(request, view)], default=0)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+    def get_buckets(self, request, view):
+        """(key, burst, rate) of each bucket this request takes from; none when the view is not throttled."""
+        scope = getattr(view, 'throttle_scope', None)
+        if scope not in settings.THROTTLE_BUCKETS:
+            return []
+        burst, rate = settings.THROTTLE_BUCKETS[scope]
+        # get_ident() honours NUM_PROXIES: REMOTE_ADDR unless proxies are trusted
+        buckets = [(f'{scope}:ip:{self.get_ident(request)}', burst, rate)]
+        if request.user and request.user.is_authenticated:
+            buckets.append((f'{scope}:user:{request.user.pk}', burst, rate))
+        return buckets
@@ -0,0 +1,20 @@
+import pytest
+from django.core.cache import caches
+from config.throttling import reset_bucket_store
+from economy.realtime import reset_broker
+from economy.services import clear_bank_wallet_cache
+from learning.models import SystemConfig
+from users.presence import reset_presence_backend
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    # Test databases are rolled back between tests, cached rows must not outlive them
+    for cache in caches.all():
+        cache.clear()
+    SystemConfig.clear_cache()
+    clear_bank_wallet_cache()
+    reset_presence_backend()
+    reset_broker()
+    reset_bucket_store()
+    yield
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class EconomyConfig(AppConfig):
     name = 'economy'
+
+    def ready(self):
+        import economy.signals
@@ -0,0 +1,60 @@
+"""
+Raw ASGI WebSocket endpoint pushing wallet updates: ws://<host>/ws/wallet/?token=<JWT access token>
+
+Served by config.asgi.application (run under an ASGI server such as uvicorn or daphne).
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from rest_framework.exceptions import AuthenticationFailed
+from users.authentication import CachedJWTAuthentication
+
+from .realtime import get_broker
+
+WALLET_SOCKET_PATH = '/ws/wallet/'
+CLOSE_UNAUTHORIZED = 4401
+
+
+async def authenticate(scope):
+    # Same checks as the API (token, active user, password not changed since); returns the user id
+    token = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('token', [None])[0]
+    if not token:
+        return None
+    authentication = CachedJWTAuthentication()
+    try:
+        user = await authentication.aget_user(authentication.get_validated_token(token))
+    except AuthenticationFailed:
+        return None
+    return user.pk
+
+
+async def wallet_socket(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    user_id = await authenticate(scope)
+    if user_id is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+
+    await send({'type': 'websocket.accept'})
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+
+    async def forward_updates():
+        while True:
+            update = await subscription.get()
+            await send({'type': 'websocket.send', 'text': json.dumps(update)})
+
+    forwarder = asyncio.ensure_future(forward_updates())
+    try:
+        # Clients only listen; wait for the disconnect
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+    finally:
+        forwarder.cancel()
+        broker.unsubscribe(subscription)
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+from economy.services import bill_sessions
+
+
+class Command(BaseCommand):
+    help = "Charge active learning sessions for their completed 5-minute blocks (one ledger write per tick)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help="Keep running, billing every N seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            charged = bill_sessions()
+            self.stdout.write(f"Charged {charged} credits.")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from users.models import Wallet
+from economy.services import get_bank_wallet, create_balance_checkpoint
+
+
+class Command(BaseCommand):
+    help = "Snapshot ledger balances so balance reads only sum newer transactions. Run periodically (e.g. cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all-wallets', action='store_true', help="Checkpoint every wallet, not only the bank.")
+        parser.add_argument(
+            '--min-transactions', type=int, default=100,
+            help="Skip wallets with fewer new settled transactions than this (default: 100).",
+        )
+
+    def handle(self, *args, **options):
+        if options['all_wallets']:
+            wallets = Wallet.objects.select_related('user').iterator()
+        else:
+            wallets = [get_bank_wallet()]
+
+        created = 0
+        for wallet in wallets:
+            checkpoint = create_balance_checkpoint(wallet, min_new_transactions=options['min_transactions'])
+            if checkpoint is not None:
+                created += 1
+                self.stdout.write(f"{wallet.user.email}: {checkpoint.balance} up to tx {checkpoint.last_transaction_id}")
+
+        self.stdout.write(self.style.SUCCESS(f"Created {created} checkpoint(s)."))
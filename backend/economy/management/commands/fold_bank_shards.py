@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+from economy.services import fold_bank_shards
+
+
+class Command(BaseCommand):
+    help = "Fold pending BankShard credits into the bank wallet balance (see BANK_CREDIT_SHARDS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help="Keep running, folding every N seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            total = fold_bank_shards()
+            self.stdout.write(f"Folded {total:+d} credits into the bank wallet.")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef, Sum, Value
+from django.db.models.functions import Coalesce
+from users.models import Wallet
+from economy.models import BankShard, CreditTransaction
+from economy.services import get_bank_wallet_id
+
+
+class Command(BaseCommand):
+    help = "Compare each cached Wallet.balance with the sum of its CreditTransaction ledger and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help="Only reconcile this user's wallet.")
+        parser.add_argument('--fail-on-drift', action='store_true', help="Exit with an error if any wallet drifts.")
+
+    def handle(self, *args, **options):
+        wallets = Wallet.objects.select_related('user').annotate(
+            ledger=Coalesce(Sum('transactions__amount'), Value(0)),
+            recorded_grant=Exists(CreditTransaction.objects.filter(
+                wallet=OuterRef('pk'), transaction_type='INITIAL_GRANT'
+            )),
+        ).order_by('pk')
+        if options['email']:
+            wallets = wallets.filter(user__email=options['email'])
+
+        # Sharded bank credits are in the ledger but not yet folded into the bank's stored balance
+        bank_id = get_bank_wallet_id()
+        unfolded = BankShard.objects.aggregate(total=Sum('pending_amount'))['total'] or 0
+
+        checked = drifted = 0
+        for wallet in wallets.iterator():
+            checked += 1
+            balance = wallet.balance + (unfolded if wallet.pk == bank_id else 0)
+            # Wallets made by the signup signal start with settings.INITIAL_GRANT credits
+            # but no ledger row for them (onboard_users() writes one)
+            ledger = wallet.ledger + (0 if wallet.recorded_grant else settings.INITIAL_GRANT)
+            drift = balance - ledger
+            if drift:
+                drifted += 1
+                self.stdout.write(
+                    f"DRIFT {wallet.user.email}: balance={balance} ledger={ledger} drift={drift:+d}"
+                )
+
+        summary = f"Checked {checked} wallet(s), {drifted} drifted."
+        if drifted and options['fail_on_drift']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary) if not drifted else self.style.WARNING(summary))
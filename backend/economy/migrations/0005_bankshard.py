@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('economy', '0004_balancecheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField(unique=True)),
+                ('pending_amount', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('economy', '0005_bankshard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='credittransaction',
+            index=models.Index(fields=['wallet', 'timestamp'], name='economy_tx_wallet_time'),
+        ),
+        migrations.AddIndex(
+            model_name='credittransaction',
+            index=models.Index(fields=['wallet', 'transaction_type', 'timestamp'], name='economy_tx_wallet_type_time'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 15:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('economy', '0006_credittransaction_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LearningSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('ACTIVE', 'Active'), ('ENDED', 'Ended')], default='ACTIVE', max_length=20)),
+                ('end_reason', models.CharField(blank=True, choices=[('', ''), ('ENDED', 'Ended by participant'), ('TIMEOUT', 'Heartbeat timed out'), ('INSUFFICIENT_CREDITS', 'Insufficient credits')], max_length=30)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_heartbeat', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('billed_minutes', models.PositiveIntegerField(default=0)),
+                ('billed_credits', models.PositiveIntegerField(default=0)),
+                ('billed_tax', models.PositiveIntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions_as_student', to=settings.AUTH_USER_MODEL)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions_as_teacher', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'started_at'], name='economy_session_status')],
+            },
+        ),
+    ]
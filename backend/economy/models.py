@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from users.models import Wallet
 
 class CreditTransaction(models.Model):
@@ -18,5 +20,78 @@ class CreditTransaction(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     description = models.CharField(max_length=255, blank=True)
 
+    class Meta:
+        indexes = [
+            # Wallet history (newest first) and per-type history; both page by timestamp
+            models.Index(fields=['wallet', 'timestamp'], name='economy_tx_wallet_time'),
+            models.Index(fields=['wallet', 'transaction_type', 'timestamp'], name='economy_tx_wallet_type_time'),
+        ]
+
     def __str__(self):
         return f"{self.wallet.user.email} - {self.amount} ({self.transaction_type})"
+
+class BalanceCheckpoint(models.Model):
+    """
+    Snapshot of a wallet's ledger sum up to and including `last_transaction_id`.
+    Balance reads start from the latest checkpoint and only sum newer rows.
+    """
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='checkpoints')
+    last_transaction_id = models.BigIntegerField()
+    balance = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['wallet', '-last_transaction_id'], name='economy_checkpoint_latest'),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet.user.email} @ tx {self.last_transaction_id}: {self.balance}"
+
+class BankShard(models.Model):
+    """
+    Pending bank-side credits when settings.BANK_CREDIT_SHARDS > 0. Spreading them
+    over N rows removes the single bank Wallet row from every payment's write set;
+    fold_bank_shards() periodically moves the totals into the bank wallet.
+    """
+    index = models.PositiveSmallIntegerField(unique=True)
+    pending_amount = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Bank shard {self.index}: {self.pending_amount}"
+
+class LearningSession(models.Model):
+    """
+    A metered tutoring session. The server owns the clock: clients send heartbeats,
+    and bill_sessions() charges the student in 5-minute blocks as time passes.
+    """
+    STATUS_CHOICES = [
+        ('ACTIVE', 'Active'),
+        ('ENDED', 'Ended'),
+    ]
+    END_REASONS = [
+        ('', ''),
+        ('ENDED', 'Ended by participant'),
+        ('TIMEOUT', 'Heartbeat timed out'),
+        ('INSUFFICIENT_CREDITS', 'Insufficient credits'),
+    ]
+
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sessions_as_student')
+    teacher = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sessions_as_teacher')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='ACTIVE')
+    end_reason = models.CharField(max_length=30, choices=END_REASONS, blank=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    last_heartbeat = models.DateTimeField(default=timezone.now)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    # What has been charged so far; each tick charges the difference to the cumulative totals
+    billed_minutes = models.PositiveIntegerField(default=0)
+    billed_credits = models.PositiveIntegerField(default=0)
+    billed_tax = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'started_at'], name='economy_session_status'),
+        ]
+
+    def __str__(self):
+        return f"Session {self.pk}: {self.student.email} -> {self.teacher.email} ({self.status})"
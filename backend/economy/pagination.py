@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TransactionHistoryPagination(CursorPagination):
+    # Keyset on the (wallet[, transaction_type], timestamp) indexes: every page is an index range scan.
+    ordering = ('-timestamp', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,92 @@
+"""
+Wallet change notifications for WebSocket clients (see economy.consumers).
+
+economy.services.transfer() publishes one message per touched user wallet
+after its transaction commits. The broker is pluggable through
+settings.WALLET_BROKER; InProcessBroker fans messages out to the asyncio
+subscribers of this process, which is enough for a single ASGI worker.
+A multi-process deployment would plug in a broker backed by e.g. Redis pub/sub
+with the same subscribe/unsubscribe/publish interface.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        """Must be called from the event loop that will consume the subscription."""
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, message):
+        """Thread-safe: may be called from sync request threads."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, message)
+            except RuntimeError:
+                # Loop already closed; the socket is gone
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.WALLET_BROKER)()
+    return _broker
+
+
+def reset_broker():
+    global _broker
+    _broker = None
+
+
+def publish_wallet_changes_on_commit(changes):
+    """
+    `changes`: {user_id: {'delta': int, 'balance': int, 'transaction_types': [...]}}.
+    Nothing is sent if the transaction rolls back.
+    """
+    if not changes:
+        return
+
+    def publish():
+        broker = get_broker()
+        for user_id, change in changes.items():
+            broker.publish(user_id, {'type': 'wallet.update', **change})
+
+    transaction.on_commit(publish)
@@ -0,0 +1,20 @@
+from rest_framework import serializers
+from .models import CreditTransaction, LearningSession
+
+class CreditTransactionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CreditTransaction
+        fields = ('id', 'amount', 'transaction_type', 'description', 'timestamp')
+        read_only_fields = fields
+
+class LearningSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LearningSession
+        fields = (
+            'id', 'student', 'teacher', 'status', 'end_reason', 'started_at', 'last_heartbeat', 'ended_at',
+            'billed_minutes', 'billed_credits',
+        )
+        read_only_fields = fields
+
+class SessionStartSerializer(serializers.Serializer):
+    teacher_id = serializers.IntegerField(min_value=1)
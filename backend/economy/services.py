@@ -1,29 +1,294 @@
+import random
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
 from django.db import transaction
 from django.core.exceptions import ValidationError
-from django.db.models import Sum
-from .models import CreditTransaction, Wallet
+from django.db.models import F, Case, When, Value, Sum, Max, Count
+from django.utils import timezone
+from datetime import timedelta
+from .models import CreditTransaction, BalanceCheckpoint, BankShard, LearningSession, Wallet
+from .realtime import publish_wallet_changes_on_commit
+from config.sqlite import serialized_write
+from users.authentication import forget_users
 from users.models import User
 
-def get_bank_wallet():
-    # Helper to get usage of System/Bank wallet
-    # Using a specific email or ID for the system user
-    user, _ = User.objects.get_or_create(email='system@linkandlearn.corp', defaults={'name': 'System Bank', 'is_active': False})
+BANK_EMAIL = 'system@linkandlearn.corp'
+
+# Bank wallet id, resolved once per process. Cleared by economy.signals if the row goes away.
+_bank_wallet_id = None
+
+def _resolve_bank_wallet_id():
+    global _bank_wallet_id
+    # Using a specific email for the system user
+    user, created = User.objects.get_or_create(email=BANK_EMAIL, defaults={'name': 'System Bank', 'is_active': False})
     # Ensure wallet exists (signal handles it usually, but let's be safe)
-    if not hasattr(user, 'wallet'):
-         Wallet.objects.create(user=user)
-    return user.wallet
+    wallet, wallet_created = Wallet.objects.get_or_create(user=user)
+
+    if created or wallet_created:
+        # Only remember ids that are committed; a rolled back id could be reused by another row.
+        transaction.on_commit(lambda: _remember_bank_wallet_id(wallet.pk))
+    else:
+        _bank_wallet_id = wallet.pk
+    return wallet.pk
+
+def _remember_bank_wallet_id(wallet_id):
+    global _bank_wallet_id
+    _bank_wallet_id = wallet_id
+
+def clear_bank_wallet_cache():
+    global _bank_wallet_id
+    _bank_wallet_id = None
+
+def get_bank_wallet_id():
+    if _bank_wallet_id is not None:
+        return _bank_wallet_id
+    return _resolve_bank_wallet_id()
+
+def get_bank_wallet(for_update=False):
+    # Helper to get usage of System/Bank wallet, looked up (and optionally locked) by primary key only
+    queryset = Wallet.objects.select_for_update() if for_update else Wallet.objects.all()
+    try:
+        return queryset.get(pk=get_bank_wallet_id())
+    except Wallet.DoesNotExist:
+        clear_bank_wallet_cache()
+        return queryset.get(pk=get_bank_wallet_id())
+
+def get_ledger_balance(wallet):
+    # `wallet` may be a Wallet or its pk. Latest checkpoint + sum of the transactions written after it.
+    checkpoint = BalanceCheckpoint.objects.filter(wallet=wallet).order_by('-last_transaction_id').first()
+    base, after_id = (checkpoint.balance, checkpoint.last_transaction_id) if checkpoint else (0, 0)
+    tail = CreditTransaction.objects.filter(wallet=wallet, id__gt=after_id).aggregate(total=Sum('amount'))['total']
+    return base + (tail or 0)
 
 def get_bank_balance():
     # "Bank balance is computed, not stored"
-    # We aggregate all transactions for the bank wallet
-    bank_wallet = get_bank_wallet()
-    return CreditTransaction.objects.filter(wallet=bank_wallet).aggregate(total=Sum('amount'))['total'] or 0
+    # We aggregate the bank wallet's ledger, starting from its latest checkpoint
+    return get_ledger_balance(get_bank_wallet_id())
+
+@serialized_write
+@transaction.atomic
+def create_balance_checkpoint(wallet, min_new_transactions=1):
+    """
+    Folds the wallet's committed ledger rows into a new checkpoint.
+    Returns the checkpoint, or None if fewer than `min_new_transactions` rows would be folded.
+
+    Ledger ids are handed out when a row is inserted, not when it commits, so an
+    open transaction could later commit a row below the highest visible id. The
+    locks below are a commit barrier: every writer of this wallet's ledger holds
+    them from before its insert until its commit (transfer() locks each leg's
+    wallet, and with sharding the bank shard it updates before inserting the
+    bank's rows). Once we hold them no such transaction is open and the whole
+    id range can be folded. New wallets' grant rows are invisible until their
+    wallet commits. On SQLite the immediate transaction already excludes all
+    other writers.
+    """
+    lock_wallets(wallet.pk)
+    if bank_shard_count() and wallet.pk == get_bank_wallet_id():
+        ensure_bank_shards()
+        list(BankShard.objects.select_for_update().order_by('index'))
+
+    latest = BalanceCheckpoint.objects.filter(wallet=wallet).order_by('-last_transaction_id').first()
+    base, after_id = (latest.balance, latest.last_transaction_id) if latest else (0, 0)
+
+    last_id = CreditTransaction.objects.filter(wallet=wallet, id__gt=after_id).aggregate(last_id=Max('id'))['last_id']
+    if last_id is None:
+        return None
+
+    folded = CreditTransaction.objects.filter(
+        wallet=wallet, id__gt=after_id, id__lte=last_id
+    ).aggregate(total=Sum('amount'), rows=Count('id'))
+    if folded['rows'] < min_new_transactions:
+        return None
+
+    return BalanceCheckpoint.objects.create(
+        wallet=wallet,
+        last_transaction_id=last_id,
+        balance=base + folded['total'],
+    )
 
 def calculate_credits(duration_minutes):
     # 5 minutes = 1 credit
     return duration_minutes // 5
 
+def calculate_tax(total_credits):
+    # Calculate Tax (10%)
+    # Integer arithmetic: int() floors, so sessions under 10 credits are tax free.
+    return int(total_credits * 0.10)
+
+def lock_wallets(*wallet_ids):
+    """
+    SELECT ... FOR UPDATE the given wallets, always in primary key order so
+    concurrent transfers touching the same wallets cannot deadlock.
+    Returns {pk: locked Wallet}.
+    """
+    ids = sorted(set(wallet_ids))
+    return {w.pk: w for w in Wallet.objects.select_for_update().filter(pk__in=ids).order_by('pk')}
+
+def adjust_balance(wallet, locked, amount, **fields):
+    """
+    Atomic `balance = balance + amount` touching only the balance (and `fields`).
+    `locked` is the row returned by lock_wallets; `wallet` (the caller's instance) is kept in sync.
+    """
+    Wallet.objects.filter(pk=wallet.pk).update(balance=F('balance') + amount, **fields)
+    wallet.balance = locked.balance = locked.balance + amount
+    for name, value in fields.items():
+        setattr(wallet, name, value)
+        setattr(locked, name, value)
+
+def bank_shard_count():
+    return getattr(settings, 'BANK_CREDIT_SHARDS', 0)
+
+def lock_wallets_and_bank(*wallet_ids):
+    """
+    Locks the given wallets plus the bank wallet, unless bank credits are sharded:
+    then the bank row is never touched by transfers and stays out of the lock set.
+    Returns (locked, bank_id).
+    """
+    bank_id = get_bank_wallet_id()
+    if bank_shard_count():
+        return lock_wallets(*wallet_ids), bank_id
+    return lock_wallets(*wallet_ids, bank_id), bank_id
+
+def add_to_bank_shard(amount):
+    # With sharding on, the bank's delta lands on a random BankShard row and is
+    # folded into the bank wallet later by fold_bank_shards().
+    index = random.randrange(bank_shard_count())
+    if not BankShard.objects.filter(index=index).update(pending_amount=F('pending_amount') + amount):
+        ensure_bank_shards()
+        BankShard.objects.filter(index=index).update(pending_amount=F('pending_amount') + amount)
+
+def ensure_bank_shards():
+    # Waits for (and then skips) shard rows another open transaction is inserting
+    BankShard.objects.bulk_create([BankShard(index=i) for i in range(bank_shard_count())], ignore_conflicts=True)
+
+@serialized_write
+@transaction.atomic
+def fold_bank_shards():
+    """
+    Moves every shard's pending amount into the bank wallet's stored balance.
+    Returns the folded total.
+    """
+    bank_wallet = get_bank_wallet(for_update=True)
+    shards = list(BankShard.objects.select_for_update().exclude(pending_amount=0).order_by('index'))
+    total = sum(shard.pending_amount for shard in shards)
+    if shards:
+        BankShard.objects.filter(pk__in=[shard.pk for shard in shards]).update(pending_amount=0)
+        adjust_balance(bank_wallet, bank_wallet, total)
+    return total
+
+def get_bank_stored_balance():
+    # Stored bank balance plus credits still sitting in shards. Matches get_bank_balance()
+    # (which is computed from the ledger) whenever the stored figures are consistent.
+    unfolded = BankShard.objects.aggregate(total=Sum('pending_amount'))['total'] or 0
+    return get_bank_wallet().balance + unfolded
+
+# One side of a transfer. wallet=None is the System Bank.
+Leg = namedtuple('Leg', ['wallet', 'amount', 'transaction_type', 'description'], defaults=[''])
+
+def batched_update(deltas, fields=None):
+    """
+    One UPDATE for any number of wallets:
+    balance = balance + CASE pk WHEN .. THEN delta END, plus optional per-wallet `fields` ({pk: {name: value}}).
+    """
+    fields = fields or {}
+    pks = set(deltas) | set(fields)
+    if not pks:
+        return
+    values = {
+        'balance': F('balance') + Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+            default=Value(0),
+        )
+    }
+    names = {name for per_wallet in fields.values() for name in per_wallet}
+    for name in names:
+        values[name] = Case(
+            *[When(pk=pk, then=Value(f[name])) for pk, f in fields.items() if name in f],
+            default=F(name),
+        )
+    Wallet.objects.filter(pk__in=pks).update(**values)
+
+@serialized_write
 @transaction.atomic
+def transfer(legs, insufficient_message="Insufficient credits.", locked=None, wallet_fields=None):
+    """
+    Double-entry money movement: `legs` must sum to zero. All ledger rows go in
+    with one bulk_create and all balances move with one UPDATE (bank shards add
+    one more when enabled). User wallets may not go negative; the Bank may.
+
+    `locked` lets callers that already hold the locks (from lock_wallets_and_bank)
+    skip re-locking; `wallet_fields` sets extra columns per wallet pk in the same UPDATE.
+    Returns (locked, bank_id).
+    """
+    if sum(leg.amount for leg in legs) != 0:
+        raise ValueError("Transfer legs must sum to zero.")
+    legs = [leg for leg in legs if leg.amount]
+
+    instances = {}
+    for leg in legs:
+        if leg.wallet is not None:
+            instances.setdefault(leg.wallet.pk, []).append(leg.wallet)
+    if locked is None:
+        locked, bank_id = lock_wallets_and_bank(*instances)
+    else:
+        bank_id = get_bank_wallet_id()
+
+    deltas = defaultdict(int)
+    for leg in legs:
+        deltas[bank_id if leg.wallet is None else leg.wallet.pk] += leg.amount
+
+    # Check against the locked rows, not the callers' possibly stale instances
+    for pk, delta in deltas.items():
+        if pk != bank_id and delta < 0 and locked[pk].balance + delta < 0:
+            raise ValidationError(insufficient_message)
+
+    # "Bank balance is computed, not stored": get_bank_balance reads the ledger,
+    # the stored bank field (or its shards) is only kept consistent. The shard row is
+    # locked before the bank's ledger rows go in, see create_balance_checkpoint.
+    sharded_bank = bank_shard_count() and bank_id in deltas
+    if sharded_bank:
+        add_to_bank_shard(deltas.pop(bank_id))
+
+    CreditTransaction.objects.bulk_create([
+        CreditTransaction(
+            wallet_id=bank_id if leg.wallet is None else leg.wallet.pk,
+            amount=leg.amount,
+            transaction_type=leg.transaction_type,
+            description=leg.description,
+        )
+        for leg in legs
+    ])
+
+    batched_update(deltas, wallet_fields)
+
+    # Keep locked rows and caller instances in sync with what was written
+    changes = {}
+    for pk, delta in deltas.items():
+        if pk not in locked:
+            continue
+        row = locked[pk]
+        row.balance += delta
+        for name, value in (wallet_fields or {}).get(pk, {}).items():
+            setattr(row, name, value)
+        for instance in instances.get(pk, []):
+            instance.balance = row.balance
+            for name, value in (wallet_fields or {}).get(pk, {}).items():
+                setattr(instance, name, value)
+        if pk != bank_id:
+            changes[row.user_id] = {
+                'delta': delta,
+                'balance': row.balance,
+                'transaction_types': sorted({leg.transaction_type for leg in legs if leg.wallet is not None and leg.wallet.pk == pk}),
+            }
+
+    # Pushed to the owners' WebSockets once the money has actually moved
+    publish_wallet_changes_on_commit(changes)
+    # The balance UPDATE sends no post_save: drop the owners' cached request.user
+    forget_users(changes)
+
+    return locked, bank_id
+
 def process_session_payment(student_wallet, teacher_wallet, duration_minutes):
     """
     Transfers credits from student to teacher (90%) and Bank (10%) based on duration.
@@ -32,95 +297,126 @@ def process_session_payment(student_wallet, teacher_wallet, duration_minutes):
     
     if total_credits <= 0:
         return 0
-    
-    if student_wallet.balance < total_credits:
-         raise ValidationError("Insufficient credits for student.")
-
-    # 1. Debit Student Full Amount
-    student_wallet.balance -= total_credits
-    student_wallet.save()
-    CreditTransaction.objects.create(
-        wallet=student_wallet,
-        amount=-total_credits,
-        transaction_type='SESSION_PAYMENT',
-        description=f'Payment for {duration_minutes} min session'
-    )
 
-    # 2. Calculate Tax (10%)
-    # Integer arithmetic: 10% of N. 
-    # E.g. 5 credits. 10% = 0.5. Integer division? Round?
-    # Requirement: "Bank takes 10% cut". 
-    # If credits < 10, tax might be 0. 
-    # Let's use round or integer math. 
-    # tax = int(total_credits * 0.10)
-    tax = int(total_credits * 0.10)
+    tax = calculate_tax(total_credits)
     teacher_amount = total_credits - tax
 
-    # 3. Credit Teacher
-    if teacher_amount > 0:
-        teacher_wallet.balance += teacher_amount
-        teacher_wallet.save()
-        CreditTransaction.objects.create(
-            wallet=teacher_wallet,
-            amount=teacher_amount,
-            transaction_type='SESSION_PAYMENT',
-            description=f'Earned from session (Tax: {tax})'
-        )
-
-    # 4. Credit Bank
-    if tax > 0:
-        bank_wallet = get_bank_wallet()
-        # "Bank balance is computed", but we update local field for query speed if we wanted? 
-        # But requirement says "computed, not stored". It might mean we shouldn't trust/use the stored value.
-        # But we still create a transaction for it.
-        # We can update the balance field anyway to keep the model consistent, OR 
-        # we can choose NOT to update bank_wallet.balance if we want to validly say it's not "stored".
-        # However, Wallet model has balance field. Let's update it but rely on `get_bank_balance` for read.
-        bank_wallet.balance += tax
-        bank_wallet.save()
-        
-        CreditTransaction.objects.create(
-            wallet=bank_wallet,
-            amount=tax,
-            transaction_type='TAX',
-            description=f'Tax from 5min={total_credits/5} session'
-        )
+    transfer([
+        Leg(student_wallet, -total_credits, 'SESSION_PAYMENT', f'Payment for {duration_minutes} min session'),
+        Leg(teacher_wallet, teacher_amount, 'SESSION_PAYMENT', f'Earned from session (Tax: {tax})'),
+        Leg(None, tax, 'TAX', f'Tax from 5min={total_credits/5} session'),
+    ], insufficient_message="Insufficient credits for student.")
 
     return total_credits
 
+def start_session(student, teacher):
+    if student.pk == teacher.pk:
+        raise ValidationError("You cannot start a session with yourself.")
+    if not teacher.is_active:
+        # Deactivated accounts and the bank's system user
+        raise ValidationError("This user cannot teach a session.")
+    if student.wallet.balance <= 0:
+        raise ValidationError("Insufficient credits to start a session.")
+    return LearningSession.objects.create(student=student, teacher=teacher)
+
+def heartbeat_session(session):
+    now = timezone.now()
+    if not LearningSession.objects.filter(pk=session.pk, status='ACTIVE').update(last_heartbeat=now):
+        raise ValidationError("Session has ended.")
+    session.last_heartbeat = now
+
+def end_session(session):
+    """Stops the meter and bills the remaining blocks. Returns the refreshed session."""
+    bill_sessions(session_ids=[session.pk], end=True)
+    session.refresh_from_db()
+    return session
+
+@serialized_write
 @transaction.atomic
+def bill_sessions(now=None, session_ids=None, end=False):
+    """
+    One billing tick: charges every active session (or only `session_ids`) for
+    the 5-minute blocks completed since its last tick. Charges are cumulative,
+    so a session billed tick by tick pays exactly what process_session_payment
+    would charge for its total duration.
+
+    All sessions share a single transfer(), i.e. one bulk_create for the ledger
+    rows and one wallet UPDATE per tick however many sessions are running.
+    Sessions whose heartbeat timed out are ended at their last heartbeat; a
+    student who cannot pay a block has the session ended after the last paid one.
+    `end=True` ends the selected sessions now. Returns the number of credits charged.
+    """
+    now = now or timezone.now()
+    timeout = timedelta(seconds=settings.SESSION_HEARTBEAT_TIMEOUT)
+
+    queryset = LearningSession.objects.select_for_update().filter(status='ACTIVE').order_by('pk')
+    if session_ids is not None:
+        queryset = queryset.filter(pk__in=session_ids)
+    sessions = list(queryset)
+    if not sessions:
+        return 0
+
+    user_ids = {s.student_id for s in sessions} | {s.teacher_id for s in sessions}
+    wallet_ids = dict(Wallet.objects.filter(user_id__in=user_ids).values_list('user_id', 'pk'))
+    locked, bank_id = lock_wallets_and_bank(*wallet_ids.values())
+
+    legs = []
+    charged = 0
+    for session in sessions:
+        if end:
+            until, reason = now, 'ENDED'
+        elif session.last_heartbeat + timeout < now:
+            until, reason = session.last_heartbeat, 'TIMEOUT'
+        else:
+            until, reason = now, ''
+        minutes = max(0, int((until - session.started_at).total_seconds() // 60))
+
+        student_wallet = locked[wallet_ids[session.student_id]]
+        due = calculate_credits(minutes) - session.billed_credits
+        # Earlier legs of this tick are not applied to the locked rows yet
+        available = student_wallet.balance + sum(leg.amount for leg in legs if leg.wallet is student_wallet)
+        amount = max(0, min(due, available))
+        if amount < due:
+            reason = 'INSUFFICIENT_CREDITS'
+            minutes = (session.billed_credits + amount) * 5
+            until = session.started_at + timedelta(minutes=minutes)
+
+        if amount:
+            tax = calculate_tax(session.billed_credits + amount) - session.billed_tax
+            legs += [
+                Leg(student_wallet, -amount, 'SESSION_PAYMENT', f'Session {session.pk}: {minutes} min'),
+                Leg(locked[wallet_ids[session.teacher_id]], amount - tax, 'SESSION_PAYMENT', f'Earned from session {session.pk} (Tax: {tax})'),
+                Leg(None, tax, 'TAX', f'Tax from session {session.pk}'),
+            ]
+            session.billed_credits += amount
+            session.billed_tax += tax
+            charged += amount
+
+        session.billed_minutes = minutes
+        if reason:
+            session.status, session.end_reason, session.ended_at = 'ENDED', reason, until
+
+    if legs:
+        transfer(legs, locked=locked)
+    LearningSession.objects.bulk_update(
+        sessions, ['billed_minutes', 'billed_credits', 'billed_tax', 'status', 'end_reason', 'ended_at']
+    )
+    return charged
+
 def donate_to_bank(user_wallet, amount):
     if amount <= 0:
         raise ValidationError("Donation amount must be positive.")
-    if user_wallet.balance < amount:
-        raise ValidationError("Insufficient credits to donate.")
-    
-    user_wallet.balance -= amount
-    user_wallet.save()
-    CreditTransaction.objects.create(
-            wallet=user_wallet,
-            amount=-amount,
-            transaction_type='DONATION',
-            description='Donation to System'
-    )
 
-    bank_wallet = get_bank_wallet()
-    bank_wallet.balance += amount
-    bank_wallet.save()
-    CreditTransaction.objects.create(
-            wallet=bank_wallet,
-            amount=amount,
-            transaction_type='DONATION',
-            description=f'Donation from {user_wallet.user.email}'
-    )
+    transfer([
+        Leg(user_wallet, -amount, 'DONATION', 'Donation to System'),
+        Leg(None, amount, 'DONATION', f'Donation from {user_wallet.user.email}'),
+    ], insufficient_message="Insufficient credits to donate.")
     return amount
 
-from django.utils import timezone
-from datetime import timedelta
-
 def check_support_eligibility(user):
-    wallet = user.wallet
-    
+    return support_eligibility(user.wallet)
+
+def support_eligibility(wallet):
     # 1. Cooldown Check (7 days)
     if wallet.last_support_claim:
         days_since = (timezone.now() - wallet.last_support_claim).days
@@ -142,41 +438,22 @@ def check_support_eligibility(user):
         
     return True, amount, "Eligible"
 
+@serialized_write
 @transaction.atomic
 def claim_support_credits(user):
-    eligible, amount, reason = check_support_eligibility(user)
+    wallet = user.wallet
+    locked, bank_id = lock_wallets_and_bank(wallet.pk)
+
+    # Eligibility on the locked row: two concurrent claims cannot both pass the cooldown
+    eligible, amount, reason = support_eligibility(locked[wallet.pk])
     if not eligible:
         raise ValidationError(reason)
-        
-    wallet = user.wallet
-    wallet.balance += amount
-    wallet.last_support_claim = timezone.now()
-    wallet.save()
-    
-    # Credits come from System/Bank? Requirement doesn't specify source, usually "minted" or from Bank. 
-    # "System Bank" logic from before implies we might want to track it.
-    # Let's deduct from Bank to keep inflation tracked? Or just mint.
-    # If we adhere to "Bank has no fixed balance" but "Bank takes cut", maybe Bank is the source.
-    # Let's log it against the Bank wallet for accounting if we want, or just as a grant.
-    # To be consistent with "Donations go to Bank", grants could come from Bank.
-    # Let's simply debit Bank (it can go negative as it's computed).
-    
-    bank_wallet = get_bank_wallet()
-    bank_wallet.balance -= amount
-    bank_wallet.save() # Optional update
-    
-    CreditTransaction.objects.create(
-        wallet=wallet,
-        amount=amount,
-        transaction_type='SUPPORT_GRANT',
-        description='Weekly Support Credit'
-    )
-    
-    CreditTransaction.objects.create(
-        wallet=bank_wallet,
-        amount=-amount,
-        transaction_type='SUPPORT_GRANT',
-        description=f'Grant to {user.email}'
-    )
+
+    # Credits come from the System/Bank, consistent with "Donations go to Bank".
+    # The Bank can go negative as its balance is computed from the ledger.
+    transfer([
+        Leg(wallet, amount, 'SUPPORT_GRANT', 'Weekly Support Credit'),
+        Leg(None, -amount, 'SUPPORT_GRANT', f'Grant to {user.email}'),
+    ], locked=locked, wallet_fields={wallet.pk: {'last_support_claim': timezone.now()}})
     
     return amount
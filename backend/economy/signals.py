@@ -0,0 +1,9 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from users.models import Wallet
+from . import services
+
+@receiver(post_delete, sender=Wallet)
+def forget_deleted_bank_wallet(sender, instance, **kwargs):
+    if instance.pk == services._bank_wallet_id:
+        services.clear_bank_wallet_cache()
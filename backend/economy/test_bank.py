@@ -1,7 +1,10 @@
 import pytest
 from django.core.exceptions import ValidationError
 from users.models import User, Wallet
-from .services import process_session_payment, donate_to_bank, get_bank_balance
+from django.db.models import Sum
+from . import services
+from .models import BankShard
+from .services import process_session_payment, donate_to_bank, get_bank_balance, get_bank_wallet
 
 @pytest.mark.django_db
 class TestBankLogic:
@@ -58,3 +61,63 @@ class TestBankLogic:
         user = User.objects.create_user(email='broke@e.com', password='pw')
         with pytest.raises(ValidationError):
             donate_to_bank(user.wallet, 100)
+
+@pytest.mark.django_db
+class TestBankWalletCache:
+    @pytest.fixture(autouse=True)
+    def clean_cache(self):
+        services.clear_bank_wallet_cache()
+        yield
+        services.clear_bank_wallet_cache()
+
+    def test_bank_wallet_resolved_once(self, django_capture_on_commit_callbacks, django_assert_num_queries):
+        with django_capture_on_commit_callbacks(execute=True):
+            bank = get_bank_wallet()
+
+        # Warm: a single primary key lookup, no get_or_create
+        with django_assert_num_queries(1):
+            assert get_bank_wallet().pk == bank.pk
+
+    def test_uncommitted_bank_wallet_is_not_cached(self):
+        get_bank_wallet()
+        assert services._bank_wallet_id is None
+
+    def test_deleted_bank_wallet_is_forgotten(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            bank = get_bank_wallet()
+        assert services._bank_wallet_id == bank.pk
+
+        bank.user.delete()
+        assert services._bank_wallet_id is None
+        assert get_bank_wallet().pk != bank.pk
+
+@pytest.mark.django_db
+class TestBankShards:
+    @pytest.fixture(autouse=True)
+    def sharded(self, settings):
+        settings.BANK_CREDIT_SHARDS = 4
+
+    def test_bank_row_untouched_until_folded(self):
+        student = User.objects.create_user(email='sh1@e.com', password='pw')
+        teacher = User.objects.create_user(email='sh2@e.com', password='pw')
+        bank = get_bank_wallet()
+        stored_before = bank.balance
+
+        for _ in range(3):
+            process_session_payment(student.wallet, teacher.wallet, 50) # 1 tax each
+        donate_to_bank(student.wallet, 4)
+
+        bank.refresh_from_db()
+        assert bank.balance == stored_before
+        assert BankShard.objects.aggregate(total=Sum('pending_amount'))['total'] == 7
+
+        # Exact figures before and after folding
+        assert get_bank_balance() == 7
+        assert services.get_bank_stored_balance() == stored_before + 7
+
+        assert services.fold_bank_shards() == 7
+        bank.refresh_from_db()
+        assert bank.balance == stored_before + 7
+        assert not BankShard.objects.exclude(pending_amount=0).exists()
+        assert get_bank_balance() == 7
+        assert services.get_bank_stored_balance() == stored_before + 7
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+from django.db import connection, OperationalError
+from django.db.models import Sum
+from users.models import User, Wallet
+from .models import CreditTransaction
+from .services import process_session_payment, get_bank_balance, get_bank_wallet
+
+STUDENTS = 8
+PAYMENTS_PER_STUDENT = 5
+SESSION_MINUTES = 50 # 10 credits: 9 to the teacher, 1 tax
+
+def run_with_retry(fn, attempts=200):
+    # SQLite serializes writers with a database-level lock; Postgres would block on the row locks instead.
+    for _ in range(attempts):
+        try:
+            return fn()
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            time.sleep(0.005)
+    raise AssertionError("writer starved")
+
+@pytest.mark.django_db(transaction=True)
+class TestPaymentContention:
+    def test_parallel_payments_keep_ledger_balanced(self):
+        teacher = User.objects.create_user(email='busy.teacher@e.com', password='pw')
+        students = [User.objects.create_user(email=f'student{i}@e.com', password='pw') for i in range(STUDENTS)]
+        get_bank_wallet()
+
+        start_balances = {w.pk: w.balance for w in Wallet.objects.all()}
+        errors = []
+        barrier = threading.Barrier(STUDENTS)
+
+        def pay(student_wallet_id):
+            try:
+                barrier.wait()
+                # Instances loaded once: their in-memory balances go stale and must not matter
+                student_wallet = run_with_retry(lambda: Wallet.objects.get(pk=student_wallet_id))
+                teacher_wallet = run_with_retry(lambda: Wallet.objects.get(user=teacher))
+                for _ in range(PAYMENTS_PER_STUDENT):
+                    run_with_retry(lambda: process_session_payment(student_wallet, teacher_wallet, SESSION_MINUTES))
+            except Exception as e: # surfaced below
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=pay, args=(s.wallet.pk,)) for s in students]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors, errors
+        payments = STUDENTS * PAYMENTS_PER_STUDENT
+
+        # No lost updates: every wallet moved by exactly its ledger rows
+        for wallet in Wallet.objects.annotate(ledger=Sum('transactions__amount')):
+            assert wallet.balance - start_balances[wallet.pk] == (wallet.ledger or 0)
+
+        teacher_wallet = Wallet.objects.get(user=teacher)
+        assert teacher_wallet.balance - start_balances[teacher_wallet.pk] == payments * 9
+        assert get_bank_balance() == payments * 1
+        # Money is conserved across the whole ledger
+        assert CreditTransaction.objects.aggregate(total=Sum('amount'))['total'] == 0
@@ -0,0 +1,38 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.models import User
+from .models import CreditTransaction
+
+@pytest.mark.django_db
+class TestTransactionHistory:
+    def test_keyset_pages_cover_history_newest_first(self):
+        user = User.objects.create_user(email='h1@e.com', password='pw')
+        other = User.objects.create_user(email='h2@e.com', password='pw')
+        for i in range(25):
+            CreditTransaction.objects.create(
+                wallet=user.wallet, amount=i, transaction_type='TAX' if i % 5 == 0 else 'DONATION'
+            )
+        CreditTransaction.objects.create(wallet=other.wallet, amount=99, transaction_type='TAX')
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(reverse('transaction-history'), {'page_size': 10})
+        assert response.status_code == status.HTTP_200_OK
+        amounts = [tx['amount'] for tx in response.data['results']]
+        next_url = response.data['next']
+        while next_url:
+            response = client.get(next_url)
+            amounts += [tx['amount'] for tx in response.data['results']]
+            next_url = response.data['next']
+
+        assert amounts == list(range(24, -1, -1))
+
+        response = client.get(reverse('transaction-history'), {'type': 'TAX'})
+        assert [tx['amount'] for tx in response.data['results']] == [20, 15, 10, 5, 0]
+
+    def test_requires_authentication(self):
+        response = APIClient().get(reverse('transaction-history'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+from .consumers import wallet_socket, CLOSE_UNAUTHORIZED
+from .realtime import get_broker
+from .services import process_session_payment
+
+async def open_socket(query_string):
+    """Drive the ASGI socket by hand; returns (incoming queue, outgoing list, task)."""
+    incoming, outgoing = asyncio.Queue(), []
+    await incoming.put({'type': 'websocket.connect'})
+
+    async def send(message):
+        outgoing.append(message)
+
+    scope = {'type': 'websocket', 'path': '/ws/wallet/', 'query_string': query_string}
+    task = asyncio.ensure_future(wallet_socket(scope, incoming.get, send))
+    # Authentication looks the user up in a worker thread: wait for the accept or close
+    for _ in range(100):
+        if outgoing:
+            break
+        await asyncio.sleep(0.01)
+    return incoming, outgoing, task
+
+@pytest.mark.django_db
+class TestWalletPush:
+    def test_payment_publishes_after_commit(self, django_capture_on_commit_callbacks):
+        student = User.objects.create_user(email='ws1@e.com', password='pw')
+        teacher = User.objects.create_user(email='ws2@e.com', password='pw')
+        received = []
+        broker = get_broker()
+        broker.publish = lambda user_id, message: received.append((user_id, message))
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            process_session_payment(student.wallet, teacher.wallet, 50)
+        assert received == [] # nothing before commit
+
+        for callback in callbacks:
+            callback()
+        updates = dict(received)
+        assert updates[student.pk]['delta'] == -10
+        assert updates[student.pk]['balance'] == student.wallet.balance
+        assert updates[teacher.pk]['delta'] == 9
+        assert updates[teacher.pk]['transaction_types'] == ['SESSION_PAYMENT']
+        assert len(updates) == 2 # the bank has no socket
+
+# The socket loads its user through the async ORM, from another thread: the rows must be committed
+@pytest.mark.django_db(transaction=True)
+class TestWalletSocket:
+    def test_socket_streams_updates_for_its_user_only(self):
+        user = User.objects.create_user(email='ws3@e.com', password='pw')
+        token = str(AccessToken.for_user(user))
+
+        async def scenario():
+            incoming, outgoing, task = await open_socket(f'token={token}'.encode())
+            assert outgoing == [{'type': 'websocket.accept'}]
+
+            get_broker().publish(user.pk + 1, {'type': 'wallet.update', 'delta': 1})
+            get_broker().publish(user.pk, {'type': 'wallet.update', 'delta': 5, 'balance': 55})
+            await asyncio.sleep(0.01)
+
+            await incoming.put({'type': 'websocket.disconnect'})
+            await asyncio.wait_for(task, 1)
+            return outgoing[1:]
+
+        sent = asyncio.run(scenario())
+        assert [json.loads(m['text']) for m in sent] == [{'type': 'wallet.update', 'delta': 5, 'balance': 55}]
+        assert get_broker()._subscribers == {}
+
+    def test_socket_rejects_missing_or_bad_token(self):
+        async def scenario(query_string):
+            _, outgoing, task = await open_socket(query_string)
+            await asyncio.wait_for(task, 1)
+            return outgoing
+
+        for query_string in (b'', b'token=garbage'):
+            assert asyncio.run(scenario(query_string)) == [{'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED}]
+
+    def test_socket_rejects_inactive_user(self):
+        user = User.objects.create_user(email='ws4@e.com', password='pw', is_active=False)
+        token = str(AccessToken.for_user(user))
+
+        async def scenario():
+            _, outgoing, task = await open_socket(f'token={token}'.encode())
+            await asyncio.wait_for(task, 1)
+            return outgoing
+
+        assert asyncio.run(scenario()) == [{'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED}]
@@ -0,0 +1,135 @@
+import pytest
+from io import StringIO
+from datetime import timedelta
+from django.core.management import call_command
+from django.db.models import Sum
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from users.models import User
+from .models import CreditTransaction, LearningSession
+from .services import bill_sessions, get_bank_balance, get_bank_wallet, get_bank_wallet_id
+
+def make_pair(prefix, balance=None):
+    student = User.objects.create_user(email=f'{prefix}s@e.com', password='pw')
+    teacher = User.objects.create_user(email=f'{prefix}t@e.com', password='pw')
+    if balance is not None:
+        student.wallet.balance = balance
+        student.wallet.save()
+    return student, teacher
+
+def started(student, teacher, minutes_ago, now):
+    start = now - timedelta(minutes=minutes_ago)
+    return LearningSession.objects.create(student=student, teacher=teacher, started_at=start, last_heartbeat=now)
+
+@pytest.mark.django_db
+class TestSessionBilling:
+    def test_ticks_charge_completed_blocks_cumulatively(self):
+        student, teacher = make_pair('b1', balance=200)
+        teacher_start = teacher.wallet.balance
+        now = timezone.now()
+        session = started(student, teacher, 52, now)
+
+        assert bill_sessions(now=now) == 10 # 52 min -> 10 blocks, tax 1
+        session.refresh_from_db()
+        assert (session.billed_minutes, session.billed_credits, session.billed_tax) == (52, 10, 1)
+
+        LearningSession.objects.filter(pk=session.pk).update(last_heartbeat=now + timedelta(minutes=50))
+        assert bill_sessions(now=now + timedelta(minutes=50)) == 10 # 102 min -> 20 blocks, tax 2 in total
+
+        student.wallet.refresh_from_db()
+        teacher.wallet.refresh_from_db()
+        # Same totals as one process_session_payment for 102 minutes
+        assert student.wallet.balance == 200 - 20
+        assert teacher.wallet.balance == teacher_start + 18
+        assert get_bank_balance() == 2
+
+    def test_one_ledger_write_for_many_sessions(self, django_assert_max_num_queries, django_capture_on_commit_callbacks):
+        now = timezone.now()
+        for i in range(5):
+            started(*make_pair(f'b2{i}'), 10, now)
+        with django_capture_on_commit_callbacks(execute=True):
+            get_bank_wallet_id() # steady state: bank id already cached
+
+        # sessions, wallet ids, wallet locks, ledger insert, wallet update, session update (+ savepoints)
+        with django_assert_max_num_queries(10):
+            assert bill_sessions(now=now) == 10
+        assert CreditTransaction.objects.filter(transaction_type='SESSION_PAYMENT').count() == 10
+
+    def test_timed_out_session_ends_at_last_heartbeat(self):
+        student, teacher = make_pair('b3')
+        now = timezone.now()
+        session = started(student, teacher, 10, now - timedelta(minutes=20))
+
+        bill_sessions(now=now) # heartbeat 20 min old: only the first 10 minutes count
+        session.refresh_from_db()
+        assert (session.status, session.end_reason) == ('ENDED', 'TIMEOUT')
+        assert session.billed_credits == 2
+
+    def test_student_out_of_credits_ends_session(self):
+        student, teacher = make_pair('b4', balance=3)
+        now = timezone.now()
+        session = started(student, teacher, 30, now)
+
+        assert bill_sessions(now=now) == 3
+        session.refresh_from_db()
+        student.wallet.refresh_from_db()
+        assert (session.status, session.end_reason, session.billed_minutes) == ('ENDED', 'INSUFFICIENT_CREDITS', 15)
+        assert student.wallet.balance == 0
+
+    def test_command_bills_and_ledger_balances(self):
+        student, teacher = make_pair('b5')
+        started(student, teacher, 10, timezone.now())
+        call_command('bill_sessions', stdout=StringIO())
+        assert CreditTransaction.objects.aggregate(total=Sum('amount'))['total'] == 0
+
+@pytest.mark.django_db
+class TestSessionEndpoints:
+    def test_start_heartbeat_end(self):
+        student, teacher = make_pair('e1')
+        client = APIClient()
+        client.force_authenticate(user=student)
+
+        response = client.post(reverse('session-start'), {'teacher_id': teacher.pk})
+        assert response.status_code == 201
+        session_id = response.data['id']
+
+        assert client.post(reverse('session-heartbeat', args=[session_id])).status_code == 204
+
+        # Pretend the session started 12 minutes ago
+        LearningSession.objects.filter(pk=session_id).update(started_at=timezone.now() - timedelta(minutes=12))
+        response = client.post(reverse('session-end', args=[session_id]))
+        assert response.data['status'] == 'ENDED'
+        assert response.data['billed_credits'] == 2
+
+        assert client.post(reverse('session-heartbeat', args=[session_id])).status_code == 400
+
+    def test_only_participants_see_a_session(self):
+        student, teacher = make_pair('e2')
+        outsider = User.objects.create_user(email='e2o@e.com', password='pw')
+        session = LearningSession.objects.create(student=student, teacher=teacher)
+        client = APIClient()
+        client.force_authenticate(user=outsider)
+        assert client.post(reverse('session-end', args=[session.pk])).status_code == 404
+
+    def test_cannot_start_with_yourself(self):
+        student, _ = make_pair('e3')
+        client = APIClient()
+        client.force_authenticate(user=student)
+        assert client.post(reverse('session-start'), {'teacher_id': student.pk}).status_code == 400
+
+    def test_teacher_id_is_validated(self):
+        student, teacher = make_pair('e4')
+        teacher.is_active = False
+        teacher.save()
+        client = APIClient()
+        client.force_authenticate(user=student)
+        url = reverse('session-start')
+
+        assert client.post(url, {'teacher_id': 'abc'}).status_code == 400
+        assert client.post(url, {}).status_code == 400
+        assert client.post(url, {'teacher_id': teacher.pk + 1000}).status_code == 404
+        # Inactive users, such as the bank's system user, cannot teach
+        assert client.post(url, {'teacher_id': teacher.pk}).status_code == 400
+        assert client.post(url, {'teacher_id': get_bank_wallet().user_id}).status_code == 400
+        assert not LearningSession.objects.exists()
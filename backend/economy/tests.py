@@ -1,7 +1,8 @@
 import pytest
 from django.core.exceptions import ValidationError
 from users.models import User, Wallet
-from .services import process_session_payment
+from .models import CreditTransaction
+from .services import process_session_payment, transfer, Leg, get_bank_wallet_id
 
 @pytest.mark.django_db
 class TestCreditSystem:
@@ -53,3 +54,22 @@ class TestCreditSystem:
         # 9 minutes = 1 credit
         transferred = process_session_payment(student.wallet, teacher.wallet, 9)
         assert transferred == 1
+
+    def test_transfer_round_trips_are_constant(self, django_capture_on_commit_callbacks, django_assert_max_num_queries):
+        student = User.objects.create_user(email='s3@e.com', password='pw')
+        teacher = User.objects.create_user(email='t3@e.com', password='pw')
+        with django_capture_on_commit_callbacks(execute=True):
+            get_bank_wallet_id()
+
+        # savepoint + lock + one bulk INSERT + one UPDATE + release
+        with django_assert_max_num_queries(5):
+            process_session_payment(student.wallet, teacher.wallet, 50)
+
+        assert CreditTransaction.objects.filter(transaction_type__in=['SESSION_PAYMENT', 'TAX']).count() == 3
+        assert student.wallet.balance == Wallet.objects.get(pk=student.wallet.pk).balance
+
+    def test_transfer_legs_must_balance(self):
+        user = User.objects.create_user(email='u4@e.com', password='pw')
+        with pytest.raises(ValueError):
+            transfer([Leg(user.wallet, -3, 'PENALTY'), Leg(None, 2, 'PENALTY')])
+        assert not CreditTransaction.objects.exists()
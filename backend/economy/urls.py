@@ -1,8 +1,15 @@
 from django.urls import path
-from .views import SupportEligibilityView, SupportClaimView, DonateView
+from .views import (
+    SupportEligibilityView, SupportClaimView, DonateView, TransactionHistoryView,
+    SessionStartView, SessionHeartbeatView, SessionEndView,
+)
 
 urlpatterns = [
     path('support/eligibility/', SupportEligibilityView.as_view(), name='support-eligibility'),
     path('support/claim/', SupportClaimView.as_view(), name='support-claim'),
     path('donate/', DonateView.as_view(), name='donate'),
+    path('transactions/', TransactionHistoryView.as_view(), name='transaction-history'),
+    path('sessions/', SessionStartView.as_view(), name='session-start'),
+    path('sessions/<int:pk>/heartbeat/', SessionHeartbeatView.as_view(), name='session-heartbeat'),
+    path('sessions/<int:pk>/end/', SessionEndView.as_view(), name='session-end'),
 ]
@@ -1,10 +1,20 @@
-from rest_framework import views, permissions, status
+from rest_framework import generics, views, permissions, status
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError
-from .services import check_support_eligibility, claim_support_credits, donate_to_bank
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from users.models import User
+from .models import CreditTransaction, LearningSession
+from .pagination import TransactionHistoryPagination
+from .serializers import CreditTransactionSerializer, LearningSessionSerializer, SessionStartSerializer
+from .services import (
+    check_support_eligibility, claim_support_credits, donate_to_bank,
+    start_session, heartbeat_session, end_session,
+)
 
 class SupportEligibilityView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 2
 
     def get(self, request):
         eligible, amount, reason = check_support_eligibility(request.user)
@@ -16,6 +26,8 @@ class SupportEligibilityView(views.APIView):
 
 class SupportClaimView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 9
+    throttle_scope = 'write'
 
     def post(self, request):
         try:
@@ -26,6 +38,8 @@ class SupportClaimView(views.APIView):
 
 class DonateView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 7
+    throttle_scope = 'write'
 
     def post(self, request):
         amount = request.data.get('amount')
@@ -34,9 +48,66 @@ class DonateView(views.APIView):
         
         try:
             amount = int(amount)
-            donate_to_bank(request.user, amount)
+            donate_to_bank(request.user.wallet, amount)
             return Response({'message': f'Donated {amount} credits successfully.'})
         except ValueError:
             return Response({'error': 'Invalid amount format'}, status=status.HTTP_400_BAD_REQUEST)
         except ValidationError as e:
             return Response({'error': str(e.message)}, status=status.HTTP_400_BAD_REQUEST)
+
+class TransactionHistoryView(generics.ListAPIView):
+    # The user's own ledger, newest first, keyset paginated. Optional ?type=TAX etc.
+    serializer_class = CreditTransactionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TransactionHistoryPagination
+    query_budget = 3
+
+    def get_queryset(self):
+        qs = CreditTransaction.objects.filter(wallet=self.request.user.wallet)
+        transaction_type = self.request.query_params.get('type')
+        if transaction_type:
+            qs = qs.filter(transaction_type=transaction_type)
+        return qs
+
+class SessionStartView(views.APIView):
+    # The requesting user is the student; billing runs server side (bill_sessions)
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+    throttle_scope = 'write'
+
+    def post(self, request):
+        serializer = SessionStartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        teacher = get_object_or_404(User, pk=serializer.validated_data['teacher_id'])
+        try:
+            session = start_session(request.user, teacher)
+        except ValidationError as e:
+            return Response({'error': str(e.message)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(LearningSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+class SessionParticipantMixin:
+    def get_session(self, request, pk):
+        return get_object_or_404(
+            LearningSession.objects.filter(Q(student=request.user) | Q(teacher=request.user)), pk=pk
+        )
+
+class SessionHeartbeatView(SessionParticipantMixin, views.APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3
+
+    def post(self, request, pk):
+        session = self.get_session(request, pk)
+        try:
+            heartbeat_session(session)
+        except ValidationError as e:
+            return Response({'error': str(e.message)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class SessionEndView(SessionParticipantMixin, views.APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 9
+    throttle_scope = 'write'
+
+    def post(self, request, pk):
+        session = end_session(self.get_session(request, pk))
+        return Response(LearningSessionSerializer(session).data)
@@ -0,0 +1,95 @@
+"""
+Response cache for the anonymous public feed.
+
+Pages are stored under a generation number; any post create/status change or
+bounty toggle bumps the generation (learning.signals), which orphans every
+cached page at once. Entries are keyed by generation, bounty mode, the path and
+the pagination parameters; any other query parameter is ignored. Pages live in
+the FEED_CACHE_ALIAS cache, the generation in FEED_GENERATION_CACHE_ALIAS, which
+holds nothing else so it is never culled to make room for pages.
+
+The same cache keeps a second generation for ratings, bumped on every
+rating_stats_changed (learning.signals), so discovery can version its responses
+on rating changes without counting the Rating table.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+GENERATION_KEY = 'learning:feed:generation'
+RATINGS_GENERATION_KEY = 'learning:ratings:generation'
+# The only query parameters that change a page (OptionalPageNumberPagination)
+PAGE_PARAMS = ('page', 'page_size')
+
+
+def feed_cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def generation_cache():
+    return caches[settings.FEED_GENERATION_CACHE_ALIAS]
+
+
+def get_generation(key=GENERATION_KEY):
+    cache = generation_cache()
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, 1, timeout=None)
+        generation = cache.get(key, 1)
+    return generation
+
+
+async def aget_generation(key=GENERATION_KEY):
+    cache = generation_cache()
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, 1, timeout=None)
+        generation = await cache.aget(key, 1)
+    return generation
+
+
+def _bump_generation(key=GENERATION_KEY):
+    cache = generation_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def _invalidate(key):
+    _bump_generation(key)
+    # Responses rendered from uncommitted data in the meantime must not survive the commit either
+    transaction.on_commit(lambda: _bump_generation(key))
+
+
+def invalidate_feed():
+    _invalidate(GENERATION_KEY)
+
+
+def invalidate_ratings():
+    _invalidate(RATINGS_GENERATION_KEY)
+
+
+def page_key(generation, bounty_active, request):
+    params = urlencode([(name, request.query_params.get(name, '')) for name in PAGE_PARAMS])
+    digest = hashlib.md5(f'{request.path}?{params}'.encode('utf-8')).hexdigest()
+    return f'learning:feed:{generation}:{int(bounty_active)}:{digest}'
+
+
+def get_page(key):
+    return feed_cache().get(key)
+
+
+def set_page(key, data):
+    feed_cache().set(key, data, settings.FEED_CACHE_TIMEOUT)
+
+
+async def aget_page(key):
+    return await feed_cache().aget(key)
+
+
+async def aset_page(key, data):
+    await feed_cache().aset(key, data, settings.FEED_CACHE_TIMEOUT)
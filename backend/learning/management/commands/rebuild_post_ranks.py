@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from learning.ranking import rebuild_post_ranks
+
+
+class Command(BaseCommand):
+    help = "Recompute the PostRank table for all Active posts."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            created = rebuild_post_ranks()
+        self.stdout.write(self.style.SUCCESS(f"Ranked {created} posts."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from learning.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Re-index all Active learning posts in the topic search index."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        with transaction.atomic():
+            indexed = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{type(backend).__name__}: indexed {indexed} posts."))
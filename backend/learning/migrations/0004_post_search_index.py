@@ -0,0 +1,51 @@
+import sqlite3
+
+from django.db import OperationalError, migrations
+
+# Inlined on purpose: a migration must not change when learning.search does.
+FTS_TABLE = 'learning_post_search'
+POST_TABLE = 'learning_learningrequestpost'
+PG_DOCUMENT = (
+    "to_tsvector('simple', coalesce(learning_learningrequestpost.topic_to_learn, '') || ' ' || "
+    "coalesce(learning_learningrequestpost.topic_to_teach, ''))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "topic_to_learn, topic_to_teach, tokenize = 'unicode61', prefix = '2 3')"
+            )
+        except (sqlite3.OperationalError, OperationalError):
+            # SQLite built without FTS5: search falls back to substring matching.
+            return
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, topic_to_learn, topic_to_teach) "
+            f"SELECT id, topic_to_learn, coalesce(topic_to_teach, '') FROM {POST_TABLE} WHERE status = 'Active'"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX learning_post_topic_search ON {POST_TABLE} USING gin ({PG_DOCUMENT})"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS learning_post_topic_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0003_systemconfig'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,49 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_post_ranks(apps, schema_editor):
+    LearningRequestPost = apps.get_model('learning', 'LearningRequestPost')
+    PostRank = apps.get_model('learning', 'PostRank')
+    SystemConfig = apps.get_model('learning', 'SystemConfig')
+
+    config = SystemConfig.objects.filter(pk=1).first()
+    bounty_active = bool(config and config.bounty_mode_active)
+    ranks = []
+    for post in LearningRequestPost.objects.filter(status='Active').select_related('creator'):
+        creator = post.creator
+        bounty = 5.0 if bounty_active and post.learning_only_flag else 0.0
+        rating = creator.rating_sum / creator.rating_count * 2 if creator.rating_count else 0.0
+        ranks.append(PostRank(
+            post=post, creator=creator, learning_only_flag=post.learning_only_flag,
+            bounty_score=bounty, rating_score=rating, static_score=bounty + rating,
+        ))
+    PostRank.objects.bulk_create(ranks, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0005_learningrequestpost_updated_at'),
+        ('users', '0004_user_rating_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRank',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rank', serialize=False, to='learning.learningrequestpost')),
+                ('learning_only_flag', models.BooleanField(default=False)),
+                ('bounty_score', models.FloatField(default=0)),
+                ('rating_score', models.FloatField(default=0)),
+                ('static_score', models.FloatField(default=0)),
+                ('creator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-static_score', '-post'], name='learning_postrank_order')],
+            },
+        ),
+        migrations.RunPython(populate_post_ranks, migrations.RunPython.noop),
+    ]
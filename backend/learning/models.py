@@ -1,5 +1,8 @@
-from django.db import models
+import time
+
+from django.db import models, transaction
 from django.conf import settings
+from django.core.cache import cache
 
 class LearningRequestPost(models.Model):
     STATUS_CHOICES = [
@@ -15,23 +18,85 @@ class LearningRequestPost(models.Model):
     bounty_mode = models.BooleanField(default=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Active')
     timestamp = models.DateTimeField(auto_now_add=True)
+    # Bumped on every save (e.g. status changes); feeds use it as a cheap version stamp
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     timestamp = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.creator.email} wants to learn {self.topic_to_learn}"
 
+class PostRank(models.Model):
+    """
+    Materialized static part of an Active post's discovery score, maintained by
+    learning.ranking. Browsing discovery walks it in index order; only the query
+    relevance and the online boost are added at read time.
+    """
+    post = models.OneToOneField(LearningRequestPost, on_delete=models.CASCADE, primary_key=True, related_name='rank')
+    creator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    learning_only_flag = models.BooleanField(default=False)
+    bounty_score = models.FloatField(default=0)
+    rating_score = models.FloatField(default=0)
+    static_score = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            # Discovery's browse order (learning.views.DiscoveryScoring)
+            models.Index(fields=['-static_score', '-post'], name='learning_postrank_order'),
+        ]
+
+    def __str__(self):
+        return f"Rank of post {self.post_id}: {self.static_score}"
+
 class SystemConfig(models.Model):
     bounty_mode_active = models.BooleanField(default=False)
 
+    CACHE_KEY = 'learning:system_config'
+    # In-process copy in front of the shared cache: (instance, monotonic expiry)
+    _local = None
+
     def save(self, *args, **kwargs):
         self.pk = 1
         super(SystemConfig, self).save(*args, **kwargs)
+        self.clear_cache()
+        # Readers inside this transaction may re-cache the new value before it is committed
+        transaction.on_commit(self.clear_cache)
 
     @classmethod
-    def load(cls):
-        obj, created = cls.objects.get_or_create(pk=1)
+    def load(cls, cached=True):
+        if not cached:
+            obj, created = cls.objects.get_or_create(pk=1)
+            return obj
+
+        local = cls._local
+        if local is not None and local[1] > time.monotonic():
+            return local[0]
+
+        obj = cache.get(cls.CACHE_KEY)
+        if obj is None:
+            obj, created = cls.objects.get_or_create(pk=1)
+            cache.set(cls.CACHE_KEY, obj, settings.SYSTEM_CONFIG_CACHE_TTL)
+        cls._local = (obj, time.monotonic() + settings.SYSTEM_CONFIG_LOCAL_TTL)
         return obj
 
+    @classmethod
+    async def aload(cls):
+        # Async twin of load(): same local copy and shared cache entry
+        local = cls._local
+        if local is not None and local[1] > time.monotonic():
+            return local[0]
+
+        obj = await cache.aget(cls.CACHE_KEY)
+        if obj is None:
+            obj, created = await cls.objects.aget_or_create(pk=1)
+            await cache.aset(cls.CACHE_KEY, obj, settings.SYSTEM_CONFIG_CACHE_TTL)
+        cls._local = (obj, time.monotonic() + settings.SYSTEM_CONFIG_LOCAL_TTL)
+        return obj
+
+    @classmethod
+    def clear_cache(cls):
+        cls._local = None
+        cache.delete(cls.CACHE_KEY)
+
     def __str__(self):
         return f"System Config (Bounty Mode: {self.bounty_mode_active})"
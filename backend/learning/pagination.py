@@ -0,0 +1,131 @@
+import base64
+import json
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework import pagination, exceptions
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ScoreCursorPagination(pagination.BasePagination):
+    """
+    Keyset pagination over a queryset annotated with `score` and ordered by
+    ('-score', '-id'). Only the requested page (+1 row to detect the next one)
+    is fetched from the database.
+
+    Opt-in: requests without `cursor` or `page_size` get the plain list.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.get_window(queryset, request)
+        if window is None:
+            return None
+        return self.set_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        window = self.get_window(queryset, request)
+        if window is None:
+            return None
+        return self.set_page([row async for row in window])
+
+    def get_window(self, queryset, request):
+        """The unevaluated slice holding the requested page, or None when not paginating."""
+        if not self.start(request):
+            return None
+        if self.position is not None:
+            score, pk = self.position
+            queryset = queryset.filter(Q(score__lt=score) | Q(score=score, id__lt=pk))
+        return queryset[:self.page_size + 1]
+
+    def start(self, request):
+        """
+        Read the page request: False when not paginating; otherwise sets `page_size` and
+        `position`, the (score, id) the page starts after (None on the first page).
+        Lets views whose rows do not come from one queryset fetch page_size + 1 rows
+        themselves and hand them to set_page().
+        """
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return False
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.position = self.decode_cursor(params.get(self.cursor_query_param))
+        return True
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            return float(data['s']), int(data['id'])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise exceptions.NotFound('Invalid cursor')
+
+    def encode_cursor(self, item):
+        payload = json.dumps({'s': item.score, 'id': item.id})
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class OptionalPageNumberPagination(pagination.PageNumberPagination):
+    """Page-number pagination only when `page` or `page_size` is given; plain list otherwise."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.page_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Same pages as paginate_queryset, with the count and the rows fetched by the async ORM."""
+        params = request.query_params
+        if self.page_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise exceptions.NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [row async for row in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return list(self.page)
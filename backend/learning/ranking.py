@@ -0,0 +1,88 @@
+"""
+Maintenance of the PostRank table (static discovery score components).
+
+    static_score = bounty_score + rating_score
+
+Each function refreshes the smallest affected slice: one post on create/status
+change, one creator's posts on a rating change, a single UPDATE on a bounty toggle.
+"""
+from django.db.models import Case, When, Value, F, FloatField
+from django.db.models.functions import Cast
+
+from users.models import User
+from .models import LearningRequestPost, PostRank, SystemConfig
+
+BOUNTY_POINTS = 5
+RATING_WEIGHT = 2 # avg rating (max 5) * 2 -> max 10 pts
+
+
+def bounty_points(learning_only_flag, bounty_active):
+    return float(BOUNTY_POINTS) if bounty_active and learning_only_flag else 0.0
+
+
+def rating_points(rating_count, rating_sum):
+    return rating_sum / rating_count * RATING_WEIGHT if rating_count else 0.0
+
+
+def refresh_post_rank(post):
+    if post.status != 'Active':
+        PostRank.objects.filter(post_id=post.pk).delete()
+        return
+
+    # Stats are maintained with F() updates, so in-memory creator instances may be stale
+    rating_count, rating_sum = User.objects.filter(pk=post.creator_id).values_list('rating_count', 'rating_sum').get()
+    bounty = bounty_points(post.learning_only_flag, SystemConfig.load().bounty_mode_active)
+    rating = rating_points(rating_count, rating_sum)
+    PostRank.objects.update_or_create(post_id=post.pk, defaults={
+        'creator_id': post.creator_id,
+        'learning_only_flag': post.learning_only_flag,
+        'bounty_score': bounty,
+        'rating_score': rating,
+        'static_score': bounty + rating,
+    })
+
+
+def refresh_creator_ranks(user):
+    # `user` must carry current rating_count / rating_sum
+    rating = rating_points(user.rating_count, user.rating_sum)
+    PostRank.objects.filter(creator_id=user.pk).update(
+        rating_score=rating,
+        static_score=F('bounty_score') + rating,
+    )
+
+
+def refresh_bounty_scores(bounty_active):
+    bounty = Case(
+        When(learning_only_flag=True, then=Value(float(BOUNTY_POINTS))),
+        default=Value(0.0),
+    ) if bounty_active else Value(0.0)
+    PostRank.objects.update(bounty_score=bounty, static_score=bounty + F('rating_score'))
+
+
+def rebuild_post_ranks():
+    bounty_active = SystemConfig.load(cached=False).bounty_mode_active
+    PostRank.objects.all().delete()
+
+    active = LearningRequestPost.objects.filter(status='Active').annotate(
+        rating=Case(
+            When(
+                creator__rating_count__gt=0,
+                then=Cast('creator__rating_sum', FloatField()) / F('creator__rating_count') * RATING_WEIGHT,
+            ),
+            default=Value(0.0),
+        )
+    ).values_list('pk', 'creator_id', 'learning_only_flag', 'rating').iterator()
+
+    batch = []
+    created = 0
+    for pk, creator_id, learning_only, rating in active:
+        bounty = bounty_points(learning_only, bounty_active)
+        batch.append(PostRank(
+            post_id=pk, creator_id=creator_id, learning_only_flag=learning_only,
+            bounty_score=bounty, rating_score=rating, static_score=bounty + rating,
+        ))
+        if len(batch) >= 1000:
+            created += len(PostRank.objects.bulk_create(batch))
+            batch = []
+    created += len(PostRank.objects.bulk_create(batch))
+    return created
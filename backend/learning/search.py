@@ -0,0 +1,137 @@
+"""
+Topic search over LearningRequestPost.
+
+Active posts are mirrored into a full-text index (FTS5 on SQLite, a GIN
+tsvector index on Postgres) kept in sync by learning.signals. Backends expose
+one call, `search(queryset, query)`, which filters the queryset to matching
+posts and annotates `search_rank`, a relevance score in [0, 1].
+"""
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import Q, Value, FloatField, BooleanField
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'learning_post_search'
+POST_TABLE = 'learning_learningrequestpost'
+
+# Postgres: keep in sync with the expression index created in migration 0004_post_search_index.
+PG_DOCUMENT = (
+    "to_tsvector('simple', coalesce(%s.topic_to_learn, '') || ' ' || coalesce(%s.topic_to_teach, ''))"
+    % (POST_TABLE, POST_TABLE)
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+class SubstringSearchBackend:
+    """Fallback without an index: icontains scan, every match ranks equally."""
+
+    def __init__(self, using='default'):
+        self.using = using
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def search(self, queryset, query):
+        queryset = queryset.filter(Q(topic_to_learn__icontains=query) | Q(topic_to_teach__icontains=query))
+        return queryset.annotate(search_rank=Value(1.0, output_field=FloatField()))
+
+
+class SQLiteFTSBackend(SubstringSearchBackend):
+    """FTS5 virtual table keyed by post id (rowid), ranked with bm25."""
+
+    def index_post(self, post):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, topic_to_learn, topic_to_teach) VALUES (%s, %s, %s)",
+                [post.pk, post.topic_to_learn, post.topic_to_teach or ''],
+            )
+
+    def remove_post(self, post_id):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+    def rebuild(self):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, topic_to_learn, topic_to_teach) "
+                f"SELECT id, topic_to_learn, coalesce(topic_to_teach, '') FROM {POST_TABLE} WHERE status = 'Active'"
+            )
+            return cursor.rowcount
+
+    def search(self, queryset, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return super().search(queryset, query)
+        # Every token must match; the last one is usually still being typed, so all are prefix terms.
+        match = ' '.join('"%s"*' % token for token in tokens)
+
+        matching_ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        # bm25() is negative (lower is better) and unbounded; r / (1 + r) maps it onto [0, 1).
+        rank = RawSQL(
+            f"SELECT -bm25({FTS_TABLE}) / (1.0 - bm25({FTS_TABLE})) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {POST_TABLE}.id",
+            (match,),
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matching_ids).annotate(search_rank=rank)
+
+
+class PostgresSearchBackend(SubstringSearchBackend):
+    """tsvector expression index; nothing to maintain besides the table itself."""
+
+    def search(self, queryset, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return super().search(queryset, query)
+        tsquery = ' & '.join('%s:*' % token for token in tokens)
+
+        matches = RawSQL(f"{PG_DOCUMENT} @@ to_tsquery('simple', %s)", (tsquery,), output_field=BooleanField())
+        # ts_rank normalization 32 yields rank / (rank + 1), i.e. [0, 1).
+        rank = RawSQL(f"ts_rank({PG_DOCUMENT}, to_tsquery('simple', %s), 32)", (tsquery,), output_field=FloatField())
+        return queryset.alias(search_match=matches).filter(search_match=True).annotate(search_rank=rank)
+
+
+_backends = {}
+
+
+def fts5_table_exists(using='default'):
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def get_search_backend(using='default'):
+    backend = _backends.get(using)
+    if backend is None:
+        vendor = connections[using].vendor
+        if vendor == 'sqlite' and fts5_table_exists(using):
+            backend = SQLiteFTSBackend(using)
+        elif vendor == 'postgresql':
+            backend = PostgresSearchBackend(using)
+        else:
+            backend = SubstringSearchBackend(using)
+        _backends[using] = backend
+    return backend
+
+
+async def aget_search_backend(using='default'):
+    # Only the first call per connection alias inspects the database
+    backend = _backends.get(using)
+    if backend is None:
+        backend = await sync_to_async(get_search_backend)(using)
+    return backend
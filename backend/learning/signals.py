@@ -0,0 +1,44 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import LearningRequestPost, SystemConfig
+from .search import get_search_backend
+from .feed_cache import invalidate_feed, invalidate_ratings
+from . import ranking
+from users.models import User
+from users.signals import rating_stats_changed
+
+@receiver(post_save, sender=LearningRequestPost)
+def sync_post_search_index(sender, instance, **kwargs):
+    # Only Active posts are discoverable, so anything else leaves the index.
+    backend = get_search_backend()
+    if instance.status == 'Active':
+        backend.index_post(instance)
+    else:
+        backend.remove_post(instance.pk)
+
+@receiver(post_delete, sender=LearningRequestPost)
+def drop_post_from_search_index(sender, instance, **kwargs):
+    get_search_backend().remove_post(instance.pk)
+
+@receiver(post_save, sender=LearningRequestPost)
+@receiver(post_delete, sender=LearningRequestPost)
+@receiver(post_save, sender=SystemConfig)
+def invalidate_public_feed(sender, **kwargs):
+    invalidate_feed()
+
+@receiver(post_save, sender=LearningRequestPost)
+def sync_post_rank(sender, instance, **kwargs):
+    ranking.refresh_post_rank(instance)
+
+@receiver(rating_stats_changed)
+def sync_creator_ranks(sender, user_id, **kwargs):
+    user = User.objects.only('rating_count', 'rating_sum').get(pk=user_id)
+    ranking.refresh_creator_ranks(user)
+
+@receiver(rating_stats_changed)
+def invalidate_rating_generation(sender, user_id, **kwargs):
+    invalidate_ratings()
+
+@receiver(post_save, sender=SystemConfig)
+def sync_bounty_scores(sender, instance, **kwargs):
+    ranking.refresh_bounty_scores(instance.bounty_mode_active)
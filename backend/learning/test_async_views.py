@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model
+from users import presence
+from users.models import Rating
+from .models import LearningRequestPost, SystemConfig
+
+User = get_user_model()
+
+def payload(response):
+    # DRF responses carry .data; the async views return plain JSON
+    return json.loads(response.content)
+
+@pytest.mark.django_db
+class TestAsyncReadViews:
+    def make_posts(self):
+        teacher = User.objects.create_user(email='as1@e.com', password='pw', name='Teacher')
+        other = User.objects.create_user(email='as2@e.com', password='pw')
+        for i, topic in enumerate(['Python', 'Python web', 'Chess', 'Go']):
+            LearningRequestPost.objects.create(creator=teacher if i % 2 else other, topic_to_learn=topic, learning_only_flag=i == 3)
+        Rating.objects.create(reviewer=other, reviewee=teacher, score=5)
+        presence.heartbeat(other.pk)
+        return teacher, other
+
+    @pytest.mark.parametrize('params', [{}, {'page_size': 2}, {'page': 2, 'page_size': 2}])
+    def test_public_feed_matches_sync_view(self, params):
+        self.make_posts()
+        config = SystemConfig.load(cached=False)
+        config.bounty_mode_active = True
+        config.save()
+        client = APIClient()
+
+        sync = client.get(reverse('post-list-public'), params)
+        async_ = client.get(reverse('post-list-public-async'), params)
+        assert async_.status_code == status.HTTP_200_OK
+        expected = payload(sync)
+        if isinstance(expected, dict):
+            # Absolute pagination links point at each view's own URL
+            expected['next'] = expected['next'] and expected['next'].replace('/posts/public/', '/async/posts/public/')
+            expected['previous'] = expected['previous'] and expected['previous'].replace('/posts/public/', '/async/posts/public/')
+        assert payload(async_) == expected
+
+    @pytest.mark.parametrize('params', [{}, {'q': 'Python'}, {'page_size': 3}])
+    def test_discovery_matches_sync_view(self, params):
+        self.make_posts()
+        client = APIClient()
+
+        sync = payload(client.get(reverse('discovery'), params))
+        async_ = payload(client.get(reverse('discovery-async'), params))
+        if isinstance(sync, dict):
+            assert [p['id'] for p in async_['results']] == [p['id'] for p in sync['results']]
+            assert (async_['next'] is None) == (sync['next'] is None)
+        else:
+            assert async_ == sync
+
+    def test_discovery_cursor_pages_through_everything(self):
+        self.make_posts()
+        client = APIClient()
+        seen, url, params = [], reverse('discovery-async'), {'page_size': 3}
+        while url:
+            data = payload(client.get(url, params))
+            seen += [post['id'] for post in data['results']]
+            url, params = data['next'], {}
+        assert sorted(seen) == sorted(LearningRequestPost.objects.values_list('id', flat=True))
+
+    def test_conditional_get(self):
+        self.make_posts()
+        client = APIClient()
+        url = reverse('post-list-public-async')
+
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        LearningRequestPost.objects.update(status='Cancelled')
+        LearningRequestPost.objects.first().save() # signals bump the feed generation
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_profile_matches_sync_view_and_hides_wallet(self):
+        teacher, other = self.make_posts()
+        client = APIClient()
+
+        anonymous = payload(client.get(reverse('user-profile-async', args=[teacher.pk])))
+        assert anonymous == payload(client.get(reverse('user-profile', args=[teacher.pk])))
+        assert 'wallet' not in anonymous and len(anonymous['posts']) == 2
+
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(teacher)}')
+        own = payload(client.get(reverse('user-profile-async', args=[teacher.pk])))
+        assert own['wallet']['balance'] == teacher.wallet.balance
+        assert own == payload(client.get(reverse('user-profile', args=[teacher.pk])))
+
+    def test_profile_errors(self):
+        client = APIClient()
+        assert client.get(reverse('user-profile-async', args=[999])).status_code == status.HTTP_404_NOT_FOUND
+
+        client.credentials(HTTP_AUTHORIZATION='Bearer garbage')
+        response = client.get(reverse('discovery-async'))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -89,3 +89,18 @@ class TestBountyMode:
         # Should be purely by timestamp (Newest first)
         assert response.data[0]['topic_to_learn'] == 'New Standard'
         assert response.data[1]['topic_to_learn'] == 'Old Learning'
+
+    def test_config_is_cached_and_invalidated_on_toggle(self, django_assert_num_queries):
+        admin = User.objects.create_superuser(email='admin2@example.com', password='pw')
+        assert SystemConfig.load().bounty_mode_active is False
+
+        # Warm cache: loading the config costs no query
+        with django_assert_num_queries(0):
+            assert SystemConfig.load().bounty_mode_active is False
+
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        response = client.post(reverse('bounty-mode-toggle'), {'active': True}, format='json')
+        assert response.data['bounty_mode_active'] is True
+
+        assert SystemConfig.load().bounty_mode_active is True
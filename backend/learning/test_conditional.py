@@ -0,0 +1,134 @@
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from .models import LearningRequestPost, SystemConfig
+from users.models import Rating
+from . import feed_cache
+
+User = get_user_model()
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def revalidate(self, client, url, etag, **params):
+        return client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_public_feed_not_modified_until_posts_or_bounty_change(self):
+        user = User.objects.create_user(email='c1@e.com', password='pw')
+        post = LearningRequestPost.objects.create(creator=user, topic_to_learn='A')
+        client = APIClient()
+        url = reverse('post-list-public')
+
+        response = client.get(url)
+        etag = response['ETag']
+        assert self.revalidate(client, url, etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        post.status = 'Cancelled'
+        post.save()
+        response = self.revalidate(client, url, etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == []
+
+        etag = response['ETag']
+        config = SystemConfig.load(cached=False)
+        config.bounty_mode_active = True
+        config.save()
+        assert self.revalidate(client, url, etag).status_code == status.HTTP_200_OK
+
+    def test_public_feed_etag_changes_on_delete(self):
+        user = User.objects.create_user(email='c4@e.com', password='pw')
+        older = LearningRequestPost.objects.create(creator=user, topic_to_learn='Old')
+        LearningRequestPost.objects.create(creator=user, topic_to_learn='New')
+        client = APIClient()
+        url = reverse('post-list-public')
+        etag = client.get(url)['ETag']
+
+        # Max(updated_at) is unchanged, the feed generation is not
+        older.delete()
+        response = self.revalidate(client, url, etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert [p['topic_to_learn'] for p in response.data] == ['New']
+
+    def test_discovery_etag_covers_query_and_ratings(self):
+        user = User.objects.create_user(email='c2@e.com', password='pw')
+        other = User.objects.create_user(email='c3@e.com', password='pw')
+        LearningRequestPost.objects.create(creator=user, topic_to_learn='Python')
+        client = APIClient()
+        url = reverse('discovery')
+
+        etag = client.get(url, {'q': 'Python'})['ETag']
+        assert self.revalidate(client, url, etag, q='Python').status_code == status.HTTP_304_NOT_MODIFIED
+        assert self.revalidate(client, url, etag, q='Py').status_code == status.HTTP_200_OK
+
+        rating = Rating.objects.create(reviewer=other, reviewee=user, score=4)
+        assert self.revalidate(client, url, etag, q='Python').status_code == status.HTTP_200_OK
+
+        etag = client.get(url, {'q': 'Python'})['ETag']
+        rating.delete()
+        assert self.revalidate(client, url, etag, q='Python').status_code == status.HTTP_200_OK
+
+    def test_discovery_stamp_does_not_read_ratings(self, django_assert_max_num_queries):
+        client = APIClient()
+        etag = client.get(reverse('discovery'))['ETag']
+        with django_assert_max_num_queries(5) as captured:
+            response = self.revalidate(client, reverse('discovery'), etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not any('users_rating' in q['sql'] for q in captured.captured_queries)
+
+@pytest.mark.django_db
+class TestPublicFeedCache:
+    def test_pages_cached_until_posts_change(self, django_assert_num_queries):
+        user = User.objects.create_user(email='f1@e.com', password='pw')
+        for i in range(3):
+            LearningRequestPost.objects.create(creator=user, topic_to_learn=f'T{i}')
+        client = APIClient()
+        url = reverse('post-list-public')
+
+        first = client.get(url, {'page': 1, 'page_size': 2})
+        assert [p['topic_to_learn'] for p in first.data['results']] == ['T2', 'T1']
+
+        # Warm: only the ETag's version stamp hits the database, an index lookup of Max(updated_at)
+        with django_assert_num_queries(1) as captured:
+            response = client.get(url, {'page': 1, 'page_size': 2})
+        assert response.data == first.data
+        assert 'COUNT' not in captured.captured_queries[0]['sql'].upper()
+
+        # Parameters the page does not depend on share its entry
+        with django_assert_num_queries(1):
+            client.get(url, {'page': 1, 'page_size': 2, 'utm_source': 'mail'}, HTTP_HOST='testserver:8000')
+
+        # Other pages are cached separately
+        assert [p['topic_to_learn'] for p in client.get(url, {'page': 2, 'page_size': 2}).data['results']] == ['T0']
+
+        client.force_authenticate(user=user)
+        client.post(reverse('post-create'), {'topic_to_learn': 'Fresh'})
+        client.force_authenticate(user=None)
+        response = client.get(url, {'page': 1, 'page_size': 2})
+        assert response.data['results'][0]['topic_to_learn'] == 'Fresh'
+        assert response.data['count'] == 4
+
+    def test_bounty_toggle_invalidates(self):
+        user = User.objects.create_user(email='f2@e.com', password='pw')
+        LearningRequestPost.objects.create(creator=user, topic_to_learn='Bounty', learning_only_flag=True)
+        LearningRequestPost.objects.create(creator=user, topic_to_learn='Newer')
+        client = APIClient()
+        url = reverse('post-list-public')
+        assert client.get(url).data[0]['topic_to_learn'] == 'Newer'
+
+        admin = User.objects.create_superuser(email='f3@e.com', password='pw')
+        client.force_authenticate(user=admin)
+        client.post(reverse('bounty-mode-toggle'), {'active': True}, format='json')
+        client.force_authenticate(user=None)
+        assert client.get(url).data[0]['topic_to_learn'] == 'Bounty'
+
+    def test_generation_survives_a_cleared_page_cache(self, settings):
+        feed_cache.get_generation()
+        feed_cache.invalidate_feed()
+        generation = feed_cache.get_generation()
+        assert generation > 1
+
+        # Evicting pages must not reset the generation, or pages of an old generation would come back
+        caches[settings.FEED_CACHE_ALIAS].clear()
+        assert feed_cache.get_generation() == generation
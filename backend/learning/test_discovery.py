@@ -3,10 +3,9 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
-from django.utils import timezone
-from datetime import timedelta
 from .models import LearningRequestPost, SystemConfig
 from users.models import Rating
+from users import presence
 
 User = get_user_model()
 
@@ -22,9 +21,8 @@ class TestDiscovery:
         # u1: Rating 5.0 -> Score += 10. Total 20 base.
         Rating.objects.create(reviewer=u2, reviewee=u1, score=5)
         
-        # u2: Online (last_login now). -> Score += 3. Total 13 base.
-        u2.last_login = timezone.now()
-        u2.save()
+        # u2: Online (presence heartbeat). -> Score += 3. Total 13 base.
+        presence.heartbeat(u2.pk)
         
         # u3: Nothing special yet. Total 10 base.
         
@@ -63,3 +61,99 @@ class TestDiscovery:
         assert response.data[0]['id'] == p1.id
         assert response.data[1]['id'] == p3.id # Jumped over p2
         assert response.data[2]['id'] == p2.id
+
+    def test_discovery_cursor_pagination(self):
+        users = [User.objects.create_user(email=f'p{i}@e.com', password='pw') for i in range(5)]
+        # Rating i+1 for creator i -> distinct scores, highest rated first
+        for i, u in enumerate(users):
+            Rating.objects.create(reviewer=users[0], reviewee=u, score=i + 1)
+        posts = [LearningRequestPost.objects.create(creator=u, topic_to_learn=f'Go {i}', status='Active') for i, u in enumerate(users)]
+        expected = [p.id for p in reversed(posts)]
+
+        client = APIClient()
+        url = reverse('discovery')
+
+        response = client.get(url, {'q': 'Go', 'page_size': 2})
+        assert response.status_code == status.HTTP_200_OK
+        seen = [p['id'] for p in response.data['results']]
+        next_url = response.data['next']
+        while next_url:
+            response = client.get(next_url)
+            seen += [p['id'] for p in response.data['results']]
+            next_url = response.data['next']
+
+        assert seen == expected
+
+    def test_search_boosts_at_most_the_online_cap(self, settings):
+        settings.DISCOVERY_MAX_ONLINE_IDS = 1
+        u1 = User.objects.create_user(email='o1@e.com', password='pw')
+        u2 = User.objects.create_user(email='o2@e.com', password='pw')
+        p1 = LearningRequestPost.objects.create(creator=u1, topic_to_learn='Elixir', status='Active')
+        p2 = LearningRequestPost.objects.create(creator=u2, topic_to_learn='Elixir', status='Active')
+        presence.heartbeat(u2.pk)
+        presence.heartbeat(u1.pk) # the latest heartbeat fills the cap
+
+        response = APIClient().get(reverse('discovery'), {'q': 'Elixir'})
+        assert [p['id'] for p in response.data] == [p1.id, p2.id]
+
+    def test_discovery_query_count_is_constant(self, django_assert_max_num_queries):
+        users = [User.objects.create_user(email=f'n{i}@e.com', password='pw') for i in range(10)]
+        for u in users:
+            Rating.objects.create(reviewer=users[0], reviewee=u, score=4)
+            LearningRequestPost.objects.create(creator=u, topic_to_learn='Rust', status='Active')
+
+        SystemConfig.load()
+
+        client = APIClient()
+        # version stamp (posts) + the scored page; presence needs no query
+        with django_assert_max_num_queries(3):
+            response = client.get(reverse('discovery'), {'q': 'Rust'})
+        assert len(response.data) == 10
+
+@pytest.mark.django_db
+class TestDiscoveryBrowse:
+    def make_posts(self, count):
+        users = [User.objects.create_user(email=f'b{i}@e.com', password='pw') for i in range(count)]
+        # Rating i+1 for creator i -> static scores 2, 4, 6, ...
+        for i, u in enumerate(users):
+            Rating.objects.create(reviewer=users[0], reviewee=u, score=min(i + 1, 5))
+        return users, [LearningRequestPost.objects.create(creator=u, topic_to_learn=f'B {i}') for i, u in enumerate(users)]
+
+    def walk(self, client, url, page_size):
+        data = client.get(url, {'page_size': page_size}).json()
+        seen = [p['id'] for p in data['results']]
+        while data['next']:
+            data = client.get(data['next']).json()
+            seen += [p['id'] for p in data['results']]
+        return seen
+
+    @pytest.mark.parametrize('url_name', ['discovery', 'discovery-async'])
+    def test_online_boost_only_within_the_candidate_window(self, settings, url_name):
+        settings.DISCOVERY_CANDIDATE_WINDOW = 3
+        users, posts = self.make_posts(5)
+        # Static scores: posts[4] 10, posts[3] 8, posts[2] 6 | posts[1] 4, posts[0] 2
+        presence.heartbeat(users[2].pk) # 6 + 3 = 9: passes posts[3]
+        presence.heartbeat(users[0].pk) # outside the window: no boost
+        client = APIClient()
+        url = reverse(url_name)
+
+        expected = [posts[i].id for i in (4, 2, 3, 1, 0)]
+        assert [p['id'] for p in client.get(url).json()] == expected
+        # Cursors work across the window's edge
+        assert self.walk(client, url, 2) == expected
+
+    def test_reads_the_rank_index_in_order(self):
+        from .views import DiscoveryScoring
+        plan = DiscoveryScoring().browse_candidates()[:200].explain()
+        assert 'learning_postrank_order' in plan
+        assert 'TEMP B-TREE' not in plan
+
+    def test_browse_query_count(self, settings, django_assert_max_num_queries):
+        settings.DISCOVERY_CANDIDATE_WINDOW = 3
+        self.make_posts(6)
+        SystemConfig.load()
+        client = APIClient()
+        # version stamp (posts) + the window + the rest after it
+        with django_assert_max_num_queries(4):
+            response = client.get(reverse('discovery'), {'page_size': 5})
+        assert len(response.data['results']) == 5
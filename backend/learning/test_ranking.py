@@ -0,0 +1,43 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from .models import LearningRequestPost, PostRank, SystemConfig
+from users.models import Rating
+
+User = get_user_model()
+
+@pytest.mark.django_db
+class TestPostRank:
+    def test_rank_follows_posts_ratings_and_bounty_mode(self):
+        creator = User.objects.create_user(email='k1@e.com', password='pw')
+        reviewer = User.objects.create_user(email='k2@e.com', password='pw')
+        post = LearningRequestPost.objects.create(creator=creator, topic_to_learn='Go', learning_only_flag=True)
+        assert PostRank.objects.get(post=post).static_score == 0
+
+        Rating.objects.create(reviewer=reviewer, reviewee=creator, score=4)
+        Rating.objects.create(reviewer=reviewer, reviewee=creator, score=5)
+        rank = PostRank.objects.get(post=post)
+        assert rank.rating_score == 9.0 # avg 4.5 * 2
+
+        config = SystemConfig.load(cached=False)
+        config.bounty_mode_active = True
+        config.save()
+        rank.refresh_from_db()
+        assert (rank.bounty_score, rank.static_score) == (5.0, 14.0)
+
+        post.status = 'Completed'
+        post.save()
+        assert not PostRank.objects.filter(post=post).exists()
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        creator = User.objects.create_user(email='k3@e.com', password='pw')
+        reviewer = User.objects.create_user(email='k4@e.com', password='pw')
+        for i in range(3):
+            LearningRequestPost.objects.create(creator=creator, topic_to_learn=f'T{i}', learning_only_flag=bool(i % 2))
+        Rating.objects.create(reviewer=reviewer, reviewee=creator, score=3)
+        expected = list(PostRank.objects.order_by('pk').values_list('post_id', 'static_score'))
+
+        PostRank.objects.update(static_score=-1)
+        call_command('rebuild_post_ranks', stdout=StringIO())
+        assert list(PostRank.objects.order_by('pk').values_list('post_id', 'static_score')) == expected
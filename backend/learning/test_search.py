@@ -0,0 +1,47 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from .models import LearningRequestPost
+from .search import get_search_backend, SQLiteFTSBackend
+
+User = get_user_model()
+
+@pytest.mark.django_db
+class TestTopicSearch:
+    def search_ids(self, query):
+        qs = LearningRequestPost.objects.filter(status='Active')
+        return set(get_search_backend().search(qs, query).values_list('id', flat=True))
+
+    def test_backend_uses_index_on_sqlite(self):
+        assert isinstance(get_search_backend(), SQLiteFTSBackend)
+
+    def test_index_follows_create_and_status_change(self):
+        user = User.objects.create_user(email='s@e.com', password='pw')
+        post = LearningRequestPost.objects.create(creator=user, topic_to_learn='Linear Algebra', topic_to_teach='Guitar')
+
+        # Prefix matching for as-you-type queries, on both topics
+        assert self.search_ids('alg') == {post.id}
+        assert self.search_ids('guit') == {post.id}
+        assert self.search_ids('linear alg') == {post.id}
+        assert self.search_ids('linear guitar piano') == set()
+
+        post.status = 'Completed'
+        post.save()
+        assert self.search_ids('algebra') == set()
+
+        post.delete()
+        assert self.search_ids('algebra') == set()
+
+    def test_relevance_ranks_better_matches_first(self):
+        user = User.objects.create_user(email='s2@e.com', password='pw')
+        # Created first, so only relevance can put it ahead of the newer post
+        strong = LearningRequestPost.objects.create(creator=user, topic_to_learn='Chess', topic_to_teach='Chess')
+        weak = LearningRequestPost.objects.create(
+            creator=user, topic_to_learn='Intro to cooking for busy people', topic_to_teach='Chess openings and endgames'
+        )
+        LearningRequestPost.objects.create(creator=user, topic_to_learn='Painting')
+
+        client = APIClient()
+        response = client.get(reverse('discovery'), {'q': 'chess'})
+        assert [p['id'] for p in response.data] == [strong.id, weak.id]
@@ -1,5 +1,8 @@
 from django.urls import path
-from .views import PostCreateView, PublicPostListView, UserPostListView, PostUpdateView, BountyModeView, DiscoveryView
+from .views import (
+    PostCreateView, PublicPostListView, UserPostListView, PostUpdateView, BountyModeView, DiscoveryView,
+    AsyncPublicPostListView, AsyncDiscoveryView,
+)
 
 urlpatterns = [
     path('posts/create/', PostCreateView.as_view(), name='post-create'),
@@ -8,4 +11,7 @@ urlpatterns = [
     path('posts/me/', UserPostListView.as_view(), name='post-list-me'),
     path('posts/<int:pk>/status/', PostUpdateView.as_view(), name='post-update-status'),
     path('admin/bounty-mode/', BountyModeView.as_view(), name='bounty-mode-toggle'),
+    # Async (ASGI-native) read path, see config.async_views
+    path('async/posts/public/', AsyncPublicPostListView.as_view(), name='post-list-public-async'),
+    path('async/discovery/', AsyncDiscoveryView.as_view(), name='discovery-async'),
 ]
@@ -1,44 +1,89 @@
+import time
 from rest_framework import generics, permissions, exceptions, views
 from rest_framework.response import Response
-from django.db.models import Q, Avg
-from django.utils import timezone
-from datetime import timedelta
-from .models import LearningRequestPost, SystemConfig
+from django.db.models import Q, F, Max, Case, When, Value, FloatField, ExpressionWrapper
+from django.db.models.functions import Coalesce
+from django.conf import settings
+from config.async_views import AsyncAPIView
+from config.conditional import ConditionalGetMixin
+from users import presence
+from .models import LearningRequestPost, PostRank, SystemConfig
 from .serializers import LearningRequestPostSerializer, PostStatusUpdateSerializer
+from .pagination import ScoreCursorPagination, OptionalPageNumberPagination
+from . import feed_cache
+from .search import get_search_backend, aget_search_backend
 
 class PostCreateView(generics.CreateAPIView):
     queryset = LearningRequestPost.objects.all()
     serializer_class = LearningRequestPostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 11
+    throttle_scope = 'write'
 
     def perform_create(self, serializer):
         serializer.save(creator=self.request.user)
 
-class PublicPostListView(generics.ListAPIView):
+def posts_version_stamp(queryset):
+    # Any save bumps Max(updated_at), read from its index; deletions (and bounty toggles)
+    # bump the feed generation (learning.feed_cache). Nothing has to count rows.
+    return queryset.aggregate(latest=Max('updated_at'))['latest'], feed_cache.get_generation()
+
+async def aposts_version_stamp(queryset):
+    return (await queryset.aaggregate(latest=Max('updated_at')))['latest'], await feed_cache.aget_generation()
+
+def public_posts(bounty_mode_active):
+    queryset = LearningRequestPost.objects.filter(status='Active').select_related('creator')
+
+    if bounty_mode_active:
+         # Prioritize learning_only_flag (True first), then timestamp
+         return queryset.order_by('-learning_only_flag', '-timestamp')
+    return queryset.order_by('-timestamp')
+
+class PublicPostListView(ConditionalGetMixin, generics.ListAPIView):
+    # Same for every visitor: pages are served from learning.feed_cache.
+    # Stays on the primary: a page rendered from a lagging replica would be cached
+    # under the new feed generation and outlive the change for FEED_CACHE_TIMEOUT.
     serializer_class = LearningRequestPostSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = OptionalPageNumberPagination
+    query_budget = 3
 
     def get_queryset(self):
-        config = SystemConfig.load()
-        queryset = LearningRequestPost.objects.filter(status='Active')
-        
-        if config.bounty_mode_active:
-             # Prioritize learning_only_flag (True first), then timestamp
-             return queryset.order_by('-learning_only_flag', '-timestamp')
-        return queryset.order_by('-timestamp')
-
-class UserPostListView(generics.ListAPIView):
+        return public_posts(SystemConfig.load().bounty_mode_active)
+
+    def get_version_stamp(self, request):
+        return (SystemConfig.load().bounty_mode_active, *posts_version_stamp(LearningRequestPost.objects.all()))
+
+    def list(self, request, *args, **kwargs):
+        key = feed_cache.page_key(feed_cache.get_generation(), SystemConfig.load().bounty_mode_active, request)
+        data = feed_cache.get_page(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        feed_cache.set_page(key, response.data)
+        return response
+
+class UserPostListView(ConditionalGetMixin, generics.ListAPIView):
     serializer_class = LearningRequestPostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 3
 
     def get_queryset(self):
         # Requirement: Completed posts are never retrievable again
-        return LearningRequestPost.objects.filter(creator=self.request.user).exclude(status='Completed').order_by('-timestamp')
+        return (
+            LearningRequestPost.objects.filter(creator=self.request.user).exclude(status='Completed')
+            .select_related('creator').order_by('-timestamp')
+        )
+
+    def get_version_stamp(self, request):
+        return (request.user.pk, *posts_version_stamp(LearningRequestPost.objects.filter(creator=request.user)))
 
 class PostUpdateView(generics.UpdateAPIView):
     queryset = LearningRequestPost.objects.all()
     serializer_class = PostStatusUpdateSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 5
 
     def get_queryset(self):
         return LearningRequestPost.objects.filter(creator=self.request.user)
@@ -49,13 +94,15 @@ class PostUpdateView(generics.UpdateAPIView):
 
 class BountyModeView(views.APIView):
     permission_classes = [permissions.IsAdminUser]
+    query_budget = 4
 
     def get(self, request):
         config = SystemConfig.load()
         return Response({'bounty_mode_active': config.bounty_mode_active})
 
     def post(self, request):
-        config = SystemConfig.load()
+        # Fresh row, never the shared cached instance we are about to change
+        config = SystemConfig.load(cached=False)
         # Toggle or set based on input? Requirement says "toggle". Let's assume toggle or set.
         # Let's support explicit set for robustness
         active = request.data.get('active', None)
@@ -67,78 +114,195 @@ class BountyModeView(views.APIView):
         config.save()
         return Response({'bounty_mode_active': config.bounty_mode_active})
 
-class DiscoveryView(generics.ListAPIView):
+class DiscoveryScoring:
+    # Shared by DiscoveryView and AsyncDiscoveryView; only the database calls differ.
+    RELEVANCE_POINTS = 10
+    ONLINE_POINTS = 3
+
+    def discovery_stamp(self, bounty_mode_active, posts_stamp, ratings_generation):
+        return (
+            bounty_mode_active,
+            *posts_stamp,
+            # Bumped on every rating_stats_changed (learning.signals), no Rating rows are read
+            ratings_generation,
+            # Online status is time based: responses may be reused for at most a minute
+            int(time.time() // 60),
+        )
+
+    def active_posts(self):
+        return LearningRequestPost.objects.filter(status='Active').select_related('creator')
+
+    def annotate_score(self, qs, online_ids=None):
+        """Score search results (annotated with search_rank) in the database."""
+        # 1. Topic Relevance: search_rank in [0, 1] from the search index
+        relevance = F('search_rank') * float(self.RELEVANCE_POINTS)
+
+        # 2. Bounty Mode + 4. Ratings: precomputed in PostRank (learning.ranking)
+        static = Coalesce(F('rank__static_score'), Value(0.0))
+
+        # 3. Online Availability from users.presence, the only time-dependent part:
+        # scored against at most DISCOVERY_MAX_ONLINE_IDS users online (the latest heartbeats),
+        # which bounds both the roster read and the IN list; anyone past the cap gets no boost
+        if online_ids is None:
+            online_ids = presence.online_user_ids(limit=settings.DISCOVERY_MAX_ONLINE_IDS)
+        if online_ids:
+            online = Case(
+                When(creator_id__in=online_ids, then=Value(float(self.ONLINE_POINTS))),
+                default=Value(0.0),
+            )
+        else:
+            online = Value(0.0)
+
+        return qs.annotate(
+            score=ExpressionWrapper(relevance + static + online, output_field=FloatField())
+        ).order_by('-score', '-id')
+
+    # Browsing (no query) walks PostRank in learning_postrank_order index order instead of
+    # scoring every Active post. Relevance is the same for every post there, so it is left
+    # out. Only the top DISCOVERY_CANDIDATE_WINDOW posts by static score can get the online
+    # boost; the posts after them follow in static order, all below the window's lowest score.
+
+    def browse_candidates(self):
+        return PostRank.objects.select_related('post__creator').order_by('-static_score', '-post')
+
+    def browse_rest(self, window, position):
+        """The PostRanks after the (full) window and after `position`, in index order."""
+        last = window[-1]
+        qs = self.browse_candidates().filter(
+            Q(static_score__lt=last.static_score) | Q(static_score=last.static_score, post_id__lt=last.post_id)
+        )
+        if position is not None:
+            score, pk = position
+            qs = qs.filter(Q(static_score__lt=score) | Q(static_score=score, post_id__lt=pk))
+        return qs
+
+    def window_creators(self, window):
+        return {rank.post.creator_id for rank in window}
+
+    def rank_window(self, window, online_ids, position):
+        """The window's posts, boosted and sorted by ('-score', '-id'), after `position`."""
+        posts = sorted(
+            (self.scored_post(rank, online_ids) for rank in window), key=lambda post: (post.score, post.id), reverse=True
+        )
+        if position is not None:
+            posts = [post for post in posts if (post.score, post.id) < position]
+        return posts
+
+    def scored_post(self, rank, online_ids=()):
+        post = rank.post
+        post.score = rank.static_score + (float(self.ONLINE_POINTS) if post.creator_id in online_ids else 0.0)
+        return post
+
+    def rest_needed(self, window, posts, limit):
+        return len(window) == settings.DISCOVERY_CANDIDATE_WINDOW and (limit is None or len(posts) < limit)
+
+class DiscoveryView(DiscoveryScoring, ConditionalGetMixin, generics.ListAPIView):
     # Discovery API: "Profile discovery logic"
     # Returns posts ranked by relevance, bounty, availability, rating.
+    # Search results are scored in the database; browsing walks the PostRank index
+    # (DiscoveryScoring.browse). Pages never load the full result set.
     serializer_class = LearningRequestPostSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ScoreCursorPagination
+    query_budget = 5
+    use_replica = True
+    throttle_scope = 'search'
+
+    def get_version_stamp(self, request):
+        return self.discovery_stamp(
+            SystemConfig.load().bounty_mode_active,
+            posts_version_stamp(LearningRequestPost.objects.all()),
+            feed_cache.get_generation(feed_cache.RATINGS_GENERATION_KEY),
+        )
 
     def get_queryset(self):
-        query = self.request.query_params.get('q', '')
-        mode = self.request.query_params.get('mode', 'learn') # 'learn' or 'teach' logic?
-        # Requirement says "Discovery logic". Usually means searching for something.
-        # Default: search all active posts.
-        
-        qs = LearningRequestPost.objects.filter(status='Active')
-        
-        if query:
-            qs = qs.filter(Q(topic_to_learn__icontains=query) | Q(topic_to_teach__icontains=query))
-            
-        return qs
+        # Searching; browsing is served by list() straight from PostRank
+        qs = get_search_backend().search(self.active_posts(), self.request.query_params['q'])
+        return self.annotate_score(qs)
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        
-        # In-memory scoring (since Rating is in another app and specialized logic is complex for ORM)
-        # Note: Ideally this is done via Annotation for pagination. For MVP, Python sort is fine for <1000 items.
-        
-        config = SystemConfig.load()
-        bounty_active = config.bounty_mode_active
-        now = timezone.now()
-        
-        scored_posts = []
-        
-        # Pre-fetch ratings to avoid N+1? 
-        # Ideally user.avg_rating should be annotated. 
-        # But let's iterate.
-        
-        for post in queryset:
-            score = 0
-            
-            # 1. Topic Relevance (Already filtered, but could boost exact match)
-            # Implied 10 pts for being in the list via filter.
-            score += 10 
-            
-            # 2. Bounty Mode
-            if bounty_active and post.learning_only_flag:
-                score += 5
-            
-            # 3. Online Availability (Proxy: last_login within 10 mins)
-            creator = post.creator
-            if creator.last_login and (now - creator.last_login) < timedelta(minutes=10):
-                score += 3
-            
-            # 4. Ratings
-            # Calculate avg rating
-            # We can use the related_name 'reviews_received' from User model
-            ratings = creator.reviews_received.all()
-            if ratings:
-                avg = sum(r.score for r in ratings) / len(ratings)
-                score += (avg * 2) # Max 10 pts
-            
-            scored_posts.append((score, post))
-            
-        # Sort descending
-        scored_posts.sort(key=lambda x: x[0], reverse=True)
-        
-        posts = [x[1] for x in scored_posts]
-        
-        # Pagination
-        page = self.paginate_queryset(posts)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        if request.query_params.get('q', ''):
+            return super().list(request, *args, **kwargs)
+
+        paginator = self.paginator
+        if not paginator.start(request):
+            return Response(self.get_serializer(self.browse(), many=True).data)
+        page = paginator.set_page(self.browse(paginator.position, paginator.page_size + 1))
+        return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    def browse(self, position=None, limit=None):
+        """Up to `limit` browse results after `position` (all of them with no limit)."""
+        window = list(self.browse_candidates()[:settings.DISCOVERY_CANDIDATE_WINDOW])
+        # Only the window's creators can be boosted, so only they are looked up
+        posts = self.rank_window(window, presence.is_online(self.window_creators(window)), position)
+        if self.rest_needed(window, posts, limit):
+            rest = self.browse_rest(window, position)
+            posts += [self.scored_post(rank) for rank in (rest if limit is None else rest[:limit - len(posts)])]
+        return posts[:limit]
+
+# Async (ASGI-native) twins of the hot public reads, mounted under async/.
+# Same payloads, ETags and caches as the DRF views above, but the database is awaited
+# through the async ORM instead of holding a worker thread (config.async_views).
+
+class AsyncPublicPostListView(AsyncAPIView):
+    query_budget = 3
+
+    async def get_version_stamp(self, request):
+        return ((await SystemConfig.aload()).bounty_mode_active, *await aposts_version_stamp(LearningRequestPost.objects.all()))
+
+    async def get_data(self, request):
+        bounty_mode_active = (await SystemConfig.aload()).bounty_mode_active
+        key = feed_cache.page_key(await feed_cache.aget_generation(), bounty_mode_active, request)
+        data = await feed_cache.aget_page(key)
+        if data is not None:
+            return data
+
+        queryset = public_posts(bounty_mode_active)
+        paginator = OptionalPageNumberPagination()
+        page = await paginator.apaginate_queryset(queryset, request)
+        if page is None:
+            data = LearningRequestPostSerializer([post async for post in queryset], many=True).data
+        else:
+            data = paginator.get_paginated_response(LearningRequestPostSerializer(page, many=True).data).data
+        await feed_cache.aset_page(key, data)
+        return data
+
+class AsyncDiscoveryView(DiscoveryScoring, AsyncAPIView):
+    query_budget = 5
+    use_replica = True
+    throttle_scope = 'search'
+
+    async def get_version_stamp(self, request):
+        return self.discovery_stamp(
+            (await SystemConfig.aload()).bounty_mode_active,
+            await aposts_version_stamp(LearningRequestPost.objects.all()),
+            await feed_cache.aget_generation(feed_cache.RATINGS_GENERATION_KEY),
+        )
+
+    async def get_data(self, request):
+        query = request.query_params.get('q', '')
+        paginator = ScoreCursorPagination()
+
+        if not query:
+            if not paginator.start(request):
+                return LearningRequestPostSerializer(await self.abrowse(), many=True).data
+            page = paginator.set_page(await self.abrowse(paginator.position, paginator.page_size + 1))
+            return paginator.get_paginated_response(LearningRequestPostSerializer(page, many=True).data).data
+
+        qs = (await aget_search_backend()).search(self.active_posts(), query)
+        qs = self.annotate_score(
+            qs, online_ids=await presence.aonline_user_ids(limit=settings.DISCOVERY_MAX_ONLINE_IDS)
+        )
+
+        page = await paginator.apaginate_queryset(qs, request)
+        if page is None:
+            return LearningRequestPostSerializer([post async for post in qs], many=True).data
+        return paginator.get_paginated_response(LearningRequestPostSerializer(page, many=True).data).data
 
+    async def abrowse(self, position=None, limit=None):
+        window = [rank async for rank in self.browse_candidates()[:settings.DISCOVERY_CANDIDATE_WINDOW]]
+        posts = self.rank_window(window, await presence.ais_online(self.window_creators(window)), position)
+        if self.rest_needed(window, posts, limit):
+            rest = self.browse_rest(window, position)
+            posts += [self.scored_post(rank) async for rank in (rest if limit is None else rest[:limit - len(posts)])]
+        return posts[:limit]
@@ -0,0 +1,87 @@
+"""
+JWT authentication with the user served from a short-lived cache.
+
+JWTAuthentication loads the User on every request, and most views then load
+request.user.wallet as well. CachedJWTAuthentication keeps the user, with its
+wallet attached, under the token's user id for AUTH_USER_CACHE_TTL seconds.
+
+Entries are dropped whenever the user or the wallet changes: users.signals
+on save/delete of either row and on rating stat updates, and
+economy.services.transfer for balance updates (which bypass save()).
+Bulk updates that send no signal are covered by the TTL only. Every process
+needs to see the invalidations, so with several processes
+AUTH_USER_CACHE_ALIAS must name a shared cache.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+CACHE_KEY = 'auth:user:{}'
+
+
+def get_user_cache():
+    return caches[settings.AUTH_USER_CACHE_ALIAS]
+
+
+def forget_users(user_ids):
+    keys = [CACHE_KEY.format(pk) for pk in user_ids]
+    if not keys:
+        return
+    get_user_cache().delete_many(keys)
+    # Requests inside this transaction's window may have re-cached the old rows
+    transaction.on_commit(lambda: get_user_cache().delete_many(keys))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        key = CACHE_KEY.format(self.get_user_id(validated_token))
+        user = get_user_cache().get(key)
+        if user is None:
+            user = self.load_user(validated_token)
+            get_user_cache().set(key, user, settings.AUTH_USER_CACHE_TTL)
+        return self.check_user(user, validated_token)
+
+    async def aget_user(self, validated_token):
+        key = CACHE_KEY.format(self.get_user_id(validated_token))
+        user = await get_user_cache().aget(key)
+        if user is None:
+            user = await self.aload_user(validated_token)
+            await get_user_cache().aset(key, user, settings.AUTH_USER_CACHE_TTL)
+        return self.check_user(user, validated_token)
+
+    def user_queryset(self):
+        # Always from the primary: a row read from a lagging replica would be cached for
+        # every later request, and could miss a deactivation or a password change
+        return self.user_model.objects.using(DEFAULT_DB_ALIAS).select_related('wallet')
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+    def load_user(self, validated_token):
+        try:
+            return self.user_queryset().get(**{api_settings.USER_ID_FIELD: self.get_user_id(validated_token)})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+    async def aload_user(self, validated_token):
+        try:
+            return await self.user_queryset().aget(**{api_settings.USER_ID_FIELD: self.get_user_id(validated_token)})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+    def check_user(self, user, validated_token):
+        # The checks of JWTAuthentication.get_user, also applied to cached users
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return user
@@ -0,0 +1,60 @@
+import csv
+import sys
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from users.onboarding import onboard_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create users with their wallets and INITIAL_GRANT ledger rows from a CSV file "
+        "with an email column and optional name and password columns."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="Path to the CSV file, or - for stdin.")
+        parser.add_argument('--grant', type=int, help="Starting credits (default: settings.INITIAL_GRANT).")
+        parser.add_argument('--chunk-size', type=int, help="Users per transaction (default: settings.ONBOARDING_CHUNK_SIZE).")
+        parser.add_argument('--workers', type=int, help="Password hashing processes (default: settings.ONBOARDING_HASH_WORKERS).")
+
+    def handle(self, *args, **options):
+        if options['csv_file'] == '-':
+            people = self.read(sys.stdin)
+        else:
+            try:
+                with open(options['csv_file'], newline='', encoding='utf-8') as fh:
+                    people = self.read(fh)
+            except OSError as e:
+                raise CommandError(e)
+
+        workers = settings.ONBOARDING_HASH_WORKERS if options['workers'] is None else options['workers']
+        started = time.perf_counter()
+        result = onboard_users(people, grant=options['grant'], chunk_size=options['chunk_size'], workers=workers)
+        elapsed = time.perf_counter() - started
+
+        for email in result.skipped:
+            self.stdout.write(f"SKIPPED {email}: already registered or repeated")
+        for email in result.failed:
+            self.stdout.write(f"FAILED {email}: its chunk conflicted with concurrent signups, run the import again")
+        summary = (
+            f"Created {len(result.created)} user(s), skipped {len(result.skipped)}, "
+            f"failed {len(result.failed)}, in {elapsed:.1f}s."
+        )
+        self.stdout.write(self.style.WARNING(summary) if result.failed else self.style.SUCCESS(summary))
+
+    def read(self, fh):
+        reader = csv.DictReader(fh)
+        if 'email' not in (reader.fieldnames or ()):
+            raise CommandError("The CSV file needs an 'email' column.")
+        people = []
+        for line, row in enumerate(reader, start=2):
+            try:
+                validate_email(row['email'])
+            except ValidationError:
+                raise CommandError(f"Line {line}: invalid email {row['email']!r}.")
+            people.append({key: row[key] for key in ('email', 'name', 'password') if row.get(key)})
+        return people
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from learning.feed_cache import invalidate_ratings
+from learning.ranking import rebuild_post_ranks
+from users.models import User, Rating
+
+
+class Command(BaseCommand):
+    help = "Recompute User.rating_count / rating_sum from the Rating table, then the PostRank scores built on them."
+
+    def handle(self, *args, **options):
+        per_user = Rating.objects.filter(reviewee=OuterRef('pk')).values('reviewee')
+        count = per_user.annotate(c=Count('id')).values('c')
+        total = per_user.annotate(s=Sum('score')).values('s')
+
+        with transaction.atomic():
+            updated = User.objects.update(
+                rating_count=Coalesce(Subquery(count), Value(0)),
+                rating_sum=Coalesce(Subquery(total), Value(0)),
+            )
+            # A bulk UPDATE sends no rating_stats_changed, so the rating scores are rebuilt here
+            ranked = rebuild_post_ranks()
+            invalidate_ratings()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating stats for {updated} users and ranked {ranked} posts."))
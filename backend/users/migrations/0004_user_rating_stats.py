@@ -0,0 +1,31 @@
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_rating_stats(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Rating = apps.get_model('users', 'Rating')
+    stats = Rating.objects.values('reviewee').annotate(count=Count('id'), total=Sum('score'))
+    for row in stats:
+        User.objects.filter(pk=row['reviewee']).update(rating_count=row['count'], rating_sum=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_rating_stats, migrations.RunPython.noop),
+    ]
@@ -20,6 +20,9 @@ class User(AbstractUser):
     username = None
     email = models.EmailField('email address', unique=True)
     name = models.CharField(max_length=255)
+    # Denormalized from Rating, maintained by users.signals (rebuild_rating_stats to repair)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
@@ -29,6 +32,12 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
 
+    @property
+    def avg_rating(self):
+        if not self.rating_count:
+            return 0
+        return self.rating_sum / self.rating_count
+
 class Wallet(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='wallet')
     balance = models.IntegerField(default=0)
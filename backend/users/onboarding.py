@@ -0,0 +1,128 @@
+"""
+Bulk user onboarding for cohort imports.
+
+Signing up goes through create_user() and the create_user_wallet signal: one
+password hash and two INSERTs per user, and no ledger row for the starting
+credits. onboard_users() instead
+
+- skips emails that are already registered (or repeated in the input),
+- hashes the passwords, optionally in a process pool (the hashers are CPU bound
+  by design; only `manage.py onboard_users` uses one, never a web request),
+- bulk_creates the users, their wallets and one INITIAL_GRANT CreditTransaction
+  per wallet, chunk by chunk, each chunk in its own transaction. Every new
+  wallet's balance equals its ledger. A chunk that collides with a concurrent
+  signup is retried without the emails registered meanwhile.
+
+bulk_create sends no post_save, so none of the per-user signals run.
+"""
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.db import IntegrityError, transaction
+from economy.models import CreditTransaction
+from .models import User, Wallet
+
+# Passwords per task sent to a hashing process
+HASH_BATCH_SIZE = 20
+
+
+@dataclass
+class OnboardingResult:
+    created: list = field(default_factory=list) # User instances
+    skipped: list = field(default_factory=list) # emails already registered or repeated
+    failed: list = field(default_factory=list) # emails of chunks that could not be inserted
+
+
+def _init_hash_worker(settings_module):
+    # Spawned workers (Windows, macOS) start without the parent's environment tweaks
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+
+
+def _hash_batch(passwords):
+    # make_password(None) draws its random suffix one character at a time; token_hex is far
+    # cheaper and the suffix only has to make the hash unique, it is never checked
+    return [
+        make_password(password) if password else UNUSABLE_PASSWORD_PREFIX + secrets.token_hex(20)
+        for password in passwords
+    ]
+
+
+def hash_passwords(passwords, workers=1):
+    """make_password() for each password (None gives an unusable one), spread over `workers` processes."""
+    batches = [passwords[i:i + HASH_BATCH_SIZE] for i in range(0, len(passwords), HASH_BATCH_SIZE)]
+    if workers <= 1 or len(batches) <= 1:
+        return _hash_batch(passwords)
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(batches)),
+        initializer=_init_hash_worker,
+        initargs=(settings.SETTINGS_MODULE,),
+    ) as pool:
+        return [hashed for batch in pool.map(_hash_batch, batches) for hashed in batch]
+
+
+def onboard_users(people, grant=None, chunk_size=None, workers=1):
+    """
+    Create users from `people`, dicts with 'email' and optionally 'name' and 'password'
+    (no password: an unusable one, e.g. for invite-by-reset flows). Each gets a wallet
+    holding `grant` credits (settings.INITIAL_GRANT by default) backed by an INITIAL_GRANT
+    ledger row. Passwords are hashed in this process unless `workers` > 1. Returns an
+    OnboardingResult; chunks already committed stay when a later one fails.
+    """
+    grant = settings.INITIAL_GRANT if grant is None else grant
+    chunk_size = chunk_size or settings.ONBOARDING_CHUNK_SIZE
+    result = OnboardingResult()
+
+    pending, seen = [], set()
+    for person in people:
+        email = User.objects.normalize_email(person['email'])
+        if email in seen:
+            result.skipped.append(email)
+            continue
+        seen.add(email)
+        pending.append({**person, 'email': email})
+
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    new = []
+    for chunk in chunks:
+        registered = set(User.objects.filter(email__in=[p['email'] for p in chunk]).values_list('email', flat=True))
+        result.skipped.extend(p['email'] for p in chunk if p['email'] in registered)
+        new.extend(p for p in chunk if p['email'] not in registered)
+
+    hashes = hash_passwords([person.get('password') or None for person in new], workers)
+
+    for start in range(0, len(new), chunk_size):
+        chunk = list(zip(new[start:start + chunk_size], hashes[start:start + chunk_size]))
+        try:
+            result.created.extend(_create_chunk(chunk, grant))
+        except IntegrityError:
+            # Someone signed up with one of these emails since we checked: skip them and retry once
+            emails = [person['email'] for person, _ in chunk]
+            registered = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+            result.skipped.extend(email for email in emails if email in registered)
+            chunk = [(person, hashed) for person, hashed in chunk if person['email'] not in registered]
+            try:
+                result.created.extend(_create_chunk(chunk, grant))
+            except IntegrityError:
+                result.failed.extend(person['email'] for person, _ in chunk)
+
+    return result
+
+
+@transaction.atomic
+def _create_chunk(chunk, grant):
+    """Insert (person, password hash) pairs with their wallets and grant rows; returns the users."""
+    users = User.objects.bulk_create([
+        User(email=person['email'], name=person.get('name', ''), password=hashed) for person, hashed in chunk
+    ])
+    wallets = Wallet.objects.bulk_create([Wallet(user=user, balance=grant) for user in users])
+    if grant:
+        CreditTransaction.objects.bulk_create([
+            CreditTransaction(wallet=wallet, amount=grant, transaction_type='INITIAL_GRANT', description='Initial grant')
+            for wallet in wallets
+        ])
+    return users
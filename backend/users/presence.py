@@ -0,0 +1,165 @@
+"""
+Presence ("is this user online?") tracked from heartbeats, not last_login.
+
+A heartbeat marks a user online for settings.PRESENCE_TTL seconds. Reads are
+batched: `is_online(user_ids)` answers for a whole page of users at once, and
+`online_user_ids()` returns everybody online, a set far smaller than the users
+behind a large query; `online_user_ids(limit=n)` stops after n of them, preferring
+the latest heartbeats, so its cost does not grow with the number of users online.
+The backend is chosen with settings.PRESENCE_BACKEND:
+
+- LocalPresenceBackend: in-process dict + expiry heap (single process / tests)
+- CachePresenceBackend: Django cache keys with a TTL, shared between processes
+"""
+import heapq
+import threading
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+class LocalPresenceBackend:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expires = {}
+        self._heap = [] # (expires_at, user_id); stale entries are skipped on expiry
+
+    def heartbeat(self, user_id, now=None):
+        now = time.monotonic() if now is None else now
+        expires_at = now + settings.PRESENCE_TTL
+        with self._lock:
+            self._expires[user_id] = expires_at
+            heapq.heappush(self._heap, (expires_at, user_id))
+            self._expire(now)
+
+    def is_online(self, user_ids, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            return {user_id for user_id in user_ids if user_id in self._expires}
+
+    async def ais_online(self, user_ids, now=None):
+        # Memory only, nothing to wait for
+        return self.is_online(user_ids, now)
+
+    def online_user_ids(self, now=None, limit=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            # Newest users first; a repeated heartbeat keeps its user's place
+            return set(islice(reversed(self._expires), limit))
+
+    async def aonline_user_ids(self, now=None, limit=None):
+        return self.online_user_ids(now, limit)
+
+    def _expire(self, now):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires_at, user_id = heapq.heappop(heap)
+            if self._expires.get(user_id) == expires_at:
+                del self._expires[user_id]
+
+
+class CachePresenceBackend:
+    # Besides one key per online user, heartbeats list each user once per roster
+    # window of PRESENCE_TTL seconds: a counter plus one slot key per listed user,
+    # appended with add/incr only so concurrent heartbeats lose nothing. Every live
+    # heartbeat falls in the current or the previous window. Listings are read newest
+    # first, so a limit skips the oldest slots instead of reading them.
+    key_prefix = 'presence:'
+
+    def __init__(self):
+        self.cache = caches[settings.PRESENCE_CACHE_ALIAS]
+
+    def heartbeat(self, user_id, now=None):
+        now = time.time() if now is None else now
+        self.cache.set(f'{self.key_prefix}{user_id}', 1, settings.PRESENCE_TTL)
+
+        window, timeout = self._window(now), 2 * settings.PRESENCE_TTL
+        if self.cache.add(f'{self.key_prefix}listed:{window}:{user_id}', 1, timeout):
+            roster = f'{self.key_prefix}roster:{window}'
+            self.cache.add(roster, 0, timeout)
+            slot = self.cache.incr(roster)
+            self.cache.set(f'{roster}:{slot}', user_id, timeout)
+
+    def is_online(self, user_ids, now=None):
+        keys = {f'{self.key_prefix}{user_id}': user_id for user_id in user_ids}
+        return {keys[key] for key in self.cache.get_many(list(keys))}
+
+    async def ais_online(self, user_ids, now=None):
+        keys = {f'{self.key_prefix}{user_id}': user_id for user_id in user_ids}
+        return {keys[key] for key in await self.cache.aget_many(list(keys))}
+
+    def online_user_ids(self, now=None, limit=None):
+        rosters = self._rosters(now)
+        counts = self.cache.get_many(rosters)
+        listed = self.cache.get_many(self._slots(rosters, counts, limit))
+        return self.is_online(set(listed.values()))
+
+    async def aonline_user_ids(self, now=None, limit=None):
+        rosters = self._rosters(now)
+        counts = await self.cache.aget_many(rosters)
+        listed = await self.cache.aget_many(self._slots(rosters, counts, limit))
+        return await self.ais_online(set(listed.values()))
+
+    def _window(self, now):
+        return int(now // settings.PRESENCE_TTL)
+
+    def _rosters(self, now):
+        window = self._window(time.time() if now is None else now)
+        return [f'{self.key_prefix}roster:{w}' for w in (window, window - 1)]
+
+    def _slots(self, rosters, counts, limit=None):
+        # Newest window and slot first; a user listed in both windows takes two slots
+        slots = (f'{roster}:{slot}' for roster in rosters for slot in range(counts.get(roster, 0), 0, -1))
+        return list(islice(slots, limit))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_presence_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.PRESENCE_BACKEND)()
+    return _backend
+
+
+def reset_presence_backend():
+    # Drops the backend instance (and with it all local presence state)
+    global _backend
+    _backend = None
+
+
+def heartbeat(user_id):
+    get_presence_backend().heartbeat(user_id)
+
+
+def is_online(user_ids):
+    """Return the subset of `user_ids` that is currently online."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return set()
+    return get_presence_backend().is_online(user_ids)
+
+
+async def ais_online(user_ids):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return set()
+    return await get_presence_backend().ais_online(user_ids)
+
+
+def online_user_ids(limit=None):
+    """Return the ids of the users currently online, at most `limit` of them if given."""
+    return get_presence_backend().online_user_ids(limit=limit)
+
+
+async def aonline_user_ids(limit=None):
+    return await get_presence_backend().aonline_user_ids(limit=limit)
@@ -1,5 +1,7 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from learning.models import LearningRequestPost
 from .models import Wallet, Rating
 
 User = get_user_model()
@@ -28,10 +30,41 @@ class UserSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(**validated_data)
         return user
 
+class OnboardUserSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    name = serializers.CharField(max_length=255, required=False, allow_blank=True)
+    # Optional: without one the account gets an unusable password (invite / reset flow)
+    password = serializers.CharField(required=False, write_only=True)
+
+class OnboardingSerializer(serializers.Serializer):
+    users = OnboardUserSerializer(many=True, allow_empty=False)
+    grant = serializers.IntegerField(required=False, min_value=0)
+
+    def validate_users(self, users):
+        if len(users) > settings.ONBOARDING_API_MAX_USERS:
+            raise serializers.ValidationError(
+                f"At most {settings.ONBOARDING_API_MAX_USERS} users per request; use `manage.py onboard_users` for larger imports."
+            )
+        # Every password costs a deliberately slow hash inside this request
+        if sum(1 for user in users if user.get('password')) > settings.ONBOARDING_API_MAX_PASSWORDS:
+            raise serializers.ValidationError(
+                f"At most {settings.ONBOARDING_API_MAX_PASSWORDS} users with a password per request; leave passwords "
+                "out (users set theirs through a reset link) or use `manage.py onboard_users`."
+            )
+        return users
+
+class ProfilePostSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LearningRequestPost
+        fields = ('id', 'topic_to_learn', 'topic_to_teach', 'learning_only_flag', 'status', 'timestamp')
+
 class UserProfileSerializer(serializers.ModelSerializer):
+    # Only the latest items are embedded; full lists live at users/<pk>/posts/ and users/<pk>/reviews/
+    EMBED_LIMIT = 5
+
     wallet = WalletSerializer(read_only=True)
     avg_rating = serializers.SerializerMethodField()
-    reviews = RatingSerializer(source='reviews_received', many=True, read_only=True)
+    reviews = serializers.SerializerMethodField()
     posts = serializers.SerializerMethodField()
     
     class Meta:
@@ -39,24 +72,24 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ('id', 'email', 'name', 'wallet', 'avg_rating', 'reviews', 'posts')
 
     def get_avg_rating(self, obj):
-        ratings = obj.reviews_received.all()
-        if not ratings:
-            return 0
-        return sum(r.score for r in ratings) / len(ratings)
+        return obj.avg_rating
+
+    @classmethod
+    def embedded_reviews(cls, user):
+        return Rating.objects.filter(reviewee=user).select_related('reviewer').order_by('-timestamp', '-id')[:cls.EMBED_LIMIT]
+
+    @classmethod
+    def embedded_posts(cls, user):
+        return LearningRequestPost.objects.filter(creator=user).order_by('-timestamp', '-id')[:cls.EMBED_LIMIT]
+
+    # Async views fetch the embeds up front and pass the rows in the context
+    def get_reviews(self, obj):
+        reviews = self.context.get('reviews', self.embedded_reviews(obj))
+        return RatingSerializer(reviews, many=True).data
 
     def get_posts(self, obj):
-        # "All learning request posts"
-        # Inline serialization to avoid circular import
-        from learning.models import LearningRequestPost
-        posts = LearningRequestPost.objects.filter(creator=obj).order_by('-timestamp')
-        return [{
-            'id': p.id,
-            'topic_to_learn': p.topic_to_learn,
-            'topic_to_teach': p.topic_to_teach,
-            'learning_only_flag': p.learning_only_flag,
-            'status': p.status,
-            'timestamp': p.timestamp
-        } for p in posts]
+        posts = self.context.get('posts', self.embedded_posts(obj))
+        return ProfilePostSerializer(posts, many=True).data
 
     def to_representation(self, instance):
         # Custom logic to hide wallet if not self
@@ -1,8 +1,46 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from .models import User, Wallet
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+from .authentication import forget_users
+from .models import User, Wallet, Rating
+
+# Sent after a user's rating_count / rating_sum changed. Kwargs: user_id
+rating_stats_changed = Signal()
 
 @receiver(post_save, sender=User)
 def create_user_wallet(sender, instance, created, **kwargs):
     if created:
-        Wallet.objects.create(user=instance, balance=50)
+        Wallet.objects.create(user=instance, balance=settings.INITIAL_GRANT)
+
+@receiver(post_save, sender=Rating)
+def add_rating_to_stats(sender, instance, created, **kwargs):
+    # Ratings are immutable once created, so only new rows change the aggregates.
+    if created:
+        User.objects.filter(pk=instance.reviewee_id).update(
+            rating_count=F('rating_count') + 1,
+            rating_sum=F('rating_sum') + instance.score,
+        )
+        rating_stats_changed.send(sender=User, user_id=instance.reviewee_id)
+
+@receiver(post_delete, sender=Rating)
+def remove_rating_from_stats(sender, instance, **kwargs):
+    User.objects.filter(pk=instance.reviewee_id, rating_count__gt=0).update(
+        rating_count=F('rating_count') - 1,
+        rating_sum=F('rating_sum') - instance.score,
+    )
+    rating_stats_changed.send(sender=User, user_id=instance.reviewee_id)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_users([instance.pk])
+
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+def forget_cached_wallet_owner(sender, instance, **kwargs):
+    forget_users([instance.user_id])
+
+@receiver(rating_stats_changed)
+def forget_rated_user(sender, user_id, **kwargs):
+    forget_users([user_id])
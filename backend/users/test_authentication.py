@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from economy.services import donate_to_bank, get_bank_wallet
+from .models import Rating, User, Wallet
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+def user_queries(captured):
+    return [q['sql'] for q in captured if 'FROM "users_user"' in q['sql'] or 'FROM "users_wallet"' in q['sql']]
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    def test_second_request_does_not_load_user_or_wallet(self):
+        user = User.objects.create_user(email='cached@e.com', password='pw')
+        client = client_for(user)
+        client.get(reverse('support-eligibility'))
+
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(reverse('support-eligibility'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert user_queries(captured) == []
+
+    def test_user_save_invalidates(self):
+        user = User.objects.create_user(email='renamed@e.com', password='pw', name='Before')
+        client = client_for(user)
+        assert client.get(reverse('my-profile')).data['name'] == 'Before'
+
+        user.name = 'After'
+        user.save()
+
+        assert client.get(reverse('my-profile')).data['name'] == 'After'
+
+    def test_deactivated_user_is_rejected(self):
+        user = User.objects.create_user(email='leaving@e.com', password='pw')
+        client = client_for(user)
+        assert client.get(reverse('my-profile')).status_code == status.HTTP_200_OK
+
+        user.is_active = False
+        user.save()
+
+        assert client.get(reverse('my-profile')).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_balance_update_invalidates(self):
+        user = User.objects.create_user(email='donor@e.com', password='pw')
+        get_bank_wallet()
+        client = client_for(user)
+        before = client.get(reverse('my-profile')).data['wallet']['balance']
+
+        # transfer() moves balances with UPDATE, no post_save
+        donate_to_bank(Wallet.objects.get(user=user), 5)
+
+        assert client.get(reverse('my-profile')).data['wallet']['balance'] == before - 5
+
+    def test_wallet_save_invalidates(self):
+        user = User.objects.create_user(email='edited@e.com', password='pw')
+        client = client_for(user)
+        client.get(reverse('my-profile'))
+
+        Wallet.objects.filter(user=user).update(balance=7)
+        Wallet.objects.get(user=user).save()
+
+        assert client.get(reverse('my-profile')).data['wallet']['balance'] == 7
+
+    def test_rating_stats_update_invalidates(self):
+        user = User.objects.create_user(email='rated@e.com', password='pw')
+        reviewer = User.objects.create_user(email='reviewer@e.com', password='pw')
+        client = client_for(user)
+        assert client.get(reverse('my-profile')).data['avg_rating'] == 0
+
+        Rating.objects.create(reviewer=reviewer, reviewee=user, score=4)
+
+        assert client.get(reverse('my-profile')).data['avg_rating'] == 4
+
+    def test_async_views_share_the_cache(self):
+        user = User.objects.create_user(email='async.cached@e.com', password='pw')
+        client = client_for(user)
+        url = reverse('user-profile-async', kwargs={'pk': user.pk})
+        client.get(url)
+
+        user.name = 'Renamed'
+        user.save()
+
+        assert client.get(url).json()['name'] == 'Renamed'
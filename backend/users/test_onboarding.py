@@ -0,0 +1,165 @@
+import pytest
+from io import StringIO
+from django.contrib.auth.hashers import check_password, is_password_usable
+from django.core.management import call_command, CommandError
+from django.db import IntegrityError
+from django.db.models import Sum
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from config.testing import assert_query_budget
+from economy.models import CreditTransaction
+from .models import User, Wallet
+from . import onboarding
+from .onboarding import HASH_BATCH_SIZE, hash_passwords, onboard_users
+
+@pytest.fixture(autouse=True)
+def fast_hasher(settings):
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+def cohort(size, prefix='learner'):
+    return [{'email': f'{prefix}{i}@school.example', 'name': f'Learner {i}', 'password': f'secret{i}'} for i in range(size)]
+
+@pytest.mark.django_db
+class TestOnboardUsers:
+    def test_creates_users_wallets_and_grants(self, settings):
+        result = onboard_users(cohort(5), chunk_size=2, workers=1)
+
+        assert len(result.created) == 5
+        user = User.objects.get(email='learner3@school.example')
+        assert user.name == 'Learner 3'
+        assert user.check_password('secret3')
+        assert user.wallet.balance == settings.INITIAL_GRANT
+        grant = CreditTransaction.objects.get(wallet=user.wallet)
+        assert (grant.transaction_type, grant.amount) == ('INITIAL_GRANT', settings.INITIAL_GRANT)
+
+    def test_wallet_balances_match_the_ledger(self):
+        onboard_users(cohort(4), grant=12, workers=1)
+
+        wallets = Wallet.objects.filter(user__email__startswith='learner').annotate(ledger=Sum('transactions__amount'))
+        assert [(w.balance, w.ledger) for w in wallets] == [(12, 12)] * 4
+
+    def test_skips_registered_and_repeated_emails(self):
+        User.objects.create_user(email='learner0@school.example', password='pw')
+        people = cohort(3) + [{'email': 'learner1@SCHOOL.example'}]
+
+        result = onboard_users(people, workers=1)
+
+        assert [user.email for user in result.created] == ['learner1@school.example', 'learner2@school.example']
+        assert result.skipped == ['learner1@school.example', 'learner0@school.example']
+        assert User.objects.filter(email__startswith='learner').count() == 3
+
+    def test_missing_password_is_unusable(self):
+        result = onboard_users([{'email': 'invited@school.example'}], workers=1)
+        assert not result.created[0].has_usable_password()
+
+    def test_zero_grant_writes_no_ledger_rows(self):
+        onboard_users(cohort(2), grant=0, workers=1)
+        assert CreditTransaction.objects.count() == 0
+        assert Wallet.objects.filter(user__email__startswith='learner', balance=0).count() == 2
+
+    def test_concurrent_signup_is_skipped_not_fatal(self, monkeypatch):
+        real_hash_passwords = onboarding.hash_passwords
+
+        def hash_while_someone_signs_up(passwords, workers):
+            # Registers after the email check, before the chunk is inserted
+            User.objects.create_user(email='learner1@school.example', password='mine')
+            return real_hash_passwords(passwords, workers)
+
+        monkeypatch.setattr(onboarding, 'hash_passwords', hash_while_someone_signs_up)
+        result = onboard_users(cohort(3), chunk_size=2)
+
+        assert [user.email for user in result.created] == ['learner0@school.example', 'learner2@school.example']
+        assert (result.skipped, result.failed) == (['learner1@school.example'], [])
+        assert User.objects.get(email='learner1@school.example').check_password('mine')
+
+    def test_chunk_that_keeps_failing_is_reported(self, monkeypatch):
+        real_create_chunk = onboarding._create_chunk
+
+        def create_chunk(chunk, grant):
+            if chunk[0][0]['email'] == 'learner2@school.example':
+                raise IntegrityError('conflict')
+            return real_create_chunk(chunk, grant)
+
+        monkeypatch.setattr(onboarding, '_create_chunk', create_chunk)
+        result = onboard_users(cohort(4), chunk_size=2)
+
+        # The first chunk is committed, the failing one is reported
+        assert [user.email for user in result.created] == ['learner0@school.example', 'learner1@school.example']
+        assert result.failed == ['learner2@school.example', 'learner3@school.example']
+
+    def test_is_a_few_queries_not_a_few_per_user(self, django_assert_max_num_queries):
+        with django_assert_max_num_queries(12):
+            onboard_users(cohort(200), workers=1)
+        assert User.objects.filter(email__startswith='learner').count() == 200
+
+class TestHashPasswords:
+    def test_process_pool_matches_in_process_hashing(self, settings):
+        passwords = [f'pw{i}' for i in range(HASH_BATCH_SIZE * 2 + 1)] + [None]
+        hashes = hash_passwords(passwords, workers=2)
+
+        assert len(hashes) == len(passwords)
+        assert all(check_password(p, h) for p, h in zip(passwords[:-1], hashes))
+        assert not is_password_usable(hashes[-1])
+
+@pytest.mark.django_db
+class TestOnboardCommand:
+    def test_imports_csv(self, tmp_path):
+        path = tmp_path / 'cohort.csv'
+        path.write_text('email,name,password\na@school.example,A,pw1\nb@school.example,B,\n')
+        out = StringIO()
+
+        call_command('onboard_users', str(path), '--workers', '1', '--grant', '20', stdout=out)
+
+        assert "Created 2 user(s), skipped 0, failed 0" in out.getvalue()
+        assert User.objects.get(email='a@school.example').check_password('pw1')
+        assert not User.objects.get(email='b@school.example').has_usable_password()
+        assert Wallet.objects.get(user__email='b@school.example').balance == 20
+
+    def test_rejects_invalid_email(self, tmp_path):
+        path = tmp_path / 'cohort.csv'
+        path.write_text('email,name\nnot-an-email,A\n')
+        with pytest.raises(CommandError, match='Line 2'):
+            call_command('onboard_users', str(path), stdout=StringIO())
+
+@pytest.mark.django_db
+class TestOnboardAPI:
+    def client(self, is_staff=True):
+        admin = User.objects.create_user(email='staff@school.example', password='pw', is_staff=is_staff)
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        return client
+
+    def test_staff_onboards_a_cohort(self, settings, monkeypatch):
+        settings.ONBOARDING_HASH_WORKERS = 4
+        # Hashing stays in the request's process
+        monkeypatch.setattr(onboarding, 'ProcessPoolExecutor', None)
+        people = cohort(settings.ONBOARDING_API_MAX_USERS)
+        # Invite flow for most of the cohort: only a few passwords to hash
+        for person in people[settings.ONBOARDING_API_MAX_PASSWORDS:]:
+            del person['password']
+        response = self.client().post(reverse('bulk-onboard'), {'users': people}, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.data['created']) == settings.ONBOARDING_API_MAX_USERS
+        assert response.data['skipped'] == response.data['failed'] == []
+        assert_query_budget(response)
+        assert User.objects.get(email='learner0@school.example').check_password('secret0')
+        assert not User.objects.get(email=people[-1]['email']).has_usable_password()
+
+    def test_non_staff_is_forbidden(self):
+        response = self.client(is_staff=False).post(reverse('bulk-onboard'), {'users': cohort(1)}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_request_size_is_capped(self, settings):
+        settings.ONBOARDING_API_MAX_USERS = 2
+        response = self.client().post(reverse('bulk-onboard'), {'users': cohort(3)}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert User.objects.filter(email__startswith='learner').count() == 0
+
+    def test_passwords_per_request_are_capped(self, settings):
+        settings.ONBOARDING_API_MAX_PASSWORDS = 2
+        response = self.client().post(reverse('bulk-onboard'), {'users': cohort(3)}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'onboard_users' in str(response.data['users'])
+        assert User.objects.filter(email__startswith='learner').count() == 0
@@ -0,0 +1,82 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from .presence import LocalPresenceBackend, CachePresenceBackend, is_online
+
+User = get_user_model()
+
+class TestPresenceBackends:
+    def test_local_backend_expires_heartbeats(self, settings):
+        settings.PRESENCE_TTL = 60
+        backend = LocalPresenceBackend()
+        backend.heartbeat(1, now=0)
+        backend.heartbeat(2, now=30)
+        assert backend.is_online({1, 2, 3}, now=59) == {1, 2}
+        assert backend.is_online({1, 2, 3}, now=61) == {2}
+
+        # A newer heartbeat outlives the older heap entry
+        backend.heartbeat(2, now=80)
+        assert backend.is_online({2}, now=100) == {2}
+        assert backend.is_online({2}, now=141) == set()
+
+    def test_cache_backend_batch_lookup(self, settings):
+        settings.PRESENCE_TTL = 60
+        backend = CachePresenceBackend()
+        backend.heartbeat(7)
+        backend.heartbeat(9)
+        assert backend.is_online({7, 8, 9}) == {7, 9}
+
+    def test_local_backend_lists_online_users(self, settings):
+        settings.PRESENCE_TTL = 60
+        backend = LocalPresenceBackend()
+        backend.heartbeat(1, now=0)
+        backend.heartbeat(2, now=30)
+        assert backend.online_user_ids(now=61) == {2}
+
+    def test_cache_backend_lists_online_users(self, settings):
+        settings.PRESENCE_TTL = 60
+        backend = CachePresenceBackend()
+        # Heartbeats in two roster windows, one of them repeated
+        backend.heartbeat(7, now=110)
+        backend.heartbeat(8, now=130)
+        backend.heartbeat(8, now=140)
+        assert backend.online_user_ids(now=150) == {7, 8}
+
+        # Listed but expired: the presence key decides
+        backend.cache.delete(f'{backend.key_prefix}7')
+        assert backend.online_user_ids(now=150) == {8}
+        # Windows older than the previous one are not read
+        assert backend.online_user_ids(now=250) == set()
+
+    def test_local_backend_limits_online_users_to_the_newest(self, settings):
+        settings.PRESENCE_TTL = 60
+        backend = LocalPresenceBackend()
+        for user_id in (1, 2, 3):
+            backend.heartbeat(user_id, now=user_id)
+        assert backend.online_user_ids(now=10, limit=2) == {2, 3}
+
+    def test_cache_backend_reads_only_the_newest_slots(self, settings):
+        settings.PRESENCE_TTL = 60
+        backend = CachePresenceBackend()
+        backend.heartbeat(7, now=110)
+        backend.heartbeat(8, now=130)
+        backend.heartbeat(9, now=140)
+        assert backend.online_user_ids(now=150, limit=2) == {8, 9}
+        # Listed in both windows, 9 takes both slots of the limit
+        backend.heartbeat(9, now=180)
+        assert backend.online_user_ids(now=190, limit=2) == {9}
+
+@pytest.mark.django_db
+class TestHeartbeatEndpoint:
+    def test_heartbeat_marks_user_online(self):
+        user = User.objects.create_user(email='hb@e.com', password='pw')
+        client = APIClient()
+        url = reverse('presence-heartbeat')
+        assert client.post(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+        client.force_authenticate(user=user)
+        assert is_online([user.pk]) == set()
+        assert client.post(url).status_code == status.HTTP_204_NO_CONTENT
+        assert is_online([user.pk]) == {user.pk}
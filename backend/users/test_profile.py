@@ -1,10 +1,12 @@
 import pytest
+from io import StringIO
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 from .models import Rating
-from learning.models import LearningRequestPost
+from learning.models import LearningRequestPost, PostRank
 
 User = get_user_model()
 
@@ -72,3 +74,74 @@ class TestProfileAndReputation:
         
         assert len(response.data['posts']) == 1
         assert response.data['posts'][0]['topic_to_learn'] == 'Python'
+
+    def test_rating_stats_maintained_and_rebuilt(self):
+        reviewer = User.objects.create_user(email='r3@e.com', password='pw')
+        reviewee = User.objects.create_user(email='r4@e.com', password='pw')
+
+        Rating.objects.create(reviewer=reviewer, reviewee=reviewee, score=4)
+        second = Rating.objects.create(reviewer=reviewer, reviewee=reviewee, score=2)
+        reviewee.refresh_from_db()
+        assert (reviewee.rating_count, reviewee.rating_sum) == (2, 6)
+        assert reviewee.avg_rating == 3.0
+
+        second.delete()
+        reviewee.refresh_from_db()
+        assert (reviewee.rating_count, reviewee.rating_sum) == (1, 4)
+
+        # Drift is repaired from the raw table, and so are the discovery scores built on it
+        post = LearningRequestPost.objects.create(creator=reviewee, topic_to_learn='Rated')
+        User.objects.filter(pk=reviewee.pk).update(rating_count=7, rating_sum=1)
+        PostRank.objects.filter(post=post).update(rating_score=0, static_score=0)
+        call_command('rebuild_rating_stats', stdout=StringIO())
+        reviewee.refresh_from_db()
+        assert (reviewee.rating_count, reviewee.rating_sum) == (1, 4)
+        assert PostRank.objects.get(post=post).rating_score == 8.0
+
+    def test_profile_embeds_latest_items_with_full_lists_paginated(self, django_assert_max_num_queries):
+        user = User.objects.create_user(email='busy@e.com', password='pw')
+        reviewers = [User.objects.create_user(email=f'rv{i}@e.com', password='pw', name=f'R{i}') for i in range(8)]
+        for i, reviewer in enumerate(reviewers):
+            Rating.objects.create(reviewer=reviewer, reviewee=user, score=5, comment=f'c{i}')
+            LearningRequestPost.objects.create(creator=user, topic_to_learn=f'T{i}')
+
+        client = APIClient()
+        url = reverse('user-profile', kwargs={'pk': user.pk})
+        # user+wallet, posts stamp, reviews with reviewers, posts: independent of the number of items
+        with django_assert_max_num_queries(4):
+            response = client.get(url)
+        assert [r['comment'] for r in response.data['reviews']] == ['c7', 'c6', 'c5', 'c4', 'c3']
+        assert response.data['reviews'][0]['reviewer_name'] == 'R7'
+        assert [p['topic_to_learn'] for p in response.data['posts']] == ['T7', 'T6', 'T5', 'T4', 'T3']
+
+        for name, key in (('user-posts', 'topic_to_learn'), ('user-reviews', 'comment')):
+            response = client.get(reverse(name, kwargs={'pk': user.pk}), {'page_size': 3})
+            items = [item[key] for item in response.data['results']]
+            next_url = response.data['next']
+            while next_url:
+                response = client.get(next_url)
+                items += [item[key] for item in response.data['results']]
+                next_url = response.data['next']
+            assert len(items) == 8
+            assert items[0].endswith('7') and items[-1].endswith('0')
+
+    def test_profile_conditional_get(self):
+        user = User.objects.create_user(email='etag@e.com', password='pw')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = reverse('my-profile')
+
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        user.wallet.balance += 1
+        user.wallet.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+        # Other viewers get a different representation (no wallet), hence a different tag
+        viewer = User.objects.create_user(email='viewer@e.com', password='pw')
+        client.force_authenticate(user=viewer)
+        other_url = reverse('user-profile', kwargs={'pk': user.pk})
+        assert client.get(other_url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == status.HTTP_200_OK
@@ -1,12 +1,20 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import SignupView, MyProfileView, UserProfileView, RateUserView
+from .views import (
+    SignupView, LoginView, RefreshView, MyProfileView, UserProfileView, RateUserView, UserPostsView, UserReviewsView, PresenceHeartbeatView,
+    AsyncUserProfileView, BulkOnboardView,
+)
 
 urlpatterns = [
     path('signup/', SignupView.as_view(), name='signup'),
-    path('login/', TokenObtainPairView.as_view(), name='login'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('login/', LoginView.as_view(), name='login'),
+    path('token/refresh/', RefreshView.as_view(), name='token_refresh'),
     path('me/', MyProfileView.as_view(), name='my-profile'),
     path('<int:pk>/', UserProfileView.as_view(), name='user-profile'),
+    path('<int:pk>/posts/', UserPostsView.as_view(), name='user-posts'),
+    path('<int:pk>/reviews/', UserReviewsView.as_view(), name='user-reviews'),
     path('rate/', RateUserView.as_view(), name='rate-user'),
+    path('onboard/', BulkOnboardView.as_view(), name='bulk-onboard'),
+    path('presence/heartbeat/', PresenceHeartbeatView.as_view(), name='presence-heartbeat'),
+    # Async (ASGI-native) read path, see config.async_views
+    path('async/<int:pk>/', AsyncUserProfileView.as_view(), name='user-profile-async'),
 ]
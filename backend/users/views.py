@@ -1,10 +1,18 @@
-from rest_framework import generics, permissions, status
+from rest_framework import generics, permissions, status, exceptions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer, UserProfileSerializer, RatingSerializer
-from rest_framework_simplejwt.views import TokenObtainPairView
+from django.db import transaction
+from django.db.models import Count, Max
+from config.async_views import AsyncAPIView
+from config.conditional import ConditionalGetMixin
+from .serializers import UserSerializer, UserProfileSerializer, RatingSerializer, ProfilePostSerializer, OnboardingSerializer
+from .pagination import ProfileListPagination
+from learning.models import LearningRequestPost
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from .models import Rating
+from .onboarding import onboard_users
+from . import presence
 
 User = get_user_model()
 
@@ -12,24 +20,136 @@ class SignupView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 3
 
-class MyProfileView(generics.RetrieveAPIView):
+def profile_stamp(request, user, posts):
+    stamp = (user.pk, user.email, user.name, user.rating_count, user.rating_sum, posts['count'], posts['latest'])
+    if request.user == user:
+        # Wallet is only part of the payload for its owner
+        stamp += (user.wallet.balance, user.wallet.last_support_claim)
+    return stamp
+
+class BulkOnboardView(APIView):
+    # Cohort imports by staff, see users.onboarding (`manage.py onboard_users` for files)
+    permission_classes = [permissions.IsAdminUser]
+    # A full request on SQLite: the registered-email lookup and ~12 batched INSERTs
+    query_budget = 16
+
+    def post(self, request):
+        serializer = OnboardingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Passwords are hashed in this process, no worker pool inside a web request; the
+        # serializer caps them at ONBOARDING_API_MAX_PASSWORDS
+        result = onboard_users(serializer.validated_data['users'], grant=serializer.validated_data.get('grant'))
+        return Response({
+            'created': [{'id': user.pk, 'email': user.email} for user in result.created],
+            'skipped': result.skipped,
+            'failed': result.failed,
+        }, status=status.HTTP_201_CREATED)
+
+class LoginView(TokenObtainPairView):
+    query_budget = 1
+
+class RefreshView(TokenRefreshView):
+    query_budget = 1
+
+class ProfileVersionMixin(ConditionalGetMixin):
+    def get_version_stamp(self, request):
+        user = self.get_object()
+        posts = LearningRequestPost.objects.filter(creator=user).aggregate(count=Count('id'), latest=Max('updated_at'))
+        return profile_stamp(request, user, posts)
+
+class MyProfileView(ProfileVersionMixin, generics.RetrieveAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 5
 
     def get_object(self):
         return self.request.user
 
-class UserProfileView(generics.RetrieveAPIView):
-    queryset = User.objects.all()
+class UserProfileView(ProfileVersionMixin, generics.RetrieveAPIView):
+    queryset = User.objects.select_related('wallet')
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.AllowAny] # Profile is public? Let's say yes, but wallet hidden via serializer.
+    query_budget = 5
+    use_replica = True
+    throttle_scope = 'profile'
+
+    def get_object(self):
+        # Fetched once for both the version stamp and the response
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+class AsyncUserProfileView(AsyncAPIView):
+    # ASGI-native twin of UserProfileView: same payload and ETag, async ORM throughout
+    query_budget = 5
+    use_replica = True
+    throttle_scope = 'profile'
+
+    async def get_user(self, pk):
+        if not hasattr(self, '_user'):
+            try:
+                self._user = await User.objects.select_related('wallet').aget(pk=pk)
+            except User.DoesNotExist:
+                raise exceptions.NotFound()
+        return self._user
+
+    async def get_version_stamp(self, request):
+        user = await self.get_user(self.kwargs['pk'])
+        posts = await LearningRequestPost.objects.filter(creator=user).aaggregate(count=Count('id'), latest=Max('updated_at'))
+        return profile_stamp(request, user, posts)
+
+    async def get_data(self, request, pk):
+        user = await self.get_user(pk)
+        context = {
+            'request': request,
+            'reviews': [review async for review in UserProfileSerializer.embedded_reviews(user)],
+            'posts': [post async for post in UserProfileSerializer.embedded_posts(user)],
+        }
+        return UserProfileSerializer(user, context=context).data
 
 class RateUserView(generics.CreateAPIView):
     queryset = Rating.objects.all()
     serializer_class = RatingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 8
+    throttle_scope = 'write'
 
     def perform_create(self, serializer):
-        # Auto set reviewer
-        serializer.save(reviewer=self.request.user)
+        # Auto set reviewer. Rating row and reviewee stats (users.signals) commit together.
+        with transaction.atomic():
+            serializer.save(reviewer=self.request.user)
+
+class UserPostsView(generics.ListAPIView):
+    # Full post list behind the profile's embedded latest posts
+    serializer_class = ProfilePostSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = ProfileListPagination
+    query_budget = 2
+    use_replica = True
+    throttle_scope = 'profile'
+
+    def get_queryset(self):
+        return LearningRequestPost.objects.filter(creator_id=self.kwargs['pk'])
+
+class UserReviewsView(generics.ListAPIView):
+    # Full review list behind the profile's embedded latest reviews
+    serializer_class = RatingSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = ProfileListPagination
+    query_budget = 2
+    use_replica = True
+    throttle_scope = 'profile'
+
+    def get_queryset(self):
+        return Rating.objects.filter(reviewee_id=self.kwargs['pk']).select_related('reviewer')
+
+class PresenceHeartbeatView(APIView):
+    # Clients call this periodically while the app is open; see users.presence
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 1
+
+    def post(self, request):
+        presence.heartbeat(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
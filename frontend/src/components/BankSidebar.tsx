@@ -13,6 +13,8 @@ const BankSidebar: React.FC = () => {
         checkEligibility,
         claimSupport,
         donate,
+        connectWebSocket,
+        disconnectWebSocket,
         isLoading
     } = useWalletStore();
 
@@ -26,6 +28,13 @@ const BankSidebar: React.FC = () => {
         }
     }, [user, checkEligibility]);
 
+    useEffect(() => {
+        if (!user) return;
+        // Balance changes are pushed by the server after each committed transfer
+        connectWebSocket();
+        return () => disconnectWebSocket();
+    }, [user, connectWebSocket, disconnectWebSocket]);
+
     const handleDonate = async (e: React.FormEvent) => {
         e.preventDefault();
         const amount = parseInt(donateAmount);
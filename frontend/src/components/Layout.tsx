@@ -1,8 +1,12 @@
-import React, { ReactNode } from 'react';
+import React, { ReactNode, useEffect } from 'react';
 import BankSidebar from './BankSidebar';
 import { useAuthStore } from '../store/useAuthStore';
 import { useNavigate } from 'react-router-dom';
 import { LogOut, User } from 'lucide-react';
+import api from '../api/axios';
+
+// Presence heartbeat: keeps the user "online" for Discovery while the app is open
+const HEARTBEAT_INTERVAL_MS = 60_000;
 
 interface LayoutProps {
     children: ReactNode;
@@ -13,6 +17,14 @@ const Layout: React.FC<LayoutProps> = ({ children, title }) => {
     const { logout, user } = useAuthStore();
     const navigate = useNavigate();
 
+    useEffect(() => {
+        if (!user) return;
+        const beat = () => api.post('/users/presence/heartbeat/').catch(() => undefined);
+        beat();
+        const timer = setInterval(beat, HEARTBEAT_INTERVAL_MS);
+        return () => clearInterval(timer);
+    }, [user]);
+
     const handleLogout = () => {
         logout();
         navigate('/login');
@@ -1,4 +1,5 @@
 import { create } from 'zustand';
+import axios from 'axios';
 import api from '../api/axios';
 import { useAuthStore } from './useAuthStore';
 
@@ -19,6 +20,29 @@ interface WalletState {
     disconnectWebSocket: () => void;
 }
 
+let socket: WebSocket | null = null;
+let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+let reconnectAttempts = 0;
+let socketWanted = false;
+
+const RECONNECT_BASE_MS = 1000;
+const RECONNECT_MAX_MS = 30000;
+
+// Reconnects may come long after login: trade the refresh token for a new access token each time.
+// Returns null when the session is over (no refresh token, or it was rejected).
+const freshAccessToken = async (): Promise<string | null> => {
+    const refresh = localStorage.getItem('refresh_token');
+    if (!refresh) return null;
+    try {
+        const response = await axios.post('http://localhost:8000/api/v1/users/token/refresh/', { refresh });
+        localStorage.setItem('access_token', response.data.access);
+        return response.data.access;
+    } catch (err) {
+        console.error("Token refresh failed", err);
+        return null;
+    }
+};
+
 export const useWalletStore = create<WalletState>((set, get) => ({
     balance: 0,
     isEligibleForSupport: false,
@@ -107,12 +131,47 @@ export const useWalletStore = create<WalletState>((set, get) => ({
     },
 
     connectWebSocket: () => {
-        // Placeholder for WS
-        console.log("Connecting to Wallet WS...");
-        // socket = new WebSocket(...)
+        socketWanted = true;
+        if (socket || reconnectTimer) return;
+
+        const open = (token: string) => {
+            const ws = new WebSocket(`ws://localhost:8000/ws/wallet/?token=${token}`);
+            socket = ws;
+            ws.onopen = () => {
+                reconnectAttempts = 0;
+            };
+            ws.onmessage = (event) => {
+                const message = JSON.parse(event.data);
+                if (message.type === 'wallet.update') {
+                    set({ balance: message.balance });
+                }
+            };
+            ws.onclose = () => {
+                // A socket closed by disconnectWebSocket() may report after its replacement opened
+                if (socket !== ws) return;
+                socket = null;
+                if (!socketWanted) return;
+                // Exponential backoff with jitter, so a restarted server is not hit by every client at once
+                const delay = Math.min(RECONNECT_MAX_MS, RECONNECT_BASE_MS * 2 ** reconnectAttempts);
+                reconnectAttempts += 1;
+                reconnectTimer = setTimeout(async () => {
+                    const fresh = await freshAccessToken();
+                    reconnectTimer = null;
+                    if (fresh && socketWanted && !socket) open(fresh);
+                }, delay / 2 + Math.random() * delay / 2);
+            };
+        };
+
+        const token = localStorage.getItem('access_token');
+        if (token) open(token);
     },
 
     disconnectWebSocket: () => {
-        // if (socket) socket.close()
+        socketWanted = false;
+        if (reconnectTimer) clearTimeout(reconnectTimer);
+        reconnectTimer = null;
+        reconnectAttempts = 0;
+        if (socket) socket.close();
+        socket = null;
     }
 }));